@@ -1,82 +1,436 @@
+import time
+_process_start = time.perf_counter()
 import argparse
+import json
 import concurrent.futures
 import logging
 import threading
-from functools import cache
 from importlib import resources
 from pathlib import Path
 from typing import Type
+import updaters
+from updaters import import_times, is_updater_name, load_updater
 from updaters.generic.GenericUpdater import GenericUpdater
 from updaters.shared.parse_config import parse_config
+from updaters.shared.settings import load_settings, get_setting
+from updaters.shared.state_db import open_state_db
+from updaters.shared.drive_index import get_drive_index
+from updaters.shared.parse_duration import parse_duration
+from updaters.shared.pipeline_executor import PipelineExecutor, Stage, StageFailed, NETWORK
+from updaters.shared.schedule_downloads import schedule_downloads
+from updaters.shared.plan_disk_space import DEFAULT_MIN_FREE_MB, free_space, plan_disk_space
+from updaters.shared.fan_out import FanOut
+from updaters.shared.content_store import get_content_store
+from updaters.shared.control_socket import ControlServer, send_control_command, DEFAULT_CONTROL_PORT
+from updaters.shared.peer_server import PeerServer, DEFAULT_PEER_HOST, DEFAULT_PEER_PORT
+from updaters.shared.log_pipeline import LogPipelineHandler, configure_log_pipeline, get_log_pipeline
+
+
+_log_pipeline = get_log_pipeline()
+def logging_callback(msg):
+    # only enqueues: the pipeline's writer thread does the printing
+    _log_pipeline.emit(msg)
+
+def print_startup_profile(phases: list[tuple[str, float]]):
+    """Print where startup time went: the given phases, then each updater import (slowest first)."""
+    _log_pipeline.flush()
+    print("\n==============================\nSTARTUP PROFILE\n==============================")
+    for name, seconds in phases:
+        print(f"{seconds * 1000:9.1f} ms  {name}")
+    times = import_times()
+    print(f"\nUpdater imports ({len(times)} of {len(updaters.__all__) - 1} loaded):")
+    for name, (seconds, pulled_in) in sorted(times.items(), key=lambda item: item[1][0], reverse=True):
+        print(f"{seconds * 1000:9.1f} ms  {name}" + (f"  (+ {', '.join(pulled_in)})" if pulled_in else ""))
+    print("For a per-module breakdown run: python -X importtime sisou2.py ...\n")
+
+def _installer_name(updater: GenericUpdater) -> str:
+    return f"{updater.__class__.__name__}{' '+getattr(updater, 'edition', '') if hasattr(updater, 'has_edition') and updater.has_edition() else ''}"
+
+def install_updaters(updater_list: list[GenericUpdater], on_done=None) -> list[bool | int | None]:
+    """Install and verify several updaters at once on shared network, disk and CPU pools.
+
+    Each updater is run as its stage graph (GenericUpdater.get_install_stages), so one updater's
+    download overlaps another's hashing or extraction. Downloads start longest-first with a
+    per-host cap (see schedule_downloads), and the predicted finish time is printed up front.
+    Per updater the logic is unchanged: up to 5 attempts, and a file that is on disk but corrupt
+    gets a block-level repair before the next attempt. on_done(updater, result), if given, is
+    called as soon as each updater is finished.
+
+    Returns:
+        Per updater (same order), the final check_integrity() result: True on success, False if
+        the file is still corrupt or could not be installed, -1/None if integrity could not be determined.
+    """
+    names = [_installer_name(updater) for updater in updater_list]
+    outcomes: list[bool | int | None] = [False] * len(updater_list)
+    attempts = [1] * len(updater_list)
+    repairing = [False] * len(updater_list)
+
+    def on_graph_done(job: int, results: dict) -> list[Stage] | None:
+        updater = updater_list[job]
+        name = names[job]
+        errors = [result for result in results.values() if isinstance(result, StageFailed)]
+        if errors:
+            logging.error(f"[{name}] An error occurred while updating: {errors[0]}")
+            return None
+        installed = results.get("repair" if repairing[job] else "install")
+        integrity = results.get("verify")
+        if integrity is True:
+            logging.info(f"[{name}] {'Block-level repair succeeded.' if repairing[job] else 'Update completed successfully.'}")
+            updater.record_verified_state()
+            outcomes[job] = True
+            return None
+        if not repairing[job]:
+            if installed and integrity is not False:
+                logging.info(f"[{name}] Update completed but integrity could not be determined.")
+                outcomes[job] = integrity
+                return None
+            if attempts[job] >= 5:
+                logging.info(f"[{name}] File CORRUPTED after install (integrity still fails). Not retrying further.")
+                return None
+            if installed:
+                # The file is on disk but corrupt: try re-fetching only the bad blocks first
+                logging.info(f"[{name}] File CORRUPTED after install. Trying block-level repair...")
+                repairing[job] = True
+                return updater.prepare_stages(updater.get_repair_stages())
+        logging.info(f"[{name}] File CORRUPTED after install. Retrying...")
+        repairing[job] = False
+        attempts[job] += 1
+        logging.info(f"[{name}] Downloading and installing the latest version... (attempt {attempts[job]}/5)")
+        return updater.prepare_stages(updater.get_install_stages())
+
+    def finish(job: int):
+        updater = updater_list[job]
+        try:
+            if outcomes[job] is True:
+                # Only now may the version it replaced go, see plan_disk_space
+                updater.retire_old_versions()
+            elif outcomes[job] is False:
+                updater.restore_old_version()
+        except Exception as e:
+            logging.error(f"[{names[job]}] Could not clean up old versions: {e}")
+        if on_done is not None:
+            on_done(updater, outcomes[job])
+
+    def job_done(job: int, results: dict) -> list[Stage] | None:
+        follow_up = on_graph_done(job, results)
+        if follow_up is None:
+            finish(job)
+        return follow_up
+
+    def first_graph(job: int) -> list[Stage]:
+        logging.info(f"[{names[job]}] Checking for updates...")
+        logging.info(f"[{names[job]}] Downloading and installing the latest version... (attempt 1/5)")
+        return updater_list[job].prepare_stages(updater_list[job].get_install_stages())
+
+    # With a content store, updaters downloading the same URL (e.g. one ISO in two config
+    # folders) run one after another in a single job: the first downloads, the rest are placed
+    # from the store
+    groups = group_by_download_link(updater_list) if get_content_store() is not None else [[job] for job in range(len(updater_list))]
+
+    executor = PipelineExecutor()
+    try:
+        # Longest downloads first, so no multi-GB image starts last and stretches the run
+        plan = schedule_downloads([updater_list[group[0]] for group in groups], logging_callback, workers=executor.workers[NETWORK], host_cap=executor.host_cap)
+        # Installs that don't fit on the drive next to everything else wait for the ones whose
+        # old versions free enough space; what can never fit is refused before downloading
+        chains, rejected = plan_drive_space(updater_list, groups, plan)
+        for group, (shortfall, drive) in rejected.items():
+            for job in groups[group]:
+                logging.error(f"[{names[job]}] Not enough space on {drive}: {shortfall // (1024 * 1024):,} MB short even after old versions are removed. Skipping.")
+                finish(job)
+        # each run is a list of jobs installed one after another as one pipeline job
+        runs = [[job for group in chain for job in groups[group]] for chain in chains]
+        current = [0] * len(runs)
+
+        def run_done(run: int, results: dict) -> list[Stage] | None:
+            follow_up = job_done(runs[run][current[run]], results)
+            if follow_up is None and current[run] + 1 < len(runs[run]):
+                current[run] += 1
+                return first_graph(runs[run][current[run]])
+            return follow_up
+
+        executor.run(
+            [first_graph(run[0]) for run in runs],
+            on_graph_done=run_done,
+            hosts=[plan.hosts[chain[0]] for chain in chains],
+        )
+    finally:
+        executor.shutdown()
+    return outcomes
 
+def plan_drive_space(updater_list: list[GenericUpdater], groups: list[list[int]], plan) -> tuple[list[list[int]], dict[int, tuple[int, Path]]]:
+    """
+    Run plan_disk_space for every drive the groups of updaters install to, in plan order.
 
-_print_lock = threading.Lock()
-def logging_callback(msg):
-    with _print_lock:
-        print(msg, flush=True)
-
-@cache
-def get_available_updaters() -> list[Type[GenericUpdater]]:
-    """Get a list of available updater classes from the updaters package."""
-    import updaters
-    updater_classes = []
-    for name in getattr(updaters, "__all__", []):
-        if name == "GenericUpdater":
+    Returns:
+        Chains of group indices (each run one after another), and the rejected groups with the
+        bytes they are short and their drive.
+    """
+    reserve = int(get_setting("min_free_mb", DEFAULT_MIN_FREE_MB)) * 1024 * 1024
+    needs: dict[int, int] = {}
+    reclaimable: dict[int, int] = {}
+    drives: dict[int | None, list[int]] = {}
+    free: dict[int | None, tuple[int | None, Path]] = {}
+    for group in plan.order:
+        needs[group] = reclaimable[group] = 0
+        for job in groups[group]:
+            try:
+                need, freed = updater_list[job].estimate_disk_space(plan.sizes[group])
+            except Exception:
+                # unknown: don't hold the install back on a guess
+                need, freed = 0, 0
+            needs[group] += need
+            reclaimable[group] += freed
+        folder = updater_list[groups[group][0]].folder_path
+        device, free_bytes = free_space(folder)
+        drives.setdefault(device, []).append(group)
+        free.setdefault(device, (free_bytes, folder))
+    chains: list[list[int]] = []
+    rejected: dict[int, tuple[int, Path]] = {}
+    for device, units in drives.items():
+        free_bytes, folder = free[device]
+        if device is None or free_bytes is None:
+            chains.extend([unit] for unit in units)
             continue
-        obj = getattr(updaters, name, None)
-        if isinstance(obj, type) and issubclass(obj, GenericUpdater) and obj is not GenericUpdater:
-            updater_classes.append(obj)
-    return updater_classes
+        space_plan = plan_disk_space(units, needs, reclaimable, free_bytes, reserve)
+        chains.extend(space_plan.chains)
+        rejected.update({unit: (shortfall, folder) for unit, shortfall in space_plan.rejected.items()})
+    # keep the start order of the chain heads
+    position = {group: index for index, group in enumerate(plan.order)}
+    chains.sort(key=lambda chain: position[chain[0]])
+    return chains, rejected
+
+def group_by_download_link(updater_list: list[GenericUpdater]) -> list[list[int]]:
+    """Indices of updater_list grouped by download URL (first-seen order); unknown links stay alone."""
+    groups: dict[str, list[int]] = {}
+    alone: list[list[int]] = []
+    for job, updater in enumerate(updater_list):
+        try:
+            download_link = updater._get_download_link()
+        except Exception:
+            download_link = None
+        if isinstance(download_link, str):
+            groups.setdefault(download_link, []).append(job)
+        else:
+            alone.append([job])
+    return list(groups.values()) + alone
 
 def run_updater(updater: GenericUpdater):
-    """Run a single updater (already instantiated)."""
-    installer_for = f"{updater.__class__.__name__}{' '+getattr(updater, 'edition', '') if hasattr(updater, 'has_edition') and updater.has_edition() else ''}"
-    logging.info(f"[{installer_for}] Checking for updates...")
+    """Run a single updater (already instantiated) and verify the result, see install_updaters."""
+    return install_updaters([updater])[0]
+    
+
+def check_updaters(updater_list: list[GenericUpdater], executor: concurrent.futures.Executor | None = None) -> list[tuple[GenericUpdater, bool | int | None]]:
+    """Run check_for_updates for every updater in parallel using 4 threads.
 
-    def run_local(attempt=1):
+    A long-running caller (--daemon) passes its own executor, so the same threads (and their
+    HTTP sessions) serve every pass."""
+    def check_and_filter(updater):
         try:
-            logging.info(f"[{installer_for}] Downloading and installing the latest version... (attempt {attempt}/5)")
-            result = updater.install_latest_version()
-            if result:
-                logging.info(f"[{installer_for}] Update completed successfully.")
-                return True
-            else:
-                if attempt < 5:
-                    logging.info(f"[{installer_for}] File CORRUPTED after install. Retrying...")
-                    return run_local(attempt + 1)
+            result = updater.check_for_updates()
+            return (updater, result)
+        except Exception as e:
+            return (updater, -1)
+
+    if executor is not None:
+        return list(executor.map(check_and_filter, updater_list))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        return list(executor.map(check_and_filter, updater_list))
+
+
+def replicate_to_targets(fan_out: FanOut | None, updater: GenericUpdater, result):
+    """Queue an updater's file for the extra Ventoy drives, unless it is missing or failed verification."""
+    if fan_out is not None and result is not False:
+        fan_out.submit(updater)
+
+def print_fan_out_summary(outcomes: dict[Path, dict[str, str]]):
+    """One line per extra Ventoy drive (counts per outcome), plus every copy that failed."""
+    for root, per_updater in outcomes.items():
+        counts: dict[str, int] = {}
+        for outcome in per_updater.values():
+            counts[outcome] = counts.get(outcome, 0) + 1
+        logging_callback(f"[{root}] " + (", ".join(f"{n} {outcome}" for outcome, n in sorted(counts.items())) or "nothing to copy"))
+        for key in sorted(key for key, outcome in per_updater.items() if outcome == "copy failed"):
+            logging_callback(f"[{root}] FAILED: {key}")
+
+def collect_store_garbage():
+    """Delete content store objects that no file references any more (no-op without store_dir)."""
+    store = get_content_store()
+    if store is not None:
+        freed = store.gc(logging_callback)
+        if freed:
+            logging_callback(f"[ContentStore] Freed {freed // (1024 * 1024):,} MB")
+
+def start_peer_server() -> PeerServer | None:
+    """Start serving the content store on serve_address ("host:port"), see PeerServer."""
+    store = get_content_store()
+    if store is None:
+        logging_callback("[PeerServer] --serve needs store_dir in the [sisou2] table of config.toml")
+        return None
+    host, _, port = str(get_setting("serve_address", f"{DEFAULT_PEER_HOST}:{DEFAULT_PEER_PORT}")).rpartition(":")
+    host = host or DEFAULT_PEER_HOST
+    try:
+        server = PeerServer(store, host=host, port=int(port), logging_callback=logging_callback)
+    except (OSError, ValueError) as e:
+        logging_callback(f"[PeerServer] Could not listen on {host}:{port}: {e}")
+        return None
+    server.start()
+    logging_callback(f"[PeerServer] Serving {store.root} on http://{server.address[0]}:{server.address[1]}")
+    if host not in ("127.0.0.1", "localhost", "::1"):
+        logging_callback("[PeerServer] There is no authentication: anyone who can reach this address can read the store")
+    return server
+
+def run_daemon(ventoy_path: Path, config: dict, retries: int, targets: list[Path] = ()):
+    """Keep running: check each updater on its own poll_interval and install only what changed upstream.
+
+    Imported modules, HTTP connection pools, mirror rankings and the state database stay warm
+    between runs. Updaters due at the same time are checked together in one pass, and run
+    requests arriving while a pass is busy are coalesced into the next one. A localhost control
+    socket accepts "status", "run [Updater ...]" and "stop". Files are copied to the extra
+    Ventoy drives in targets after every pass.
+    """
+    default_interval = parse_duration(get_setting("poll_interval", "1d")) or 86400
+    lock = threading.Lock()
+    wake = threading.Event()
+    stop = threading.Event()
+    requested: set[str] = set()
+    # "Updater|edition|lang" as configured (lowercase) -> interval, last_check, next_due, last_result,
+    # and the updater's state key once it has been created (editions can come from a default)
+    status: dict[str, dict] = {}
+    running = [False]
+    # one pool for every pass: its threads keep their HTTP sessions warm
+    check_pool = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+
+    def control(command: str, command_args: list[str]) -> dict:
+        if command == "status":
+            with lock:
+                updaters_status = {}
+                for spec, entry in status.items():
+                    entry = dict(entry)
+                    updaters_status[entry.pop("updater", None) or spec] = entry
+                return {"ok": True, "running": running[0], "updaters": updaters_status}
+        if command == "run":
+            targets = [target.lower() for target in command_args] or ["*"]
+            with lock:
+                requested.update(targets)
+            wake.set()
+            return {"ok": True, "queued": targets}
+        if command == "stop":
+            stop.set()
+            wake.set()
+            return {"ok": True}
+        return {"ok": False, "error": f"Unknown command {command!r}. Use: status, run [Updater ...], stop"}
+
+    server = ControlServer(control, port=int(get_setting("control_port", DEFAULT_CONTROL_PORT)))
+    server.start()
+    logging_callback(f"[daemon] Control socket listening on 127.0.0.1:{server.port}")
+
+    while not stop.is_set():
+        wake.clear()
+        now = time.time()
+        with lock:
+            forced = set(requested)
+            requested.clear()
+            running[0] = True
+        due: list[str] = []
+
+        def select(key: str, param: dict, value: dict) -> bool:
+            spec = f"{key}|{param.get('edition', '')}|{param.get('lang', '')}".lower()
+            interval = parse_duration(value.get("poll_interval")) or default_interval
+            with lock:
+                entry = status.setdefault(spec, {"interval": interval, "last_check": None, "next_due": now, "last_result": None})
+                entry["interval"] = interval
+                is_due = (
+                    "*" in forced or key.lower() in forced or spec in forced
+                    or entry.get("updater", "").lower() in forced or entry["next_due"] <= now
+                )
+            if is_due:
+                due.append(spec)
+            return is_due
+
+        # updater -> its spec, so outcomes land on the entry that scheduled it
+        spec_of: dict[int, str] = {}
+
+        def created(key: str, param: dict, updater: GenericUpdater):
+            spec = f"{key}|{param.get('edition', '')}|{param.get('lang', '')}".lower()
+            spec_of[id(updater)] = spec
+            with lock:
+                status[spec]["updater"] = updater._state_key()
+
+        # Files may have changed on the drive since the last pass
+        get_drive_index().invalidate()
+        updaters_list.clear()
+        stack_updaters(ventoy_path, config, retries_count=retries, selector=select, on_created=created)
+        outcomes: dict[str, str] = {}
+        if updaters_list:
+            logging_callback(f"[daemon] Checking {len(updaters_list)} updater(s)")
+            fan_out = FanOut(ventoy_path, list(targets), logging_callback) if targets else None
+            to_install = []
+            for updater, result in check_updaters(updaters_list, check_pool):
+                if result is False:
+                    outcomes[spec_of[id(updater)]] = "up to date"
+                    replicate_to_targets(fan_out, updater, result)
+                elif result == -1:
+                    outcomes[spec_of[id(updater)]] = "check unavailable"
                 else:
-                    logging.info(f"[{installer_for}] File CORRUPTED after install (integrity still fails). Not retrying further.")
-                    return False
-        except Exception:
-            logging.exception(f"[{installer_for}] An error occurred while updating. See traceback below.")
-            return False
+                    to_install.append(updater)
+            results = install_updaters(to_install, on_done=lambda updater, integrity: replicate_to_targets(fan_out, updater, integrity))
+            for updater, integrity in zip(to_install, results):
+                outcomes[spec_of[id(updater)]] = "updated" if integrity is True else "update failed"
+            if fan_out is not None:
+                print_fan_out_summary(fan_out.wait())
+            collect_store_garbage()
+            for updater in updaters_list:
+                logging_callback(f"[daemon] {updater._state_key()}: {outcomes[spec_of[id(updater)]]}")
+            # the @cache'd methods hold on to every instance they saw: release this pass's updaters
+            for updater_class in {type(updater) for updater in updaters_list}:
+                updater_class.clear_instance_caches()
+            updaters_list.clear()
+
+        finished = time.time()
+        with lock:
+            for spec in due:
+                entry = status[spec]
+                entry["last_check"] = finished
+                entry["next_due"] = finished + entry["interval"]
+                entry["last_result"] = outcomes.get(spec, "could not create updater")
+            running[0] = False
+            next_due = min((entry["next_due"] for entry in status.values()), default=finished + default_interval)
+        wake.wait(timeout=max(1.0, next_due - time.time()))
+
+    server.stop()
+    check_pool.shutdown(wait=False)
+    logging_callback("[daemon] Stopped.")
 
-    return run_local()
-    
 
 updaters_list: list[GenericUpdater] = []
 
 def stack_updaters(
     install_path: Path,
     config: dict,
-    updater_list: list[Type[GenericUpdater]],
     retries_count: int = 0,
+    selector=None,
+    on_created=None,
 ):
     global updaters_list
     """Run updaters based on the provided configuration.
 
+    Updater modules are imported here, the first time their key shows up in the config.
+
     Args:
         install_path (Path): The installation path.
         config (dict): The configuration dictionary.
-        updater_list (list[Type[GenericUpdater]]): A list of available updater classes.
+        selector: Optional selector(key, params, value) -> bool; updaters it rejects aren't created.
+        on_created: Optional on_created(key, params, updater), called for each updater created.
     """
     if isinstance(config, dict):
         for key, value in config.items():
             # If the key's name is the name of an updater, run said updater using the values as argument, otherwise assume it's a folder's name
-            if key in [updater.__name__ for updater in updater_list]:
-                updater_class = next(
-                    updater for updater in updater_list if updater.__name__ == key
-                )
+            if is_updater_name(key):
+                updater_class: Type[GenericUpdater] | None = load_updater(key)
+                if updater_class is None:
+                    logging_callback(f"[{key}] Could not import the updater, skipping it.")
+                    continue
 
                 params: list[dict] = [{}]
 
@@ -95,25 +449,30 @@ def stack_updaters(
                     params = [{"lang": lang} for lang in langs]
 
                 for param in params:
+                    if selector is not None and not selector(key, param, value):
+                        continue
                     try:
-                        updaters_list.append(
-                            updater_class(
-                                install_path,
-                                parent_logging_callback=logging_callback,
-                                retries_count=retries_count,
-                                **param,
-                            )
+                        updater = updater_class(
+                            install_path,
+                            parent_logging_callback=logging_callback,
+                            retries_count=retries_count,
+                            mirrors=value.get("mirrors", []),
+                            **param,
                         )
                     except Exception:
                         installer_for = f"{key} {param}"
                         logging.exception(
                             f"[{installer_for}] An error occurred while trying to add the installer. See traceback below."
-                        )           
+                        )
+                        continue
+                    updaters_list.append(updater)
+                    if on_created is not None:
+                        on_created(key, param, updater)
             else:
-                stack_updaters(install_path / key, value, updater_list, retries_count)
+                stack_updaters(install_path / key, value, retries_count, selector, on_created)
     elif isinstance(config, list):
         for item in config:
-            stack_updaters(install_path, item, updater_list, retries_count)
+            stack_updaters(install_path, item, retries_count, selector, on_created)
         
     
 
@@ -131,7 +490,11 @@ def main():
         help="Only check which updaters need to be updated, do not download or install."
     )
     # Add the positional argument for the file path
-    parser.add_argument("ventoy_path", help="Path to the Ventoy drive")
+    parser.add_argument(
+        "ventoy_path",
+        nargs="*",
+        help="Path to the Ventoy drive. With several paths, each file is downloaded once to the first and copied to the others.",
+    )
 
     # Add the optional argument for log level
     parser.add_argument(
@@ -155,7 +518,58 @@ def main():
         help="Number of retries per file on bad internet connections (use 'all' for infinite retries)",
     )
 
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Report how long startup took, including each updater module import.",
+    )
+
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Keep running and check each updater on its poll_interval (see config.toml).",
+    )
+
+    parser.add_argument(
+        "--control",
+        metavar="COMMAND",
+        help="Send a command to a running daemon: 'status', 'run [Updater ...]' or 'stop'.",
+    )
+    parser.add_argument(
+        "--control-port",
+        type=int,
+        default=DEFAULT_CONTROL_PORT,
+        help=f"Port of the daemon control socket for --control (default: {DEFAULT_CONTROL_PORT}).",
+    )
+
+    parser.add_argument(
+        "--log-file",
+        metavar="PATH",
+        help="Also write every log message as a JSON line (time, updater, phase, bytes, elapsed) to PATH "
+             "(log_file in config.toml).",
+    )
+
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Serve the content store (store_dir) and cached metadata to other sisou2 instances on the LAN "
+             "(serve_address in config.toml; the default, 127.0.0.1, is this machine only). There is no "
+             "authentication: anyone who can reach serve_address can read the store. With --daemon the "
+             "server runs alongside; otherwise only the server runs.",
+    )
+
     args = parser.parse_args()
+    logging.basicConfig(level=args.log_level, format="%(message)s", handlers=[LogPipelineHandler(_log_pipeline)])
+
+    if args.control:
+        try:
+            print(json.dumps(send_control_command(args.control, port=args.control_port), indent=2))
+        except OSError as e:
+            print(f"Could not reach the daemon on 127.0.0.1:{args.control_port}: {e}")
+            exit(1)
+        return
+    if not args.ventoy_path and not (args.serve and args.config_file and not args.daemon):
+        parser.error("the following arguments are required: ventoy_path")
 
     if args.testrun:
         print("\n==============================\nRUNNING TEST RUN\n==============================\n")
@@ -171,7 +585,9 @@ def main():
             print("Invalid value for --retries/-r. Use an integer or 'all'.")
             exit(1)
 
-    ventoy_path = Path(args.ventoy_path).resolve()
+    ventoy_targets = [Path(path).resolve() for path in args.ventoy_path]
+    ventoy_path = ventoy_targets[0] if ventoy_targets else None
+    extra_targets = list(dict.fromkeys(target for target in ventoy_targets[1:] if target != ventoy_path))
 
     config_file = Path(args.config_file) if args.config_file else None
     if not config_file:
@@ -199,25 +615,46 @@ def main():
                     "Generated config.toml in the ventoy drive. Continuing with the default configuration."
                 )
 
+    main_start = time.perf_counter()
     config = parse_config(config_file, logging_callback)
     if not config:
         raise ValueError("Configuration file could not be parsed or is empty")
-
-    available_updaters: list[Type[GenericUpdater]] = get_available_updaters()
+    load_settings(config)
+    configure_log_pipeline(args.log_file, logging_callback)
+    if args.serve:
+        server = start_peer_server()
+        if server is None:
+            exit(1)
+        if not args.daemon:
+            try:
+                while True:
+                    time.sleep(1)
+            except KeyboardInterrupt:
+                server.stop()
+            return
+    if get_setting("state_db", True):
+        open_state_db(ventoy_path)
+    config_parsed = time.perf_counter()
+
+    if args.daemon:
+        run_daemon(ventoy_path, config, retries, targets=extra_targets)
+        return
 
     updaters_list.clear()
-    stack_updaters(ventoy_path, config, available_updaters, retries_count=retries)
-
-    # After updaters are accumulated, filter them in parallel using 4 threads
-    def check_and_filter(updater):
-        try:
-            result = updater.check_for_updates()
-            return (updater, result)
-        except Exception as e:
-            return (updater, -1)
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
-        results = list(executor.map(check_and_filter, updaters_list))
+    stack_updaters(ventoy_path, config, retries_count=retries)
+
+    if args.profile_startup:
+        stacked = time.perf_counter()
+        imports = sum(seconds for seconds, _ in import_times().values())
+        print_startup_profile([
+            ("interpreter, imports and arguments", main_start - _process_start),
+            ("parse config", config_parsed - main_start),
+            ("import updaters", imports),
+            ("create updaters", stacked - config_parsed - imports),
+            ("total", stacked - _process_start),
+        ])
+
+    results = check_updaters(updaters_list)
     # Separate updaters that need update and those that do not
     updaters_to_update = [u for u, keep in results if keep is True or keep is None]
     updaters_list[:] = updaters_to_update
@@ -238,6 +675,7 @@ def main():
             else:
                 to_download.append(entry)
 
+        _log_pipeline.flush()
         print(f"\nChecked {len(results)} updaters.")
         print("--- Test Run: Updaters that FAILED (integrity unavailable, -1) ---")
         for cls_name, edition, lang in failed:
@@ -258,18 +696,25 @@ def main():
         print(f"Total: {len(to_download)} updaters would be downloaded.")
         return
 
-    # Track which updaters were actually updated (install_latest_version returned True)
-
-    # Use run_updater for update logic, then check integrity if update succeeded
-    for updater in updaters_list:
-        result = run_updater(updater)
-        if result:
-            integrity = updater.check_integrity()
-            status = "PASS" if integrity is True else "FAIL"
-            cls_name = updater.__class__.__name__
-            edition = getattr(updater, "edition", None)
-            lang = getattr(updater, "lang", None)
-            print(f"[Integrity {status}] {cls_name} | edition: {edition} | lang: {lang}")
+    # Files already current on the first drive can be copied to the others right away
+    fan_out = FanOut(ventoy_path, extra_targets, logging_callback) if extra_targets else None
+    for updater, result in results:
+        if result is False:
+            replicate_to_targets(fan_out, updater, result)
+
+    # install_updaters verifies (and repairs or retries) each install, several at once
+    installed = install_updaters(updaters_list, on_done=lambda updater, integrity: replicate_to_targets(fan_out, updater, integrity))
+    _log_pipeline.flush()
+    for updater, integrity in zip(updaters_list, installed):
+        status = "PASS" if integrity is True else "FAIL"
+        cls_name = updater.__class__.__name__
+        edition = getattr(updater, "edition", None)
+        lang = getattr(updater, "lang", None)
+        print(f"[Integrity {status}] {cls_name} | edition: {edition} | lang: {lang}")
+
+    if fan_out is not None:
+        print_fan_out_summary(fan_out.wait())
+    collect_store_garbage()
 
     logging.debug("Finished execution")
 
@@ -278,4 +723,5 @@ if __name__ == "__main__":
     try:
         main()
     except KeyboardInterrupt:
+        _log_pipeline.flush()
         print("\nOperation cancelled by user (Ctrl+C). Exiting gracefully.")
@@ -0,0 +1,55 @@
+"""
+Time extract_links against BeautifulSoup(..., "html.parser") on the saved listing pages in
+tests/fixtures/listings, after checking that both find the same hrefs.
+
+    python tests/bench_extract_links.py [rounds]
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from updaters.shared.extract_links import _lxml_html, extract_links  # noqa: E402
+
+LISTINGS = Path(__file__).resolve().parent / "fixtures" / "listings"
+# Pages whose updater only reads the links inside one element
+CONTAINER_IDS = {"debian": "indexlist"}
+
+
+def soup_hrefs(html: bytes, container_id: str | None) -> list[str]:
+    """The hrefs the updaters used to collect with BeautifulSoup."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    if container_id is not None:
+        soup = soup.find(id=container_id)
+    return [a["href"] for a in soup.find_all("a", href=True)]
+
+
+def best_of(rounds: int, fn) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(rounds: int = 50) -> int:
+    print(f"extract_links backend: {'lxml' if _lxml_html() else 'html.parser tokenizer'}, best of {rounds}")
+    print(f"{'page':<12}{'links':>7}{'extract_links':>16}{'BeautifulSoup':>16}{'speedup':>9}")
+    for page in sorted(LISTINGS.glob("*.html")):
+        html = page.read_bytes()
+        container_id = CONTAINER_IDS.get(page.stem)
+        links = extract_links(html, container_id)
+        expected = soup_hrefs(html, container_id)
+        assert links.hrefs == expected, f"{page.name}: extract_links and BeautifulSoup disagree"
+        ours = best_of(rounds, lambda: extract_links(html, container_id))
+        theirs = best_of(rounds, lambda: soup_hrefs(html, container_id))
+        print(f"{page.stem:<12}{len(links):>7}{ours * 1e3:>13.3f} ms{theirs * 1e3:>13.3f} ms{theirs / ours:>8.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 50))
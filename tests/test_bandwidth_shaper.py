@@ -0,0 +1,57 @@
+import pytest
+
+from updaters.shared.bandwidth_shaper import BURST_SECONDS, BandwidthShaper, TokenBucket, _matches_days, _matches_hours
+from updaters.shared.settings import load_settings
+
+
+@pytest.fixture(autouse=True)
+def clean_settings():
+    yield
+    load_settings({})
+
+
+def test_bucket_lends_the_burst_then_charges_debt():
+    bucket = TokenBucket(1000)
+    assert bucket.reserve(int(1000 * BURST_SECONDS)) == 0.0
+    assert bucket.reserve(500) == pytest.approx(0.5, abs=0.02)
+    # a second transfer queues behind the first one's debt
+    assert bucket.reserve(500) == pytest.approx(1.0, abs=0.02)
+
+
+def test_day_and_hour_specs():
+    monday, saturday = 0, 5
+    assert _matches_days("mon-fri", monday) and not _matches_days("mon-fri", saturday)
+    assert _matches_days("sat,sun", saturday) and _matches_days("fri-mon", monday)
+    assert _matches_days(None, saturday) and _matches_days("daily", saturday)
+    assert not _matches_days("someday", monday)
+    assert _matches_hours("08:00-18:00", 8 * 60) and not _matches_hours("08:00-18:00", 18 * 60)
+    # wraps past midnight
+    assert _matches_hours("22:00-06:00", 23 * 60) and _matches_hours("22:00-06:00", 60)
+    assert not _matches_hours("22:00-06:00", 12 * 60)
+    assert not _matches_hours("noon-night", 12 * 60)
+
+
+def test_unlimited_without_settings():
+    shaper = BandwidthShaper()
+    assert not shaper.is_active()
+    assert shaper.limit_for("https://cdimage.kali.org/a.iso") is None
+    assert shaper.throttle("https://cdimage.kali.org/a.iso", 10**9) == 0.0
+
+
+def test_host_caps_apply_to_subdomains():
+    load_settings({"sisou2": {"bandwidth_limit": "4M", "bandwidth_host_limits": {"kali.org": "1M"}}})
+    shaper = BandwidthShaper()
+    assert shaper.is_active()
+    assert shaper.limit_for("https://cdimage.kali.org/a.iso") < shaper.limit_for("https://cdimage.debian.org/a.iso")
+    assert shaper.limit_for("https://notkali.org/a.iso") == shaper.limit_for("https://cdimage.debian.org/a.iso")
+
+
+def test_a_matching_profile_replaces_the_plain_limits():
+    load_settings({"sisou2": {"bandwidth_limit": "2M"}})
+    two_megabytes = BandwidthShaper().limit_for("https://example.org/a.iso")
+    load_settings({"sisou2": {
+        "bandwidth_limit": "4M",
+        # "00:00-00:00" never matches, so the catch-all second profile applies
+        "bandwidth_profiles": [{"days": "daily", "hours": "00:00-00:00", "limit": "1M"}, {"limit": "2M"}],
+    }})
+    assert BandwidthShaper().limit_for("https://example.org/a.iso") == two_megabytes
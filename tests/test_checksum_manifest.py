@@ -0,0 +1,69 @@
+from updaters.shared.checksum_manifest import ChecksumManifest
+
+SHA256 = "a" * 64
+SHA1 = "b" * 40
+MD5 = "c" * 32
+
+GNU = f"""{SHA256}  debian-live-12.7.0-amd64-kde.iso
+{"d" * 64} *debian-live-12.7.0-amd64-xfce.iso
+{"e" * 64}  ./isos/x86_64/Rocky-9.4-x86_64-dvd.iso
+"""
+
+FEDORA = f"""-----BEGIN PGP SIGNED MESSAGE-----
+Hash: SHA256
+
+# Fedora-Workstation-Live-x86_64-40-1.14.iso: 2295853056 bytes
+SHA256 (Fedora-Workstation-Live-x86_64-40-1.14.iso) = {SHA256.upper()}
+-----BEGIN PGP SIGNATURE-----
+
+iQIzBAEBCAAdFiEE{"x" * 40}
+-----END PGP SIGNATURE-----
+"""
+
+MIXED = f"""MD5 (tails.img) = {MD5}
+SHA1 (tails.img) = {SHA1}
+SHA-256 (tails.img) = {SHA256}
+"""
+
+
+def test_gnu_lines():
+    manifest = ChecksumManifest(GNU)
+    assert len(manifest) == 3
+    assert manifest.digest("debian-live-12.7.0-amd64-kde.iso") == SHA256
+    # binary-mode "*name" and "./path" prefixes are not part of the name
+    assert manifest.digest("debian-live-12.7.0-amd64-xfce.iso") == "d" * 64
+    assert manifest.digest("isos/x86_64/Rocky-9.4-x86_64-dvd.iso") == "e" * 64
+    assert manifest.digest("Rocky-9.4-x86_64-dvd.iso") == "e" * 64
+    assert manifest.digest("debian-live-12.7.0-amd64-kde.iso", "sha1") is None
+    assert manifest.names()[0] == "debian-live-12.7.0-amd64-kde.iso"
+
+
+def test_fedora_checksum_file():
+    manifest = ChecksumManifest(FEDORA)
+    name = "Fedora-Workstation-Live-x86_64-40-1.14.iso"
+    assert len(manifest) == 1 and name in manifest
+    assert manifest.digest(name) == SHA256
+    assert manifest.sizes == {name: 2295853056}
+
+
+def test_several_algorithms_for_one_name():
+    manifest = ChecksumManifest(MIXED)
+    assert manifest.digest("tails.img", "md5") == MD5
+    assert manifest.digest("tails.img", "SHA1") == SHA1
+    assert manifest.digest("tails.img") == SHA256
+    assert manifest.digest("tails.img", None) == MD5
+
+
+def test_find_uses_parse_hash_semantics():
+    manifest = ChecksumManifest(GNU)
+    assert manifest.find(["debian-live-12.7.0-amd64-kde.iso"]) == SHA256
+    # substrings and several match strings fall back to scanning the lines
+    assert manifest.find(["amd64", "xfce"]) == "d" * 64
+    assert manifest.find(["Rocky", "dvd"], "sha256") == "e" * 64
+    assert manifest.find(["amd64", "gnome"]) is None
+    assert manifest.find(["kde"], "md5") is None
+
+
+def test_unknown_lines_are_ignored():
+    manifest = ChecksumManifest("not a checksum\n12345  too-short.iso\n\n")
+    assert len(manifest) == 0 and manifest.digest("too-short.iso") is None
@@ -0,0 +1,48 @@
+from updaters.shared.content_store import ContentStore
+
+
+def _store_with(tmp_path, *names):
+    store = ContentStore(tmp_path / "store")
+    drive = tmp_path / "drive"
+    drive.mkdir()
+    keys = {}
+    for name in names:
+        file = drive / name
+        file.write_bytes(name.encode() * 1000)
+        keys[name] = store.adopt(file, f"https://example.org/{name}", f"folder|{name}", print)
+    return store, drive, keys
+
+
+def test_gc_drops_missing_and_changed_references(tmp_path):
+    store, drive, keys = _store_with(tmp_path, "a.iso", "b.iso", "c.iso")
+    (drive / "a.iso").unlink()
+    (drive / "b.iso").unlink()
+    (drive / "b.iso").write_bytes(b"changed")
+
+    assert store.gc(print) == 2 * 5000
+    assert not store.object_path(keys["a.iso"]).exists()
+    assert not store.object_path(keys["b.iso"]).exists()
+    assert store.object_path(keys["c.iso"]).exists()
+    assert store.lookup("https://example.org/a.iso") is None
+    assert store.lookup("https://example.org/c.iso") == keys["c.iso"]
+
+
+def test_gc_keeps_references_on_unplugged_drives(tmp_path):
+    store, drive, keys = _store_with(tmp_path, "a.iso", "b.iso", "c.iso")
+    placements = {name: store._objects[key]["placements"] for name, key in keys.items()}
+    # a.iso: its mount point is left behind as an empty folder; b.iso: the mount point is gone;
+    # c.iso: recorded without a mount point, and its folder is gone
+    (tmp_path / "media").mkdir()
+    for ref in placements["a.iso"].values():
+        ref["root"] = str(tmp_path / "media")
+    for ref in placements["b.iso"].values():
+        ref["root"] = str(tmp_path / "gone")
+    for ref in placements["c.iso"].values():
+        del ref["root"]
+    for name in keys:
+        (drive / name).unlink()
+    drive.rmdir()
+
+    assert store.gc(print) == 0
+    for key in keys.values():
+        assert store.object_path(key).exists()
@@ -0,0 +1,39 @@
+import os
+
+from updaters.shared.drive_index import DriveIndex
+
+
+def test_lookups_come_from_one_scan(tmp_path):
+    (tmp_path / "a.iso").write_bytes(b"x" * 10)
+    index = DriveIndex()
+    assert index.stat(tmp_path / "a.iso").size == 10
+    assert index.find(tmp_path, "*.iso") == [tmp_path / "a.iso"]
+    # created behind the index's back: not listed, but a direct lookup still finds it
+    (tmp_path / "b.iso").write_bytes(b"y")
+    assert index.exists(tmp_path / "b.iso")
+
+
+def test_fresh_stat_sees_changes_behind_the_index(tmp_path):
+    file = tmp_path / "a.iso"
+    file.write_bytes(b"x" * 10)
+    index = DriveIndex()
+    assert index.stat(file).size == 10
+    file.write_bytes(b"x" * 20)
+    assert index.stat(file).size == 10
+    assert index.stat(file, fresh=True).size == 20
+    assert index.stat(file).size == 20
+    os.unlink(file)
+    assert index.stat(file, fresh=True) is None
+    assert not index.exists(file)
+
+
+def test_update_and_invalidate(tmp_path):
+    index = DriveIndex()
+    assert index.listdir(tmp_path) == {}
+    (tmp_path / "new.iso").write_bytes(b"z")
+    assert index.find(tmp_path, "*.iso") == []
+    index.update(tmp_path / "new.iso")
+    assert index.find(tmp_path, "*.iso") == [tmp_path / "new.iso"]
+    (tmp_path / "other.iso").write_bytes(b"z")
+    index.invalidate()
+    assert sorted(index.listdir(tmp_path)) == ["new.iso", "other.iso"]
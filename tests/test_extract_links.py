@@ -0,0 +1,44 @@
+import pytest
+
+from tests.bench_extract_links import CONTAINER_IDS, LISTINGS, soup_hrefs
+from updaters.shared.extract_links import extract_links
+
+PAGES = sorted(page.stem for page in LISTINGS.glob("*.html"))
+
+
+def _links(name: str):
+    return extract_links((LISTINGS / f"{name}.html").read_bytes(), CONTAINER_IDS.get(name))
+
+
+@pytest.mark.parametrize("name", PAGES)
+def test_same_hrefs_as_beautifulsoup(name):
+    html = (LISTINGS / f"{name}.html").read_bytes()
+    assert _links(name).hrefs == soup_hrefs(html, CONTAINER_IDS.get(name))
+
+
+def test_container_only():
+    links = _links("debian")
+    assert "https://www.debian.org/CD/" not in links.hrefs
+    assert links.containing("-amd64-kde.iso")[0].href == "debian-live-12.7.0-amd64-kde.iso"
+    # every row links the file twice: the icon (no text) first, then the name
+    assert [link.text for link in links.containing("SHA256SUMS") if link.href == "SHA256SUMS"] == ["", "SHA256SUMS"]
+
+
+def test_lookups_the_updaters_use():
+    kali = _links("kalilinux")
+    assert kali.by_name("kali-linux-2024.3-live-amd64.iso").href == "kali-linux-2024.3-live-amd64.iso"
+    assert kali.by_name("kali-linux-2024.3-live-amd64.iso.torrent").href.endswith(".torrent")
+    assert kali.by_name("kali-linux-2024.3-purple-amd64.iso") is None
+    # nginx shortens long names in the link text, the href stays whole
+    assert kali.by_name("kali-linux-2024.3-installer-everything-amd64.iso.torrent").text.endswith("..>")
+
+    assert _links("archlinux").containing("archlinux")[0].text == "archlinux-2024.10.01-x86_64.iso"
+    assert _links("tails").by_name("tails-amd64-6.8.1").href == "tails-amd64-6.8.1/"
+    assert [href for href in _links("rockylinux").hrefs if href[0].isnumeric()] == ["8/", "8.10/", "8.9/", "9/", "9.4/", "9.5/"]
+
+
+def test_empty_and_broken_pages():
+    assert len(extract_links(b"")) == 0
+    assert extract_links("<a href='a.iso'>a<a href=b.iso>b</a>").hrefs == ["a.iso", "b.iso"]
+    assert extract_links("<a href='x?a=1&amp;b=2'>x</a>").hrefs == ["x?a=1&b=2"]
+    assert len(extract_links("<p>no list</p>", container_id="indexlist")) == 0
@@ -0,0 +1,108 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from updaters.shared.http_cache import CACHE_HEADER, HttpCache, make_caching_adapter
+from updaters.shared.parse_byte_range import parse_byte_range
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=10-", (10, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=900-5000", (900, 999)),
+    (" bytes=5-5 ", (5, 5)),
+    ("bytes=1000-", None),
+    ("bytes=5-4", None),
+    ("bytes=-0", None),
+    ("bytes=-", None),
+    ("bytes=0-1,5-6", None),
+    ("items=0-1", None),
+    (None, None),
+])
+def test_parse_byte_range(header, expected):
+    assert parse_byte_range(header, 1000) == expected
+
+
+class UpstreamHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body, etag = self.server.body, f'"v{self.server.version}"'
+        self.server.requests.append(self.headers.get("Range"))
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        byte_range = parse_byte_range(self.headers.get("Range"), len(body))
+        first, last = byte_range or (0, len(body) - 1)
+        self.send_response(206 if byte_range else 200)
+        if byte_range:
+            self.send_header("Content-Range", f"bytes {first}-{last}/{len(body)}")
+        self.send_header("Content-Length", str(last - first + 1))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body[first:last + 1])
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def upstream():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), UpstreamHandler)
+    httpd.body, httpd.version, httpd.requests = bytes(range(256)) * 64, 1, []
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}/a.iso"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def cached_session(tmp_path):
+    cache = HttpCache(tmp_path / "http", 1 << 30)
+    with requests.Session() as session:
+        session.mount("http://", make_caching_adapter(cache))
+        yield session, cache
+
+
+def _expire(cache, url):
+    cache._entries[cache.key(url)]["validated_at"] = 0
+
+
+def test_full_body_is_stored_and_ranges_served_from_disk(upstream, cached_session):
+    session, cache = cached_session
+    assert session.get(upstream.url).content == upstream.body
+    assert (cache.root / (cache.key(upstream.url) + ".body")).read_bytes() == upstream.body
+
+    r = session.get(upstream.url, headers={"Range": "bytes=100-199"})
+    assert (r.status_code, r.headers[CACHE_HEADER], r.content) == (206, "hit", upstream.body[100:200])
+    assert r.headers["Content-Range"] == f"bytes 100-199/{len(upstream.body)}"
+    assert upstream.requests == [None]
+
+
+def test_unchanged_upstream_revalidates_with_304(upstream, cached_session):
+    session, cache = cached_session
+    session.get(upstream.url)
+    _expire(cache, upstream.url)
+    r = session.get(upstream.url, headers={"Range": "bytes=0-9"})
+    assert (r.status_code, r.headers[CACHE_HEADER], r.content) == (206, "hit", upstream.body[:10])
+    assert cache.is_fresh(cache.get(upstream.url))
+
+
+def test_range_of_a_changed_entry_comes_from_upstream(upstream, cached_session):
+    session, cache = cached_session
+    session.get(upstream.url)
+    upstream.body, upstream.version = upstream.body[::-1], 2
+    _expire(cache, upstream.url)
+
+    r = session.get(upstream.url, headers={"Range": "bytes=100-199"})
+    assert r.status_code == 206
+    assert r.content == upstream.body[100:200]
+    assert CACHE_HEADER not in r.headers
+    assert cache.get(upstream.url) is None
+    # the next full GET stores the new release
+    assert session.get(upstream.url).content == upstream.body
+    assert cache.get(upstream.url)["headers"]["etag"] == '"v2"'
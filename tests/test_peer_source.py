@@ -0,0 +1,40 @@
+import hashlib
+
+import pytest
+
+from updaters.shared.content_store import ContentStore
+from updaters.shared.peer_server import PeerServer
+from updaters.shared.peer_source import find_peer_source
+from updaters.shared.settings import load_settings
+
+URL = "https://example.org/a.iso"
+DATA = b"release 2" * 1000
+
+
+@pytest.fixture
+def peer(tmp_path):
+    file = tmp_path / "a.iso"
+    file.write_bytes(DATA)
+    store = ContentStore(tmp_path / "store")
+    store.adopt(file, URL, "folder|a", print)
+    server = PeerServer(store, port=0, logging_callback=lambda msg: None)
+    server.start()
+    load_settings({"sisou2": {"peer": f"127.0.0.1:{server.address[1]}"}})
+    yield server
+    load_settings({})
+    server.stop()
+
+
+def test_peer_with_the_expected_digest_is_used(peer):
+    digest = hashlib.sha256(DATA).hexdigest()
+    assert find_peer_source(URL, len(DATA), print, {"sha256": digest.upper()}).endswith("/artifact?url=https%3A%2F%2Fexample.org%2Fa.iso")
+    # nothing to compare against: the updater's checksum check still has the last word
+    assert find_peer_source(URL, len(DATA), print, {"sha1": "0" * 40}) is not None
+    assert find_peer_source(URL, len(DATA), print) is not None
+
+
+def test_peer_with_another_build_is_skipped(peer):
+    messages = []
+    assert find_peer_source(URL, len(DATA), messages.append, {"sha256": "0" * 64}) is None
+    assert "different build" in messages[0]
+    assert find_peer_source(URL, len(DATA) + 1, print) is None
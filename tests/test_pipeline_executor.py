@@ -0,0 +1,88 @@
+import threading
+import time
+
+import pytest
+
+from updaters.shared.pipeline_executor import CPU, DISK, NETWORK, PipelineExecutor, Stage, StageFailed
+
+
+@pytest.fixture
+def executor():
+    executor = PipelineExecutor(network_workers=4, disk_workers=1, cpu_workers=2, host_cap=2)
+    yield executor
+    executor.shutdown()
+
+
+def _run(executor, *args, **kwargs):
+    """executor.run, failing the test instead of hanging if it never returns."""
+    outcome = {}
+    thread = threading.Thread(target=lambda: outcome.update(results=executor.run(*args, **kwargs)), daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+    assert not thread.is_alive(), "PipelineExecutor.run did not return"
+    return outcome["results"]
+
+
+def test_instant_and_empty_graphs_complete(executor):
+    # every graph may finish before the next one is even started
+    graphs = [[Stage("only", CPU, lambda inputs: 1)] for _ in range(50)] + [[]]
+    results = _run(executor, graphs)
+    assert results[:50] == [{"only": 1}] * 50 and results[50] == {}
+    assert _run(executor, []) == []
+
+
+def test_stages_get_the_results_they_run_after(executor):
+    graph = [
+        Stage("download", NETWORK, lambda inputs: 2),
+        Stage("hash", CPU, lambda inputs: inputs["download"] * 10, after=["download"]),
+        Stage("copy", DISK, lambda inputs: inputs["download"] + 1, after=["download"]),
+        Stage("publish", DISK, lambda inputs: inputs["hash"] + inputs["copy"], after=["hash", "copy"]),
+    ]
+    assert _run(executor, [graph]) == [{"download": 2, "hash": 20, "copy": 3, "publish": 23}]
+
+
+def test_a_failure_skips_the_stages_after_it(executor):
+    def fail(inputs):
+        raise OSError("disk full")
+
+    graph = [
+        Stage("download", NETWORK, fail),
+        Stage("hash", CPU, lambda inputs: 1, after=["download"]),
+        Stage("publish", DISK, lambda inputs: 2, after=["hash"]),
+    ]
+    (results,) = _run(executor, [graph])
+    assert all(isinstance(result, StageFailed) for result in results.values())
+    assert "disk full" in str(results["download"]) and "skipped" in str(results["publish"])
+
+
+def test_follow_up_graphs_run_before_run_returns(executor):
+    attempts = [0, 0]
+
+    def on_graph_done(job, results):
+        attempts[job] += 1
+        if attempts[job] < 3:
+            return [Stage("retry", NETWORK, lambda inputs: attempts[job])]
+        return None
+
+    results = _run(executor, [[Stage("first", CPU, lambda inputs: 0)], []], on_graph_done=on_graph_done)
+    assert attempts == [3, 3]
+    assert results[0] == {"first": 0, "retry": 2}
+
+
+def test_network_stages_respect_the_host_cap(executor):
+    running, peak = {"a": 0, "b": 0}, {"a": 0, "b": 0}
+    lock = threading.Lock()
+
+    def download(host):
+        def fn(inputs):
+            with lock:
+                running[host] += 1
+                peak[host] = max(peak[host], running[host])
+            time.sleep(0.05)
+            with lock:
+                running[host] -= 1
+        return fn
+
+    hosts = ["a"] * 5 + ["b"] * 2
+    _run(executor, [[Stage("download", NETWORK, download(host))] for host in hosts], hosts=hosts)
+    assert peak == {"a": 2, "b": 2}
@@ -0,0 +1,87 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from updaters.shared.circuit_breaker import CircuitBreaker
+from updaters.shared.retry_policy import RetryPolicy, is_retryable_status, parse_retry_after
+from updaters.shared.robust_get import robust_get
+
+
+class ScriptedHandler(BaseHTTPRequestHandler):
+    """Answers with the next status of server.statuses (the last one repeats)."""
+
+    def do_GET(self):
+        statuses = self.server.statuses
+        status = statuses.pop(0) if len(statuses) > 1 else statuses[0]
+        self.server.hits += 1
+        self.send_response(status)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), ScriptedHandler)
+    httpd.hits = 0
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}/page"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_retryable_statuses():
+    assert all(is_retryable_status(status) for status in (408, 429, 500, 502, 503, 504))
+    assert not any(is_retryable_status(status) for status in (400, 401, 403, 404, 410, 416, 451))
+
+
+@pytest.mark.parametrize("status", [403, 404, 410])
+def test_robust_get_gives_up_on_definitive_errors(server, status):
+    server.statuses = [status]
+    assert robust_get(server.url, lambda msg: None, retries=3, delay=0.01) is None
+    assert server.hits == 1
+
+
+def test_robust_get_retries_transient_errors(server):
+    server.statuses = [503, 429, 200]
+    resp = robust_get(server.url, lambda msg: None, retries=3, delay=0.01)
+    assert resp is not None and resp.status_code == 200
+    assert server.hits == 3
+
+
+def test_backoff_grows_and_honours_retry_after():
+    policy = RetryPolicy(base_delay=1.0, max_delay=8.0, deadline=None)
+    delays = [policy.next_delay() for _ in range(6)]
+    assert 0.5 <= delays[0] <= 1.0 and all(4.0 <= delay <= 8.0 for delay in delays[4:])
+    assert policy.next_delay(retry_after=30.0) == 30.0
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after("soon") is None
+
+
+def test_deadline_stops_retrying():
+    policy = RetryPolicy(base_delay=1.0, deadline=0.5)
+    assert policy.next_delay() is None
+    policy = RetryPolicy(base_delay=0.01, deadline=10.0)
+    assert policy.wait()
+
+
+def test_circuit_breaker_opens_and_probes():
+    breaker = CircuitBreaker(threshold=2, cooldown=0.1)
+    url = "https://mirror.example.org/a.iso"
+    breaker.record_failure(url)
+    assert breaker.allow(url)
+    breaker.record_failure(url)
+    assert not breaker.allow(url)
+    assert breaker.allow("https://other.example.org/a.iso")
+    time.sleep(0.15)
+    # one probe after the cooldown, nobody else until it reports back
+    assert breaker.allow(url)
+    assert not breaker.allow(url)
+    breaker.record_success(url)
+    assert breaker.allow(url)
@@ -0,0 +1,72 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from updaters.shared.segmented_download import segment_state_file, segmented_download
+
+SEGMENT = 64 * 1024
+DATA = bytes(range(256)) * (5 * SEGMENT // 256 - 7)
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        start, _, end = self.headers["Range"].removeprefix("bytes=").partition("-")
+        start, end = int(start), int(end)
+        self.server.ranges.append(start)
+        if start in self.server.missing:
+            self.send_error(404)
+            return
+        body = DATA[start:end + 1]
+        self.send_response(206)
+        self.send_header("Content-Range", f"bytes {start}-{start + len(body) - 1}/{len(DATA)}")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+    httpd.ranges, httpd.missing = [], set()
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _url(httpd):
+    return f"http://127.0.0.1:{httpd.server_address[1]}/a.iso"
+
+
+def test_resume_fetches_only_missing_segments(tmp_path, server):
+    part = tmp_path / "a.iso.part"
+    # segments 0 and 2 survived an earlier run, the rest of the file is garbage
+    part.write_bytes(DATA[:SEGMENT] + b"\0" * SEGMENT + DATA[2 * SEGMENT:3 * SEGMENT] + b"\0" * (len(DATA) - 3 * SEGMENT))
+    segment_state_file(part).write_text(json.dumps({"total_size": len(DATA), "segment_size": SEGMENT, "done": [0, 2]}))
+
+    assert segmented_download([_url(server)], part, len(DATA), print, segment_size=SEGMENT)
+    assert part.read_bytes() == DATA
+    assert sorted(server.ranges) == [SEGMENT, 3 * SEGMENT, 4 * SEGMENT]
+    assert not segment_state_file(part).exists()
+
+
+def test_progress_is_kept_when_sources_run_out(tmp_path, server):
+    part = tmp_path / "a.iso.part"
+    server.missing.add(3 * SEGMENT)
+
+    assert not segmented_download([_url(server)], part, len(DATA), print, segment_size=SEGMENT)
+    state = json.loads(segment_state_file(part).read_text())
+    assert 3 not in state["done"]
+    # whatever was written before the source was dropped is on record for the next run
+    assert set(state["done"]) == {start // SEGMENT for start in server.ranges if start != 3 * SEGMENT}
+
+    server.missing.clear()
+    server.ranges.clear()
+    assert segmented_download([_url(server)], part, len(DATA), print, segment_size=SEGMENT)
+    assert part.read_bytes() == DATA
+    assert 3 * SEGMENT in server.ranges and len(server.ranges) == 5 - len(state["done"])
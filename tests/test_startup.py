@@ -0,0 +1,47 @@
+"""Startup budget: `sisou2.py --help` must stay cheap (see --profile-startup)."""
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+# Only needed once an updater actually fetches, parses or verifies something
+HEAVY_MODULES = {"requests", "bs4", "pgpy", "cryptography", "torrentp", "tqdm", "lxml"}
+# Cumulative import time of everything sisou2 pulls in (interpreter startup excluded)
+IMPORT_BUDGET_SECONDS = 0.3
+
+
+def _import_times(*args: str) -> dict[str, int]:
+    """Top-level package -> cumulative import time (us) of running python -X importtime args."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=ROOT, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    times: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue
+        # top-level entries are not indented: their cumulative time includes their children
+        if not name.startswith("  "):
+            times[name.strip()] = int(cumulative)
+        times.setdefault(name.strip(), 0)
+    return times
+
+
+def test_help_imports_no_heavy_modules():
+    imported = {name.split(".", 1)[0] for name in _import_times("sisou2.py", "--help")}
+    assert not imported & HEAVY_MODULES
+
+
+def test_import_sisou2_within_budget():
+    # best of three: the budget guards against regressions, not against a busy machine
+    totals = []
+    for _ in range(3):
+        times = _import_times("-c", "import sisou2")
+        imported = {name.split(".", 1)[0] for name in times}
+        assert not imported & HEAVY_MODULES
+        totals.append(sum(us for name, us in times.items() if name not in ("site", "encodings")) / 1e6)
+    assert min(totals) < IMPORT_BUDGET_SECONDS, f"import sisou2 took {min(totals):.3f}s"
@@ -0,0 +1,36 @@
+import time
+
+import pytest
+
+from updaters.shared.bandwidth_shaper import BandwidthShaper
+from updaters.shared.settings import load_settings
+from updaters.shared.throughput_watchdog import ThroughputWatchdog
+
+CHUNK = 4 * 1024
+
+
+@pytest.fixture
+def capped_shaper():
+    # 16 KiB/s, well below the watchdog floors used here
+    load_settings({"sisou2": {"bandwidth_limit": 16 * 1024}})
+    yield BandwidthShaper()
+    load_settings({})
+
+
+def test_cap_below_the_stall_floor_is_not_a_stall(capped_shaper):
+    watchdog = ThroughputWatchdog(min_speed=64 * 1024, window=0.3)
+    deadline = time.monotonic() + 1.2
+    while time.monotonic() < deadline:
+        # the network delivers instantly, only the shaper holds the transfer back
+        slept = capped_shaper.throttle("https://example.org/a.iso", CHUNK)
+        assert watchdog.update(CHUNK, paused=slept) is None
+
+
+def test_slow_transfer_without_pauses_stalls():
+    watchdog = ThroughputWatchdog(min_speed=64 * 1024, window=0.3)
+    stall = None
+    deadline = time.monotonic() + 1.2
+    while stall is None and time.monotonic() < deadline:
+        time.sleep(0.1)
+        stall = watchdog.update(CHUNK)
+    assert stall is not None and "below" in stall
@@ -0,0 +1,45 @@
+import pytest
+
+from updaters.shared.version import Version, version_key
+
+
+@pytest.mark.parametrize("older, newer", [
+    ("9.4", "9.10"),
+    ("2.06", "2.06s4"),
+    ("2.06s4", "2.06s10"),
+    ("2.06s10", "2.07"),
+    ("41-1.4", "42-1.1"),
+    ("9.0-1", "9.0-2"),
+    ("1.0", "1.0.1"),
+    ("2024.09.01", "2024.10.01"),
+    ("1.0.beta", "1.0.1"),
+])
+def test_ordering(older, newer):
+    assert Version.parse(older) < Version.parse(newer)
+    assert version_key(older) < version_key(newer)
+
+
+def test_forms_agree():
+    as_list = ["42", "1", "1"]
+    assert Version.of(as_list) == Version.of(tuple(as_list)) == Version.of(Version(as_list))
+    assert version_key(as_list) == version_key(Version(as_list))
+    assert version_key("42.1.1") == version_key(as_list)
+    assert Version.parse("42-1.1", "-").parts == ("42", "1.1")
+
+
+def test_case_and_whitespace_dont_matter():
+    assert Version.parse("1.0.RC1") == Version.parse("1.0.rc1")
+    assert hash(Version([" 9", "4 "])) == hash(Version.parse("9.4"))
+    assert Version.parse("9.4").parts == ("9", "4")
+
+
+def test_latest_of_a_listing():
+    listing = [["9", "4"], ["9", "10"], ["8", "10"], ["9", "5"]]
+    assert max(listing, key=version_key) == ["9", "10"]
+    assert sorted(["2.06s4", "2.06", "2.06s10", "2.04"], key=version_key) == ["2.04", "2.06", "2.06s4", "2.06s10"]
+
+
+def test_not_comparable_with_other_types():
+    assert Version.parse("1") != "1"
+    with pytest.raises(TypeError):
+        Version.parse("1") < "2"
@@ -0,0 +1,45 @@
+import threading
+
+import pytest
+
+from updaters.shared.write_behind import WRITE_ALIGN, WRITE_SIZE, WriteBehindFile, preallocate_file
+
+
+def test_sequential_writes_land_in_order(tmp_path):
+    data = bytes(range(256)) * (3 * WRITE_SIZE // 256 + 1000)
+    path = tmp_path / "a.iso.part"
+    with WriteBehindFile(path, "wb", buffer_size=WRITE_SIZE) as f:
+        for start in range(0, len(data), 100_000):
+            f.write(data[start:start + 100_000])
+    assert path.read_bytes() == data
+
+
+def test_append_resumes_on_the_alignment(tmp_path):
+    path = tmp_path / "a.iso.part"
+    path.write_bytes(b"x" * (WRITE_ALIGN + 123))
+    with WriteBehindFile(path, "ab") as f:
+        f.write(b"y" * WRITE_SIZE)
+    assert path.read_bytes() == b"x" * (WRITE_ALIGN + 123) + b"y" * WRITE_SIZE
+
+
+def test_write_at_reports_each_block_once_written(tmp_path):
+    path = tmp_path / "a.iso.part"
+    preallocate_file(path, 300)
+    written = []
+    f = WriteBehindFile(path, "r+b")
+    for index in (2, 0, 1):
+        f.write_at(index * 100, bytes([index]) * 100, on_written=lambda index=index: written.append((index, threading.current_thread().name)))
+    f.close()
+    assert path.read_bytes() == b"\0" * 100 + b"\1" * 100 + b"\2" * 100
+    assert written == [(2, "sisou2-writer"), (0, "sisou2-writer"), (1, "sisou2-writer")]
+
+
+def test_a_failed_write_is_raised_to_the_caller(tmp_path):
+    f = WriteBehindFile(tmp_path / "a.iso.part", "wb")
+
+    def fail():
+        raise OSError("no space left")
+
+    f.write_at(0, b"data", on_written=fail)
+    with pytest.raises(OSError, match="no space left"):
+        f.close()
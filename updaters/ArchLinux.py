@@ -1,13 +1,20 @@
-from bs4 import BeautifulSoup
 from pathlib import Path
 from functools import cache
 from updaters.generic.GenericUpdater import GenericUpdater
+from updaters.shared.extract_links import extract_links
 from updaters.shared.robust_get import robust_get
 from updaters.shared.check_remote_integrity import check_remote_integrity
 
 DOMAIN = "https://geo.mirror.pkgbuild.com"
 DOWNLOAD_PAGE_URL = f"{DOMAIN}/iso/latest"
 FILE_NAME = "archlinux-[[VER]]-x86_64.iso"
+# Interchangeable download roots, canonical first. Extend per-install with `mirrors = [...]` in config.toml
+MIRRORS = [
+    "https://geo.mirror.pkgbuild.com",
+    "https://mirrors.kernel.org/archlinux",
+    "https://mirror.rackspace.com/archlinux",
+    "https://mirrors.edge.kernel.org/archlinux",
+]
 ISOname = "ArchLinux"
 
 class ArchLinux(GenericUpdater):
@@ -18,19 +25,17 @@ class ArchLinux(GenericUpdater):
         super().__init__(file_path, *args, **kwargs)
         resp = robust_get(DOWNLOAD_PAGE_URL, retries=self.retries_count, delay=1, logging_callback=self.logging_callback)
         if resp is None:
-            self.soup_download_page = None
+            self.page_links = None
             return
-        self.soup_download_page = BeautifulSoup(resp.content.decode('utf-8'), features="html.parser")
+        self.page_links = extract_links(resp.content)
 
     @cache
     def _get_latest_version(self) -> list[str] | None:
-        if not self.soup_download_page:
+        if not self.page_links:
             return None
-        download_a_tags = self.soup_download_page.find_all("a", href=True)
-        for a_tag in download_a_tags:
-            href = a_tag['href']
-            if href and "archlinux" in href:
-                return self._str_to_version(a_tag.getText().split("-")[1])
+        matching = self.page_links.containing("archlinux")
+        if matching:
+            return self._str_to_version(matching[0].text.split("-")[1])
         self.logging_callback("Could not parse latest version from download page")
         return None
 
@@ -2,6 +2,7 @@ from functools import cache
 from pathlib import Path
 from updaters.generic.GenericUpdater import GenericUpdater
 from updaters.shared.robust_download import robust_download
+from updaters.shared.drive_index import get_drive_index
 from updaters.shared.list_zip_files import list_zip_files
 from updaters.shared.extract_file_from_zip import extract_file_from_zip
 from updaters.shared.sha1_hash_check import sha1_hash_check
@@ -132,6 +133,7 @@ class ChromeOS(GenericUpdater):
         extract_file_from_zip(archive_path, to_extract, img_path.parent)
         extracted_file = img_path.parent / to_extract
         os.replace(extracted_file, img_path)
+        get_drive_index().update(extracted_file, img_path)
 
         # FINAL FILE SIZE CHECK (CORRECT FIELD: filesize, NOT zipfilesize)
         expected_bin_size = self.cur_edition_info.get("filesize")
@@ -1,8 +1,7 @@
 from functools import cache
 from pathlib import Path
-from bs4 import BeautifulSoup
-from bs4.element import Tag
 from updaters.generic.GenericUpdater import GenericUpdater
+from updaters.shared.extract_links import PageLinks, extract_links
 from updaters.shared.verify_file_size import verify_file_size
 from updaters.shared.robust_get import robust_get
 from updaters.shared.check_remote_integrity import check_remote_integrity
@@ -11,6 +10,12 @@ from updaters.shared.check_remote_integrity import check_remote_integrity
 DOMAIN = "https://cdimage.debian.org"
 DOWNLOAD_PAGE_URL = f"{DOMAIN}/debian-cd/current-live/amd64/iso-hybrid/"
 FILE_NAME = "debian-live-[[VER]]-amd64-[[EDITION]].iso"
+# Interchangeable download roots, canonical first. Extend per-install with `mirrors = [...]` in config.toml
+MIRRORS = [
+    "https://cdimage.debian.org/debian-cd",
+    "https://ftp.acc.umu.se/debian-cd",
+    "https://mirror.csclub.uwaterloo.ca/debian-cd",
+]
 ISOname = "Debian"
 
 
@@ -25,15 +30,13 @@ class Debian(GenericUpdater):
 
         resp = robust_get(DOWNLOAD_PAGE_URL, logging_callback=self.logging_callback)
         if resp is None or resp.status_code != 200:
-            self.soup_download_page = None
-            self.soup_index_list = None
+            self.index_links = None
             self.logging_callback(f"ERROR: Could not fetch Debian download page at {DOWNLOAD_PAGE_URL}")
             return
         self.download_page = resp
-        self.soup_download_page = BeautifulSoup(self.download_page.content.decode("utf-8"), features="html.parser")
-        self.soup_index_list: Tag | None = self.soup_download_page.find("table", attrs={"id": "indexlist"})  # type: ignore
-        if not self.soup_index_list:
-            self.soup_index_list = None
+        self.index_links: PageLinks | None = extract_links(self.download_page.content, container_id="indexlist")
+        if not self.index_links:
+            self.index_links = None
             self.logging_callback(f"ERROR: Could not find index list table on Debian download page.")
 
     @cache
@@ -63,18 +66,12 @@ class Debian(GenericUpdater):
 
     @cache
     def _get_latest_version(self) -> list[str] | None:
-        if not self.soup_index_list:
+        if not self.index_links:
             self.logging_callback(f"Could not parse the download page (no index list)")
             return None
-        download_a_tags = self.soup_index_list.find_all("a", href=True)
-        if not download_a_tags:
-            self.logging_callback(f"Could not parse the download page (no links)")
-            return None
         match_str = str(self._get_normalized_file_path(absolute=False, version=None, edition=self.edition if self.has_edition() else None, lang=getattr(self, 'lang', None) if self.has_lang() else None)).split("[[VER]]")[-1]
-        latest = next(
-            (href for a_tag in download_a_tags if (href := a_tag.get("href")) and isinstance(href, str) and match_str in href),
-            None
-        )
+        matching = self.index_links.containing(match_str)
+        latest = matching[0].href if matching else None
         if latest and isinstance(latest, str) and "-" in latest:
             return self._str_to_version(latest.split("-")[2])
         else:
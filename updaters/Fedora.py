@@ -10,6 +10,12 @@ from updaters.shared.robust_get import robust_get
 DOMAIN = "https://fedoraproject.org"
 DOWNLOAD_PAGE_URL = f"{DOMAIN}/spins/[[EDITION]]/download/"
 FILE_NAME = "Fedora-[[EDITION]]-Live-x86_64-[[VER]].iso"
+# Interchangeable download roots, canonical first. Extend per-install with `mirrors = [...]` in config.toml
+MIRRORS = [
+    "https://download.fedoraproject.org/pub/fedora/linux",
+    "https://dl.fedoraproject.org/pub/fedora/linux",
+    "https://mirrors.kernel.org/fedora",
+]
 ISOname = "Fedora"
 
 
@@ -1,6 +1,5 @@
 
 
-import glob
 import re
 import os
 from functools import cache
@@ -8,9 +7,11 @@ from pathlib import Path
 import requests
 from bs4 import BeautifulSoup
 from updaters.generic.GenericUpdater import GenericUpdater
+from updaters.shared.version import version_key
 from updaters.shared.sha256_hash_check import sha256_hash_check
 from updaters.shared.parse_hash import parse_hash
 from updaters.shared.robust_download import robust_download
+from updaters.shared.drive_index import get_drive_index
 from updaters.shared.robust_get import robust_get
 from updaters.shared.fetch_expected_file_size import fetch_expected_file_size
 from updaters.shared.extract_file_from_zip import extract_file_from_zip
@@ -58,6 +59,7 @@ class FreeDOS(GenericUpdater):
         # Rename to the final destination
         try:
             os.replace(extracted_file, new_file.with_suffix(file_ext.lower()))
+            get_drive_index().update(extracted_file, new_file.with_suffix(file_ext.lower()))
         except Exception as e:
             self.logging_callback(f"Error replacing file: {e}")
             return None
@@ -152,12 +154,12 @@ class FreeDOS(GenericUpdater):
             lang=self.lang if self.has_lang() else None,  # type: ignore
         )
 
-        local_files = glob.glob(
-            str(file_path.with_suffix(".*")).replace("[[VER]]", "*")
+        local_files = get_drive_index().find(
+            file_path.parent, file_path.with_suffix(".*").name.replace("[[VER]]", "*")
         )
 
         if local_files:
-            return Path(local_files[0])
+            return local_files[0]
         self.logging_callback(f"No local file found for {self.__class__.__name__}")
         return None
 
@@ -170,20 +172,13 @@ class FreeDOS(GenericUpdater):
         if not download_a_tags:
             self.logging_callback(f"Could not parse the download page for versions.")
             return None
-        latest_version = self._get_local_version()
         version_regex = re.compile(r"^([0-9]+(\.[0-9]+)*)$")
-        for a_tag in download_a_tags:
-            href = a_tag.get("href")
-            if href is None:
-                continue
-            version = str(href).rstrip("/")
-            if version_regex.fullmatch(version):
-                compared_version = self._str_to_version(version)
-                if latest_version:
-                    if self._compare_version_numbers(latest_version, compared_version):
-                        latest_version = compared_version
-                else:
-                    latest_version = compared_version
+        candidates = [
+            self._str_to_version(version)
+            for a_tag in download_a_tags
+            if (href := a_tag.get("href")) is not None and version_regex.fullmatch(version := str(href).rstrip("/"))
+        ]
+        latest_version = max(filter(None, [self._get_local_version(), *candidates]), key=version_key, default=None)
         if not latest_version:
             self.logging_callback(f"Could not find a valid version on the download page.")
             return None
@@ -1,12 +1,13 @@
 
 from functools import cache
 from pathlib import Path
-from updaters.shared.fetch_hashes_from_url import fetch_hashes_from_url
+from updaters.shared.checksum_manifest import get_checksum_manifest
 from updaters.shared.verify_file_size import verify_file_size
 from updaters.shared.sha256_hash_check import sha256_hash_check
 from updaters.generic.GenericUpdater import GenericUpdater
 
 DOMAIN = "https://gparted.org"
+CHECKSUMS_URL = "https://gparted.org/gparted-live/stable/CHECKSUMS.TXT"
 FILE_NAME = "gparted-live-[[VER]]-amd64.iso"
 ISOname = "GPartedLive"
 
@@ -19,28 +20,14 @@ class GPartedLive(GenericUpdater):
         super().__init__(file_path, *args, **kwargs)
 
     def _fetch_sha256_hash(self) -> str:
-        try:
-            content = fetch_hashes_from_url("https://gparted.org/gparted-live/stable/CHECKSUMS.TXT", self.logging_callback)
-        except Exception as e:
-            self.logging_callback(f"Could not fetch CHECKSUMS.TXT: {e}")
-            return ""
-        if not content:
+        # CHECKSUMS.TXT has MD5/SHA1/SHA256/SHA512 sections; the manifest tells them apart by digest length
+        manifest = get_checksum_manifest(CHECKSUMS_URL, self.logging_callback)
+        if manifest is None:
             self.logging_callback(f"No checksum file content fetched.")
             return ""
-        lines = content.splitlines()
-        in_sha256 = False
-        for line in lines:
-            if line.strip().startswith("### SHA256SUMS"):
-                in_sha256 = True
-                continue
-            if in_sha256:
-                if line.strip().startswith("###") and not line.strip().startswith("### SHA256SUMS"):
-                    break
-                if line.strip().endswith(".iso"):
-                    parts = line.strip().split()
-                    if parts:
-                        return parts[0]
-        return ""
+        iso_names = [name for name in manifest.names() if name.endswith(".iso")]
+        iso_name = next((name for name in iso_names if name.endswith("-amd64.iso")), iso_names[0] if iso_names else None)
+        return (manifest.digest(iso_name, "sha256") if iso_name else None) or ""
 
     @cache
     def _get_download_link(self) -> str | None:
@@ -80,25 +67,16 @@ class GPartedLive(GenericUpdater):
         """
         Extract the latest version from the SHA256SUMS section of the checksum file.
         """
-        try:
-            content = fetch_hashes_from_url("https://gparted.org/gparted-live/stable/CHECKSUMS.TXT", self.logging_callback)
-        except Exception as e:
-            self.logging_callback(f"No checksum file available to determine version: {e}")
-            return None
-        if not content:
+        manifest = get_checksum_manifest(CHECKSUMS_URL, self.logging_callback)
+        if manifest is None:
             self.logging_callback(f"No checksum file content fetched for version extraction.")
             return None
-        lines = [line for line in content.splitlines() if line.strip() and line.strip().endswith(".iso")]
-        if not lines:
+        iso_names = [name for name in manifest.names() if name.endswith(".iso")]
+        if not iso_names:
             self.logging_callback(f"Checksum file is empty or no .iso lines found.")
             return None
-        # Use the last .iso line for the latest version
-        version_line = lines[-1]
-        split_line = version_line.split()
-        if not split_line:
-            self.logging_callback(f"Last non-empty line in checksum file is empty or malformed: '{version_line}'")
-            return None
-        version = split_line[-1]
+        # Use the last .iso entry for the latest version
+        version = iso_names[-1]
         version_parts = version.split("-")
         if len(version_parts) < 4:
             self.logging_callback(f"Version string does not have enough parts: '{version}'")
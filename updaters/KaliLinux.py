@@ -3,12 +3,15 @@ from pathlib import Path
 from urllib.parse import urljoin
 import re
 from updaters.generic.GenericUpdater import GenericUpdater
+from updaters.shared.extract_links import extract_links
 from updaters.shared.robust_get import robust_get
 
 from updaters.shared.verify_file_size import verify_file_size
 from updaters.shared.torrent_download import download_torrent
 from updaters.shared.robust_download import robust_download
 from updaters.shared.check_remote_integrity import check_remote_integrity
+from updaters.shared.block_manifest import block_manifest_from_torrent
+from updaters.shared.repair_file_blocks import repair_file_blocks
 
 DOMAIN = "https://cdimage.kali.org"
 DOWNLOAD_PAGE_URL = urljoin(DOMAIN, "current/")
@@ -34,10 +37,10 @@ class KaliLinux(GenericUpdater):
         resp = robust_get(DOWNLOAD_PAGE_URL, retries=self.retries_count, delay=1, logging_callback=self.logging_callback)
         if resp is None or resp.status_code != 200:
             self.download_page = None
-            self.html_content = None
+            self.page_links = None
             return
         self.download_page = resp
-        self.html_content = self.download_page.text
+        self.page_links = extract_links(self.download_page.text)
 
     @cache
     def _get_download_link(self) -> str | None:
@@ -45,23 +48,18 @@ class KaliLinux(GenericUpdater):
         Extract the best matching href for the edition/version from the HTML.
         Prefer the shortest href (i.e., .iso before .iso.torrent) for a given edition/version.
         """
-        if not self.html_content:
-            return None
-        hrefs = re.findall(r'<a[^>]+href=["\']([^"\'>]+)["\']', self.html_content)
-        if not hrefs:
+        if not self.page_links:
             return None
         version = self._get_latest_version()
         if not version:
             return None
         version_str = self._version_to_str(version)
         base_name = f"kali-linux-{version_str}-{self.edition}.iso"
-        # Collect all matching hrefs (iso and iso.torrent)
-        matches = [href for href in hrefs if href.endswith(base_name) or href.endswith(base_name + ".torrent")]
-        if not matches:
+        # Prefer the .iso over the .iso.torrent
+        best = self.page_links.by_name(base_name) or self.page_links.by_name(base_name + ".torrent")
+        if not best:
             return None
-        # Prefer the shortest href (i.e., .iso before .iso.torrent)
-        best = min(matches, key=len)
-        return urljoin(DOWNLOAD_PAGE_URL, best)
+        return urljoin(DOWNLOAD_PAGE_URL, best.href)
 
 
     def check_integrity(self, *args, **kwargs) -> bool | int | None:
@@ -106,6 +104,32 @@ class KaliLinux(GenericUpdater):
                 logging_callback=self.logging_callback
             )
 
+    @cache
+    def _get_block_manifest(self):
+        """
+        Kali publishes a .torrent next to every ISO; its piece hashes let a corrupt ISO be repaired block by block.
+        """
+        iso_url = self._get_download_link()
+        if not iso_url:
+            return None
+        torrent_url = iso_url if iso_url.endswith('.torrent') else iso_url + '.torrent'
+        resp = robust_get(torrent_url, retries=self.retries_count, delay=1, logging_callback=self.logging_callback)
+        if resp is None or resp.status_code != 200:
+            self.logging_callback(f"No torrent available for block repair at {torrent_url}")
+            return None
+        return block_manifest_from_torrent(resp.content, self.logging_callback)
+
+    def repair_latest_version(self) -> bool:
+        # Ranges must be fetched from the ISO itself, never from the .torrent link
+        iso_url = self._get_download_link()
+        if iso_url and iso_url.endswith('.torrent'):
+            manifest = self._get_block_manifest()
+            local_file = self._get_complete_normalized_file_path(absolute=True)
+            if manifest is None or not local_file.exists():
+                return False
+            return repair_file_blocks(iso_url[:-len('.torrent')], local_file, manifest, logging_callback=self.logging_callback)
+        return super().repair_latest_version()
+
     def install_latest_version(self, *args, **kwargs) -> None | bool:
         download_url = self._get_download_link()
         local_file = self._get_complete_normalized_file_path(absolute=True)
@@ -123,11 +147,10 @@ class KaliLinux(GenericUpdater):
 
     @cache
     def _get_latest_version(self) -> list[str] | None:
-        if not self.html_content:
+        if self.page_links is None:
             self.logging_callback(f"No HTML content to parse for version.")
             return None
-        # Use regex to find all hrefs in <a> tags
-        hrefs = re.findall(r'<a[^>]+href=["\']([^"\'>]+)["\']', self.html_content)
+        hrefs = self.page_links.hrefs
         if not hrefs:
             self.logging_callback(f"Could not parse the download page for version.")
             return None
@@ -1,8 +1,9 @@
 
 from functools import cache
 from pathlib import Path
-from bs4 import BeautifulSoup
 from updaters.generic.GenericUpdater import GenericUpdater
+from updaters.shared.version import version_key
+from updaters.shared.extract_links import extract_links
 from updaters.shared.robust_get import robust_get
 from updaters.shared.verify_file_size import verify_file_size
 from updaters.shared.check_remote_integrity import check_remote_integrity
@@ -10,6 +11,13 @@ from updaters.shared.check_remote_integrity import check_remote_integrity
 DOMAIN = "https://mirrors.edge.kernel.org"
 DOWNLOAD_PAGE_URL = f"{DOMAIN}/linuxmint/stable/"
 FILE_NAME = "linuxmint-[[VER]]-[[EDITION]]-64bit.iso"
+# Interchangeable download roots, canonical first. Extend per-install with `mirrors = [...]` in config.toml
+MIRRORS = [
+    "https://mirrors.edge.kernel.org/linuxmint",
+    "https://mirrors.kernel.org/linuxmint",
+    "https://mirror.csclub.uwaterloo.ca/linuxmint",
+    "https://ftp.heanet.ie/mirrors/linuxmint.com",
+]
 ISOname = "LinuxMint"
 
 
@@ -23,11 +31,11 @@ class LinuxMint(GenericUpdater):
         resp = robust_get(DOWNLOAD_PAGE_URL, retries=self.retries_count, delay=1, logging_callback=self.logging_callback)
         if resp is None or resp.status_code != 200:
             self.download_page = None
-            self.soup_download_page = None
+            self.page_links = None
             self.sha256sum_txt = None
             return
         self.download_page = resp
-        self.soup_download_page = BeautifulSoup(self.download_page.content.decode("utf-8"), features="html.parser")
+        self.page_links = extract_links(self.download_page.content)
 
     @cache
     def _get_download_link(self) -> str | None:
@@ -74,18 +82,9 @@ class LinuxMint(GenericUpdater):
 
     @cache
     def _get_latest_version(self) -> list[str] | None:
-        if self.soup_download_page is None:
-            self.logging_callback(f"Download page soup is None, cannot parse download links.")
+        if self.page_links is None:
+            self.logging_callback(f"Download page could not be fetched, cannot parse download links.")
             return None
-        download_a_tags = list(self.soup_download_page.find_all("a", href=True))
-        local_version = self._get_local_version()
-        latest = local_version or []
-        for a_tag in download_a_tags:
-            href = a_tag.get("href")
-            if not href or not isinstance(href, str) or not href or not href[0].isnumeric():
-                continue
-            version_number = self._str_to_version(href[:-1]) if isinstance(href, str) else []
-            if self._compare_version_numbers(latest, version_number):
-                latest = version_number
-        return latest if latest else []
+        candidates = [self._str_to_version(href[:-1]) for href in self.page_links.hrefs if href[0].isnumeric()]
+        return max(filter(None, [self._get_local_version(), *candidates]), key=version_key, default=[])
 
@@ -7,6 +7,7 @@ from updaters.shared.parse_hash import parse_hash
 from updaters.shared.sha256_hash_check import sha256_hash_check
 from updaters.shared.unzip_file import unzip_file
 from updaters.shared.robust_download import robust_download
+from updaters.shared.drive_index import get_drive_index
 from updaters.shared.robust_get import robust_get
 from updaters.shared.fetch_hashes_from_url import fetch_hashes_from_url
 import os
@@ -221,6 +222,7 @@ class MemTest86Plus(GenericUpdater):
         try:
             if iso.resolve() != new_file_path.resolve():
                 os.replace(iso, new_file_path)
+                get_drive_index().update(iso, new_file_path)
             self.logging_callback(f"Installed new version to {new_file_path}")
         except Exception as e:
             self.logging_callback(f"ERROR: Error replacing file: {e}")
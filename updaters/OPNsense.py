@@ -1,12 +1,15 @@
 from functools import cache
 import bz2
 from pathlib import Path
-from bs4 import BeautifulSoup
 from updaters.generic.GenericUpdater import GenericUpdater
+from updaters.shared.version import version_key
+from updaters.shared.extract_links import extract_links
 from updaters.shared.robust_get import robust_get
 from updaters.shared.check_remote_integrity import check_remote_integrity
 from updaters.shared.verify_signature import verify_opnsense_signature
 from updaters.shared.robust_download import robust_download
+from updaters.shared.drive_index import get_drive_index
+from updaters.shared.pipeline_executor import Stage, NETWORK, DISK, CPU
 
 import mmap
 
@@ -28,12 +31,10 @@ class OPNsense(GenericUpdater):
         resp = robust_get(DOWNLOAD_PAGE_URL, retries=self.retries_count, delay=1, logging_callback=self.logging_callback)
         if resp is None or resp.status_code != 200:
             self.download_page = None
-            self.soup_download_page = None
+            self.page_links = None
             return
         self.download_page = resp
-        self.soup_download_page = BeautifulSoup(
-            self.download_page.content.decode("utf-8"), features="html.parser"
-        )
+        self.page_links = extract_links(self.download_page.content)
 
     @cache
     def _get_download_link(self) -> str | None:
@@ -46,7 +47,7 @@ class OPNsense(GenericUpdater):
             return -1
 
         latest_version_str = self._version_to_str(latest_version)
-        pub_url = f"{DOWNLOAD_PAGE_URL}/OPNsense-{latest_version_str.rsplit(".", 1)[0]}.pub"
+        pub_url = f"{DOWNLOAD_PAGE_URL}/OPNsense-{latest_version_str.rsplit('.', 1)[0]}.pub"
         sig_url = f"{DOWNLOAD_PAGE_URL}/OPNsense-{latest_version_str}-{self.edition}-amd64.img.sig"
         image_path = self._get_complete_normalized_file_path(absolute=True)
 
@@ -63,13 +64,17 @@ class OPNsense(GenericUpdater):
             logging_callback=self.logging_callback
         )
 
-    def install_latest_version(self, retries: int = 0) -> bool | None:
+    def _get_archive_path(self) -> Path | None:
         complete_path = self._get_complete_normalized_file_path(absolute=True)
         if not isinstance(complete_path, Path):
             return None
-        archive_path = complete_path.with_name(complete_path.name + ".bz2")
+        return complete_path.with_name(complete_path.name + ".bz2")
 
-        # Download the .bz2 archive
+    def _download_archive(self) -> bool:
+        """(Protected) Download the .bz2 archive of the latest image (network-bound)."""
+        archive_path = self._get_archive_path()
+        if archive_path is None:
+            return False
         download_url = self._get_download_link()
         if not isinstance(download_url, str) or not download_url:
             self.logging_callback(f"Download URL is invalid: {download_url}")
@@ -79,58 +84,67 @@ class OPNsense(GenericUpdater):
         if resp is not True:
             self.logging_callback(f"Download failed for archive: {download_url}")
             return False
+        return True
 
-        # Integrity check
+    def _check_archive(self) -> bool:
+        """(Protected) Check the downloaded archive against the published sha256 (disk-bound)."""
         latest_version = self._get_latest_version()
         if latest_version is None:
             self.logging_callback("Could not determine the latest version for integrity check.")
             return False
         latest_version_str = self._version_to_str(latest_version)
         sha256_url = f"{DOWNLOAD_PAGE_URL}/OPNsense-{latest_version_str}-checksums-amd64.sha256"
-        valid = check_remote_integrity(
+        return bool(check_remote_integrity(
             hash_url=sha256_url,
-            local_file=archive_path,
+            local_file=self._get_archive_path(),
             hash_type="sha256",
             parse_hash_args=([self.edition], -1),
             logging_callback=self.logging_callback,
-        )
-        if not valid:
-            return False
+        ))
 
-        # Extract the .img from the .bz2
+    def _extract_archive(self) -> bool:
+        """(Protected) Decompress the archive to the image and remove it (CPU-bound)."""
+        complete_path = self._get_complete_normalized_file_path(absolute=True)
+        archive_path = self._get_archive_path()
         try:
             with bz2.open(archive_path, "rb") as src, open(complete_path, "wb") as dst:
-                for chunk in iter(lambda: src.read(8192), b""):
+                for chunk in iter(lambda: src.read(1024 * 1024), b""):
                     dst.write(chunk)
         except Exception as e:
             self.logging_callback(f"Failed to extract archive: {e}")
             return False
+        get_drive_index().update(complete_path)
 
         # Remove the archive after extraction
         try:
             archive_path.unlink()
+            get_drive_index().update(archive_path)
         except Exception:
             pass
 
         return True
 
+    def install_latest_version(self, retries: int = 0) -> bool | None:
+        if self._get_archive_path() is None:
+            return None
+        return self._download_archive() and self._check_archive() and self._extract_archive()
+
+    def get_install_stages(self) -> list[Stage]:
+        # Download, archive hash and bz2 extraction each run on their own pool, so another
+        # updater's download proceeds while this one is decompressing
+        return [
+            Stage("download", NETWORK, lambda results: self._get_archive_path() is not None and self._download_archive()),
+            Stage("archive_check", DISK, lambda results: results["download"] and self._check_archive(), after=["download"]),
+            Stage("install", CPU, lambda results: results["archive_check"] and self._extract_archive(), after=["archive_check"]),
+            Stage("verify", CPU, lambda results: self.check_integrity() if results["install"] else False, after=["install"]),
+        ]
+
     @cache
     def _get_latest_version(self) -> list[str] | None:
-        download_a_tags = self.soup_download_page.find_all("a", href=True) if self.soup_download_page else []
-        if not download_a_tags:
+        if not self.page_links:
             self.logging_callback("Could not parse the download page for version info.")
             return None
 
-        local_version = self._get_local_version()
-        latest = local_version or []
-
-        for a_tag in download_a_tags:
-            href = a_tag.get("href")
-            if not href or not isinstance(href, str) or self.edition not in href:
-                continue
-            version_number = self._str_to_version(href.split("-")[1])
-            if self._compare_version_numbers(latest, version_number):
-                latest = version_number
-
-        return latest
+        candidates = [self._str_to_version(href.split("-")[1]) for href in self.page_links.hrefs if self.edition in href]
+        return max(filter(None, [self._get_local_version(), *candidates]), key=version_key, default=[])
 
@@ -5,6 +5,7 @@ from updaters.shared.robust_get import robust_get
 from updaters.shared.fetch_expected_file_size import fetch_expected_file_size as fetch_expected_file_size
 from updaters.shared.verify_file_size import verify_file_size
 from updaters.shared.check_remote_integrity import check_remote_integrity
+from updaters.shared.metalink import fetch_metalink
 
 import re
 import requests
@@ -103,6 +104,13 @@ class OpenSUSE(GenericUpdater):
             f"{'-Current' if self.edition != 'leap-micro' else ''}.iso"
         )
 
+    @cache
+    def _get_metalink(self):
+        link = self._get_download_link()
+        if not link:
+            return None
+        return fetch_metalink(f"{link}.meta4", self.logging_callback)
+
     def check_integrity(self) -> bool | int | None:
         file = self._get_complete_normalized_file_path(absolute=True)
 
@@ -121,6 +129,10 @@ class OpenSUSE(GenericUpdater):
         if not verify_file_size(file, link, logging_callback=self.logging_callback):
             return False
 
+        metalink_ok = self._check_metalink_integrity(file)
+        if metalink_ok is not None:
+            return metalink_ok
+
         return check_remote_integrity(
             f"{link}.sha256",
             file,
@@ -1,10 +1,11 @@
 from functools import cache
 from pathlib import Path
 import re
-import requests
 from updaters.generic.GenericUpdater import GenericUpdater
 from updaters.shared.check_remote_integrity import check_remote_integrity
+from updaters.shared.checksum_manifest import get_checksum_manifest
 from updaters.shared.verify_file_size import verify_file_size
+from updaters.shared.metalink import fetch_metalink
 
 DOMAIN = "https://download.opensuse.org"
 DOWNLOAD_PAGE_URL = f"{DOMAIN}/download/tumbleweed/iso"
@@ -34,6 +35,10 @@ class OpenSUSERolling(GenericUpdater):
         return f"{self.download_page_url}/{isoFile}"
 
 
+    @cache
+    def _get_metalink(self):
+        return fetch_metalink(f"{self._get_download_link()}.meta4", self.logging_callback)
+
     def check_integrity(self) -> bool | int | None:
         sha256_url = f"{self._get_download_link()}.sha256"
         local_file = self._get_complete_normalized_file_path(absolute=True)
@@ -42,6 +47,9 @@ class OpenSUSERolling(GenericUpdater):
             return -1
         if verify_file_size(local_file, download_link, logging_callback=self.logging_callback) is False:
             return False
+        metalink_ok = self._check_metalink_integrity(local_file)
+        if metalink_ok is not None:
+            return metalink_ok
         return check_remote_integrity(
             hash_url=sha256_url,
             local_file=local_file,
@@ -52,12 +60,10 @@ class OpenSUSERolling(GenericUpdater):
 
     @cache
     def _get_latest_version(self) -> list[str] | None:
-        sha256_url = f"{self._get_download_link()}.sha256"
-        resp = requests.get(sha256_url)
-        if resp.status_code != 200:
+        manifest = get_checksum_manifest(f"{self._get_download_link()}.sha256", self.logging_callback)
+        if manifest is None or not manifest.names():
             return None
-        sha256_sums = resp.text
-        return self._str_to_version(sha256_sums.split(" ")[-1])
+        return self._str_to_version(manifest.names()[-1])
 
     def _str_to_version(self, version_str: str):
         version = "0"
@@ -3,9 +3,10 @@ from pathlib import Path
 from bs4 import BeautifulSoup
 from bs4.element import Tag
 from updaters.generic.GenericUpdater import GenericUpdater
+from updaters.shared.version import version_key
 from updaters.shared.parse_hash import parse_hash
 from updaters.shared.sha256_hash_check import sha256_hash_check
-from updaters.shared.robust_get import robust_get
+from updaters.shared.checksum_manifest import get_checksum_manifest
 from updaters.shared.check_remote_integrity import check_remote_integrity
 from updaters.shared.verify_file_size import verify_file_size
 import re
@@ -60,24 +61,16 @@ class Proxmox(GenericUpdater):
 
     @cache
     def _get_latest_version(self) -> list[str] | None:
-        sha256_url = f"{DOWNLOAD_PAGE_URL}/SHA256SUMS"
-        resp = robust_get(sha256_url, retries=3, delay=1, logging_callback=self.logging_callback)
+        manifest = get_checksum_manifest(f"{DOWNLOAD_PAGE_URL}/SHA256SUMS", self.logging_callback)
 
-        if resp is None or resp.status_code != 200:
+        if manifest is None:
             self.logging_callback("Could not fetch SHA256SUMS")
             return None
 
-        lines = resp.text.splitlines()
         prefix = f"proxmox-{self.edition}_"
         versions: list[list[str]] = []
 
-        for line in lines:
-            parts = line.strip().split()
-            if len(parts) != 2:
-                continue
-
-            filename = parts[1]
-
+        for filename in manifest.names():
             if not filename.startswith(prefix):
                 continue
 
@@ -95,13 +88,7 @@ class Proxmox(GenericUpdater):
             self.logging_callback("No valid versions found in SHA256SUMS")
             return None
 
-        latest = versions[0]
-
-        for v in versions[1:]:
-            if self._compare_version_numbers(latest, v) > 0:
-                latest = v
-
-        return latest
+        return max(versions, key=version_key)
 
     def check_integrity(self) -> bool | int | None:
         sha256_url = f"{DOWNLOAD_PAGE_URL}/SHA256SUMS"
@@ -1,7 +1,8 @@
 from functools import cache
 from pathlib import Path
-from bs4 import BeautifulSoup
 from updaters.generic.GenericUpdater import GenericUpdater
+from updaters.shared.version import version_key
+from updaters.shared.extract_links import extract_links
 from updaters.shared.robust_get import robust_get
 from updaters.shared.verify_file_size import verify_file_size
 from updaters.shared.check_remote_integrity import check_remote_integrity
@@ -20,7 +21,7 @@ class RockyLinux(GenericUpdater):
         valid_editions (list[str]): List of valid editions to use
         edition (str): Edition to download
         download_page (requests.Response): The HTTP response containing the download page HTML.
-        soup_download_page (BeautifulSoup): The parsed HTML content of the download page.
+        page_links (PageLinks): The links of the download page.
 
     Note:
         This class inherits from the abstract base class GenericUpdater.
@@ -34,12 +35,10 @@ class RockyLinux(GenericUpdater):
         resp = robust_get(DOWNLOAD_PAGE_URL, retries=self.retries_count, delay=1, logging_callback=self.logging_callback)
         if resp is None or resp.status_code != 200:
             self.download_page = None
-            self.soup_download_page = None
+            self.page_links = None
             return
         self.download_page = resp
-        self.soup_download_page = BeautifulSoup(
-            self.download_page.content.decode("utf-8"), features="html.parser"
-        )
+        self.page_links = extract_links(self.download_page.content)
 
     @cache
     def _get_download_link(self) -> str | None:
@@ -74,24 +73,11 @@ class RockyLinux(GenericUpdater):
         )
     @cache
     def _get_latest_version(self) -> list[str] | None:
-        if self.soup_download_page is None:
+        if self.page_links is None:
             return None
-        download_a_tags = self.soup_download_page.find_all("a", href=True)
-        if not download_a_tags:
+        if not self.page_links:
             self.logging_callback("Could not parse the download page for versions.")
             return None
 
-        local_version = self._get_local_version()
-        latest = local_version or []
-
-        for a_tag in download_a_tags:
-            href = a_tag.get("href")
-            if not href or not href[0].isnumeric():
-                continue
-            version_candidate = href[:-1]
-            if isinstance(version_candidate, str):
-                version_number = self._str_to_version(version_candidate)
-                if self._compare_version_numbers(latest, version_number):
-                    latest = version_number
-
-        return latest
\ No newline at end of file
+        candidates = [self._str_to_version(href[:-1]) for href in self.page_links.hrefs if href[0].isnumeric()]
+        return max(filter(None, [self._get_local_version(), *candidates]), key=version_key, default=[])
\ No newline at end of file
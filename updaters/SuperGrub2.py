@@ -9,6 +9,7 @@ from updaters.shared.parse_hash import parse_hash
 from updaters.shared.sha256_hash_check import sha256_hash_check
 from updaters.shared.unzip_file import unzip_file
 from updaters.shared.robust_download import robust_download
+from updaters.shared.drive_index import get_drive_index
 from updaters.shared.robust_get import robust_get
 from updaters.shared.verify_file_size import verify_file_size
 import os
@@ -137,6 +138,7 @@ class SuperGrub2(GenericUpdater):
             inner_img_path = new_file.parent / inner_img_file
             unzip_file(archive_path, new_file.parent)
             os.replace(inner_img_path, new_file)
+            get_drive_index().update(inner_img_path, new_file)
             self.logging_callback(f"DONE. Installed to {new_file}")
             self.logging_callback(f"Archive kept at {archive_path}")
         return True
@@ -1,7 +1,8 @@
 from functools import cache
 from pathlib import Path
-from bs4 import BeautifulSoup
 from updaters.generic.GenericUpdater import GenericUpdater
+from updaters.shared.version import version_key
+from updaters.shared.extract_links import extract_links
 from updaters.shared.robust_get import robust_get
 from updaters.shared.verify_file_size import verify_file_size
 from updaters.shared.sha256_hash_check import sha256_hash_check
@@ -24,10 +25,10 @@ class Tails(GenericUpdater):
         resp = robust_get(DOWNLOAD_PAGE_URL, retries=self.retries_count, delay=1, logging_callback=self.logging_callback)
         if resp is None or resp.status_code != 200:
             self.download_page = None
-            self.soup_download_page = None
+            self.page_links = None
             return
         self.download_page = resp
-        self.soup_download_page = BeautifulSoup(self.download_page.content.decode('utf-8'), features="html.parser")
+        self.page_links = extract_links(self.download_page.content)
 
     @cache
     def _get_download_link(self) -> str | None:
@@ -71,27 +72,13 @@ class Tails(GenericUpdater):
 
     @cache
     def _get_latest_version(self) -> list[str] | None:
-        download_a_tags = self.soup_download_page.find_all("a", href=True) if self.soup_download_page else []
-        if not download_a_tags:
+        if not self.page_links:
             self.logging_callback("No valid Tails version found on the download page.")
             return None
 
-        local_version = self._get_local_version()
-        latest = local_version or []
-
-        for a_tag in download_a_tags:
-            href = a_tag.get("href")
-            if not isinstance(href, str):
-                continue
-            if "tails-amd64" not in href:
-                continue
-            version = href.split("-")[-1]
-            if not version or not version[0].isnumeric():
-                continue
-            version_number = self._str_to_version(version[:-1])
-            if self._compare_version_numbers(latest, version_number):
-                latest = version_number
-
-        if not latest:
-            return None
-        return latest
+        candidates = [
+            self._str_to_version(version[:-1])
+            for href in self.page_links.hrefs
+            if "tails-amd64" in href and (version := href.split("-")[-1]) and version[0].isnumeric()
+        ]
+        return max(filter(None, [self._get_local_version(), *candidates]), key=version_key, default=None)
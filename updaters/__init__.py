@@ -1,14 +1,18 @@
 """Package exports for updater modules.
 
-This file dynamically imports updater classes so that missing/errored
-submodules don't break importing the package. Imported classes are
-exported via __all__.
+Updater classes are imported on first use, so importing the package (or
+running a config that enables two updaters) doesn't pay for all of them,
+and missing/errored submodules don't break importing the package. Updater
+classes are exported via __all__.
 """
 from __future__ import annotations
 
 import logging
+import sys
+import threading
+import time
 from importlib import import_module
-from typing import Dict
+from typing import Dict, List, Tuple
 from typing import TYPE_CHECKING
 
 # Always import the GenericUpdater base class from the generic subpackage
@@ -17,7 +21,7 @@ try:
 except Exception as e:
     logging.debug(f"Could not import GenericUpdater: {e}")
 
-# Mapping of module filename (without .py) -> exported class name
+# Registry: config key / class name -> module filename (without .py)
 _UPDATERS: Dict[str, str] = {
     "ArchLinux": "ArchLinux",
     "ChromeOS": "ChromeOS",
@@ -82,17 +86,54 @@ if TYPE_CHECKING:
     from .Windows10 import Windows10  # type: ignore
     from .Windows11 import Windows11  # type: ignore
 
-# Dynamically import available updater classes. Failures are logged
-# at debug level so package import still succeeds even if a submodule
-# has an error or missing dependency. We still compute a static
-# __all__ for linters and deterministic exports.
-for _mod_name, _cls_name in _UPDATERS.items():
-    try:
-        _mod = import_module(f".{_mod_name}", __package__)
-        _cls = getattr(_mod, _cls_name)
-        globals()[_cls_name] = _cls
-    except Exception as _exc:  # pragma: no cover - runtime import failures
-        logging.debug(f"updaters: failed to import {_mod_name}.{_cls_name}: {_exc}")
+# Updater modules are imported lazily: only when sisou2 meets their key in
+# config.toml (load_updater) or when accessed as an attribute (PEP 562
+# __getattr__). Import failures are logged at debug level so a broken
+# updater only disables itself.
+_import_lock = threading.Lock()
+# Updater name -> (seconds spent importing it, top-level modules it pulled in)
+_import_times: Dict[str, Tuple[float, List[str]]] = {}
+
+
+def load_updater(name: str):
+    """Import the module of updater `name` on first use and return its class, None if unknown or broken."""
+    cls = globals().get(name)
+    if isinstance(cls, type):
+        return cls
+    module_name = _UPDATERS.get(name)
+    if module_name is None:
+        return None
+    with _import_lock:
+        before = set(sys.modules)
+        start = time.perf_counter()
+        try:
+            cls = getattr(import_module(f".{module_name}", __package__), name)
+        except Exception as _exc:  # pragma: no cover - runtime import failures
+            logging.debug(f"updaters: failed to import {module_name}.{name}: {_exc}")
+            return None
+        elapsed = time.perf_counter() - start
+        pulled_in = sorted({m.split(".")[0] for m in set(sys.modules) - before} - {__package__})
+        _import_times[name] = (elapsed, pulled_in)
+        # Importing the submodule bound the module object to this name, expose the class instead
+        globals()[name] = cls
+    return cls
+
+
+def is_updater_name(name: str) -> bool:
+    """True if name is a known updater (config key), without importing it."""
+    return name in _UPDATERS
+
+
+def import_times() -> Dict[str, Tuple[float, List[str]]]:
+    """Import cost of every updater loaded so far, for --profile-startup."""
+    return dict(_import_times)
+
+
+def __getattr__(name: str):
+    cls = load_updater(name) if name in _UPDATERS else None
+    if cls is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return cls
 
 # Static, deterministic export list
 __all__ = [
@@ -1,22 +1,54 @@
 from abc import ABC
 from pathlib import Path
-from functools import cache
-import glob
+from functools import cache, lru_cache
+from contextlib import contextmanager
 import re
+import threading
 # Import all shared updater functions (absolute imports for compatibility)
 from updaters.shared.robust_download import robust_download
-from updaters.shared.sha256_hash_check import sha256_hash_check
+from updaters.shared.sha256_hash_check import sha256_hash_check, hash_check, get_verified_digest
 from updaters.shared.fetch_hashes_from_url import fetch_hashes_from_url
+from updaters.shared.resolve_file_case import resolve_file_case
+from updaters.shared.repair_file_blocks import repair_file_blocks
+from updaters.shared.rank_mirrors import rank_mirrors, rewrite_to_mirror
+from updaters.shared.settings import get_setting
+from updaters.shared.drive_index import get_drive_index
+from updaters.shared.state_db import get_state_db
+from updaters.shared.robust_get import robust_get
+from updaters.shared.pipeline_executor import Stage, NETWORK, DISK
+from updaters.shared.verified_copy import verified_copy
+from updaters.shared.content_store import get_content_store
+from updaters.shared.version import version_key
+from updaters.shared.log_pipeline import LogMessage
+
+
+@lru_cache(maxsize=None)
+def _local_version_regex(normalized_path_without_ext: str) -> re.Pattern:
+    """Regex capturing [[VER]] from a local file path, compiled once per updater path."""
+    return re.compile(r"(.+)".join(
+        re.escape(part)
+        for part in normalized_path_without_ext.split("[[VER]]")
+    ))
+
+
+# What the [[VER]] part of an old version's file name may look like
+_OLD_VERSION = re.compile(r"\d[\w.+~]*(?:-\d[\w.+~]*)*")
 
 
 class GenericUpdater(ABC):
 
     def logging_callback(self, message: str):
-        """Centralized logging method for all updaters. Always adds [self.ISOname] prefix if not present. Calls the parent callback if set."""
-        prefix = f"[{getattr(self, 'ISOname', self.__class__.__name__)}]"
+        """Centralized logging method for all updaters. Always adds [self.ISOname] prefix if not present. Calls the parent callback if set.
+
+        The message goes on as a LogMessage naming the updater (see log_pipeline), keeping the
+        structured fields (phase, bytes, ...) message already carries."""
+        # prefix and plain name are computed once in __init__
+        prefix = self.__dict__.get('_log_prefix') or f"[{getattr(self, 'ISOname', self.__class__.__name__)}]"
         # Only add prefix if not already present
-        if not (isinstance(message, str) and message.strip().startswith(prefix)):
+        fields = getattr(message, 'fields', {})
+        if not (isinstance(message, str) and message.lstrip().startswith(prefix)):
             message = f"{prefix} {message}"
+        message = LogMessage(message, **{'updater': self.__dict__.get('_log_name') or self.__class__.__name__, **fields})
         if hasattr(self, 'parent_log_callback') and self.parent_log_callback:
             self.parent_log_callback(message)
         else:
@@ -25,9 +57,9 @@ class GenericUpdater(ABC):
 
     def _get_local_file(self) -> Path | None:
         normalized_path = self._get_normalized_file_path(absolute=True)
-        local_files = glob.glob(str(normalized_path).replace("[[VER]]", "*"))
+        local_files = get_drive_index().find(normalized_path.parent, normalized_path.name.replace("[[VER]]", "*"))
         if local_files:
-            return Path(local_files[0])
+            return local_files[0]
         return None
     
     def _get_local_version(self) -> list[str] | None:
@@ -39,11 +71,7 @@ class GenericUpdater(ABC):
         normalized_path_without_ext = self._get_normalized_file_path(
             absolute=True
         ).with_suffix("")
-        version_regex: str = r"(.+)".join(
-            re.escape(part)
-            for part in str(normalized_path_without_ext).split("[[VER]]")
-        )
-        local_version_regex = re.search(version_regex, str(local_file_without_ext))
+        local_version_regex = _local_version_regex(str(normalized_path_without_ext)).search(str(local_file_without_ext))
         if local_version_regex:
             local_version = self._str_to_version(local_version_regex.group(1))
         return local_version
@@ -100,6 +128,8 @@ class GenericUpdater(ABC):
         self.version_splitter = "."
         self.parent_log_callback = parent_logging_callback
         self.retries_count = kwargs.get('retries_count', 0)
+        # Extra mirror roots from config.toml (`mirrors = [...]` in the updater's table)
+        self.mirrors = list(kwargs.get('mirrors') or [])
         # Vastly expanded color palette using 256-color ANSI escape codes for foreground (avoid backgrounds, black/dark, and white/light colors)
         # Exclude black (16), very dark (232-236), and very light/white (231, 230, 229, 15, 255, 254, 253, 252, 251, 250, 249, 248, 247, 246, 145, 255)
         # Exclude dark blue (17), dark green/cyan (18), and other very dark colors (19, 52-59)
@@ -150,6 +180,8 @@ class GenericUpdater(ABC):
                 color = used[class_name]
             colored_name = f"{color}{base_name}{reset_code}"
             self.ISOname = colored_name
+        self._log_prefix = f"[{getattr(self, 'ISOname', class_name)}]"
+        self._log_name = str(base_name) if base_name else class_name
         # Validate edition/lang as before
         if self.has_edition() and hasattr(self, 'valid_editions'):
             edition = getattr(self, 'edition', None)
@@ -226,7 +258,153 @@ class GenericUpdater(ABC):
     
 
 
+    def _get_mirror_candidates(self) -> list[str]:
+        """
+        Interchangeable base URLs for downloads. The module's MIRRORS list (canonical root first)
+        is extended with any `mirrors` from config.toml.
+        """
+        import sys
+        builtin = list(getattr(sys.modules[self.__class__.__module__], 'MIRRORS', []))
+        if not builtin:
+            return []
+        return list(dict.fromkeys(builtin + self.mirrors))
+
+    def _get_download_sources(self, download_link: str) -> list[str]:
+        """
+        Equivalent URLs for download_link on the fastest responding mirrors, best first
+        (at most `max_download_sources`). robust_download splits the file across them.
+        Checksums are still fetched from the canonical source, so a bad mirror only costs a retry.
+        """
+        metalink = self._get_metalink()
+        if metalink and metalink.urls:
+            # The metalink server already ordered its mirrors for us
+            sources = metalink.urls[:max(1, get_setting("max_download_sources", 3))]
+            self.logging_callback(f"[mirrors] Downloading from metalink mirrors: {', '.join(sources)}")
+            return sources
+        candidates = self._get_mirror_candidates()
+        if len(candidates) < 2 or not get_setting("mirror_probe", True):
+            return [download_link]
+        relative_path = rewrite_to_mirror(download_link, candidates, "")
+        if relative_path == download_link:
+            return [download_link]
+        ranked = rank_mirrors(candidates, relative_path, self.logging_callback)
+        if not ranked:
+            return [download_link]
+        sources = [rewrite_to_mirror(download_link, candidates, root) for root in ranked]
+        sources = sources[:max(1, get_setting("max_download_sources", 3))]
+        self.logging_callback(f"[mirrors] Downloading from: {', '.join(sources)}")
+        return sources
+
+    @classmethod
+    def clear_instance_caches(cls):
+        """Empty the caches of cls's @cache'd methods (and its bases'), which keep every instance
+        they were called on alive; a long-running process (--daemon) calls this after each pass."""
+        for klass in cls.__mro__:
+            for attr in vars(klass).values():
+                if hasattr(attr, "cache_clear"):
+                    attr.cache_clear()
+
+    def _state_key(self) -> str:
+        """(Protected) Key of this updater+edition+lang in the state database, prefixed with its
+        folder (relative to the drive) since the same updater may be configured in several folders."""
+        db = get_state_db()
+        # the updater's own folder, also inside a staged stage
+        folder = self.__dict__.get('_folder_path') or self.folder_path
+        return "|".join([
+            db.relative(folder) if db else folder.as_posix(),
+            self.__class__.__name__,
+            str(getattr(self, 'edition', '') or ''),
+            str(getattr(self, 'lang', '') or ''),
+        ])
+
+    def _get_upstream_state_url(self) -> str | None:
+        """
+        (Protected) URL whose ETag/Last-Modified changes when upstream publishes a new release.
+        Defaults to the file itself when its name has no version, else the module's DOWNLOAD_PAGE_URL.
+        Updaters with a better signal (a checksum file, a release feed) override this.
+        """
+        if not self.has_version():
+            return self._get_download_link()
+        import sys
+        page = getattr(sys.modules[self.__class__.__module__], 'DOWNLOAD_PAGE_URL', None)
+        if not page:
+            return None
+        for placeholder, value in (("[[EDITION]]", getattr(self, 'edition', None)), ("[[LANG]]", getattr(self, 'lang', None))):
+            if placeholder in page:
+                if not value:
+                    return None
+                page = page.replace(placeholder, str(value))
+        return page
+
+    def _upstream_unchanged(self) -> bool:
+        """
+        (Protected) True if the local file is the one verified last time and a conditional request
+        shows upstream hasn't changed since (HTTP 304). No hashing, no size probes.
+        """
+        db = get_state_db()
+        record = db.get(self._state_key()) if db else None
+        if not record or not record.get("state_url") or not (record.get("etag") or record.get("last_modified")):
+            return False
+        # the recorded file must be this updater's current file (the local version, no network needed)
+        local_file = resolve_file_case(self._get_complete_normalized_file_path(absolute=True, latest=False))
+        if local_file is None or db.relative(local_file) != record.get("local_file"):
+            return False
+        # fresh: a file rewritten behind the index's back must not pass as verified
+        local = get_drive_index().stat(local_file, fresh=True)
+        if local is None or local.size != record.get("local_size") or local.mtime != record.get("local_mtime"):
+            return False
+        headers = {}
+        if record.get("etag"):
+            headers["If-None-Match"] = record["etag"]
+        if record.get("last_modified"):
+            headers["If-Modified-Since"] = record["last_modified"]
+        # HEAD: when upstream did change, a GET would pull the whole ISO into memory
+        resp = robust_get(record["state_url"], self.logging_callback, method="HEAD", retries=1, delay=1, headers=headers)
+        return resp is not None and resp.status_code == 304
+
+    def record_verified_state(self):
+        """
+        Remember the upstream metadata and the local file that just passed verification,
+        so the next run can skip the whole check when neither changed.
+        """
+        db = get_state_db()
+        if db is None:
+            return
+        try:
+            local_file = resolve_file_case(self._get_complete_normalized_file_path(absolute=True))
+            local = get_drive_index().update(local_file) if local_file else None
+            if local is None:
+                return
+            state_url = self._get_upstream_state_url()
+            etag = last_modified = None
+            if state_url:
+                resp = robust_get(state_url, self.logging_callback, method="HEAD", retries=1, delay=1)
+                if resp is not None:
+                    etag = resp.headers.get("ETag")
+                    last_modified = resp.headers.get("Last-Modified")
+            verified = get_verified_digest(local_file)
+            version = self._get_latest_version() if self.has_version() else None
+            db.put(self._state_key(), {
+                "version": self._version_to_str(version) if version else None,
+                "url": self._get_download_link(),
+                "size": local.size,
+                "digest_type": verified[0] if verified else None,
+                "expected_digest": verified[1] if verified else None,
+                "state_url": state_url,
+                "etag": etag,
+                "last_modified": last_modified,
+                "local_file": db.relative(local_file),
+                "local_size": local.size,
+                "local_mtime": local.mtime,
+                "verified_digest": verified[1] if verified else None,
+            })
+        except Exception as e:
+            self.logging_callback(f"[record_verified_state] Could not record state: {e}")
+
     def check_for_updates(self) -> bool | int | None:
+        if self._upstream_unchanged():
+            self.logging_callback(f"[{getattr(self, 'ISOname', self.__class__.__name__)}] Upstream and local file unchanged since the last verification. No update needed.")
+            return False
         # Only integrity matters: update if integrity fails, skip if it passes
         try:
             integrity_ok = self.check_integrity()
@@ -242,9 +420,13 @@ class GenericUpdater(ABC):
             return None
         elif integrity_ok:
             self.logging_callback(f"[{getattr(self, 'ISOname', self.__class__.__name__)}] Local file passed integrity check. No update needed.")
+            self.record_verified_state()
             return False
         else:    # check_for_updates is False
             self.logging_callback(f"[{getattr(self, 'ISOname', self.__class__.__name__)}] Integrity check failed or file missing. Update required.")
+            db = get_state_db()
+            if db is not None:
+                db.remove(self._state_key())
             return True
 
 
@@ -265,8 +447,18 @@ class GenericUpdater(ABC):
 
         if not has_version_fn():
             if old_file:
-                self.logging_callback(f"[GenericUpdater.install_latest_version] Renaming old file: {old_file}")
-                old_file.with_suffix(".old").replace(old_file)
+                # Kept until the new file is verified (retire_old_versions) or put back (restore_old_version)
+                backup = self._get_backup_path(old_file)
+                if get_drive_index().exists(backup):
+                    # A previous attempt already moved the last good copy there; old_file is that
+                    # attempt's unverified download and must not replace it
+                    self.logging_callback(f"[GenericUpdater.install_latest_version] Keeping {backup.name}, removing unverified {old_file.name}")
+                    old_file.unlink(missing_ok=True)
+                    get_drive_index().update(old_file)
+                else:
+                    self.logging_callback(f"[GenericUpdater.install_latest_version] Renaming old file: {old_file} -> {backup.name}")
+                    old_file.replace(backup)
+                    get_drive_index().update(old_file, backup)
 
         def resolve_placeholder(val, fallback=None):
             if val is None:
@@ -312,17 +504,31 @@ class GenericUpdater(ABC):
 
         attempt = 0
         max_attempts = float('inf') if retries == -1 else max(1, retries)
+        if download_link is not None:
+            # First attempt is spread over the fastest mirrors, later attempts fall back to the canonical link
+            sources = self._get_download_sources(download_link)
         while True:
             attempt += 1
             self.logging_callback(f"[install_latest_version] Download attempt {attempt} for {download_link}")
             if download_link is None:
                 self.logging_callback(f"[install_latest_version] ERROR: No download link provided, cannot proceed with download.")
                 return None
-            self.logging_callback(f"[install_latest_version] Starting robust_download for {download_link}")
-            resp = robust_download(download_link, local_file=new_file, retries=1, delay=1, logging_callback=self.logging_callback)
-            self.logging_callback(f"[install_latest_version] robust_download finished for {download_link} (resp type: {type(resp)}, status: {resp})")
+            self.logging_callback(f"[install_latest_version] Starting robust_download for {', '.join(sources)}")
+            metalink = self._get_metalink()
+            resp = robust_download(
+                sources,
+                local_file=new_file,
+                retries=1,
+                delay=1,
+                logging_callback=self.logging_callback,
+                expected_size=metalink.size if metalink else None,
+                block_manifest=metalink.pieces if metalink else None,
+                expected_digests=metalink.hashes if metalink else None,
+            )
+            self.logging_callback(f"[install_latest_version] robust_download finished for {', '.join(sources)} (resp type: {type(resp)}, status: {resp})")
             if resp is not True:
-                self.logging_callback(f"[install_latest_version] Download failed (attempt {attempt}) for {download_link}")
+                self.logging_callback(f"[install_latest_version] Download failed (attempt {attempt}) for {', '.join(sources)}")
+                sources = [download_link]
                 if attempt >= max_attempts:
                     self.logging_callback(f"[install_latest_version] Exceeded max download attempts for {download_link}")
                     return None
@@ -334,6 +540,340 @@ class GenericUpdater(ABC):
 
 
 
+    def _get_backup_path(self, file: Path) -> Path:
+        """(Protected) Where install_latest_version moves a same-named old file while the new one downloads."""
+        return file.with_name(file.name + ".old")
+
+    def _get_old_versions(self) -> list[Path]:
+        """
+        (Protected) Files a verified install of the latest version replaces: other versions of
+        this file in the folder, and the backup of a same-named old file.
+        """
+        current = self._get_complete_normalized_file_path(absolute=True)
+        normalized = self._get_normalized_file_path(absolute=True)
+        old_versions = []
+        if self.has_version():
+            version_regex = _local_version_regex(str(normalized.with_suffix("")))
+            for file in get_drive_index().find(normalized.parent, normalized.name.replace("[[VER]]", "*")):
+                match = version_regex.fullmatch(str(file.with_suffix("")))
+                # "debian-*.iso" also matches another updater's "debian-12.5-netinst.iso": only
+                # take files whose [[VER]] part looks like a version (9.0-1, 2.06s4, 42-1.1)
+                if file.name.lower() != current.name.lower() and match and _OLD_VERSION.fullmatch(match.group(1)):
+                    old_versions.append(file)
+        backup = self._get_backup_path(current)
+        if get_drive_index().exists(backup):
+            old_versions.append(backup)
+        return old_versions
+
+    def estimate_disk_space(self, download_size: int | None) -> tuple[int, int]:
+        """
+        Drive space an install of the latest version takes while it runs, and what it frees once verified.
+
+        Args:
+            download_size (int | None): Expected size of the download (see estimate_download_size);
+                when unknown, the old version's size is assumed.
+
+        Returns:
+            tuple[int, int]: (bytes still to be written, bytes freed by retire_old_versions afterwards).
+        """
+        index = get_drive_index()
+        current = self._get_complete_normalized_file_path(absolute=True)
+        old_sizes = [entry.size for entry in map(index.stat, self._get_old_versions()) if entry is not None]
+        if not self.has_version():
+            # The current file is moved to the backup first, so it is freed too
+            local_file = self._get_local_file()
+            local = index.stat(local_file) if local_file else None
+            if local is not None:
+                old_sizes.append(local.size)
+        if download_size is None:
+            download_size = max(old_sizes, default=0)
+        part = index.stat(current.with_name(current.name + ".part"))
+        return max(0, download_size - (part.size if part else 0)), sum(old_sizes)
+
+    def retire_old_versions(self) -> int:
+        """
+        Remove the versions a verified install replaced (see _get_old_versions). Only call this
+        once the new file passed check_integrity, so the drive always holds one good version.
+
+        Returns:
+            int: Bytes freed.
+        """
+        freed = 0
+        for old_file in self._get_old_versions():
+            try:
+                size = old_file.stat().st_size
+                old_file.unlink()
+            except OSError as e:
+                self.logging_callback(f"[retire_old_versions] Could not remove {old_file.name}: {e}")
+                continue
+            get_drive_index().update(old_file)
+            freed += size
+            self.logging_callback(f"[retire_old_versions] Removed old version {old_file.name} ({size // (1024 * 1024):,} MB)")
+        return freed
+
+    def restore_old_version(self) -> bool:
+        """
+        After a failed install, put the backup of a same-named old file back in place of the
+        unverified new one.
+
+        Returns:
+            bool: True if a backup was restored.
+        """
+        current = self._get_complete_normalized_file_path(absolute=True)
+        backup = self._get_backup_path(current)
+        if not get_drive_index().exists(backup):
+            return False
+        try:
+            backup.replace(current)
+        except OSError as e:
+            self.logging_callback(f"[restore_old_version] Could not restore {backup.name}: {e}")
+            return False
+        get_drive_index().update(backup, current)
+        self.logging_callback(f"[restore_old_version] Install failed, restored the previous {current.name}")
+        return True
+
+    def estimate_download_size(self) -> int | None:
+        """
+        Expected size in bytes of the next download, for scheduling. Uses what is free first:
+        the size recorded in the state database, then the current local file, then a size probe.
+
+        Returns:
+            int | None: The estimate, None if nothing is known.
+        """
+        db = get_state_db()
+        record = db.get(self._state_key()) if db else None
+        if record and record.get("size"):
+            return int(record["size"])
+        local_file = self._get_local_file()
+        local = get_drive_index().stat(local_file) if local_file else None
+        if local is not None and local.size:
+            return local.size
+        download_link = self._get_download_link()
+        if not isinstance(download_link, str) or "[[" in download_link:
+            return None
+        from updaters.shared.fetch_expected_file_size import fetch_expected_file_size
+        return fetch_expected_file_size(download_link, self.logging_callback)
+
+    def get_install_stages(self) -> list[Stage]:
+        """
+        Stage graph (see updaters.shared.pipeline_executor) that installs and verifies the latest version.
+        By default install_latest_version runs on the network pool and check_integrity on the disk pool;
+        updaters whose install has separate download/hash/extract steps override this to split them.
+
+        Returns:
+            list[Stage]: Must contain an "install" stage returning the install result and a final
+            "verify" stage returning the check_integrity() result.
+        """
+        return [
+            Stage("install", NETWORK, lambda results: self.install_latest_version()),
+            Stage("verify", DISK, lambda results: self.check_integrity() if results["install"] else False, after=["install"]),
+        ]
+
+    def get_repair_stages(self) -> list[Stage]:
+        """
+        Stage graph that runs repair_latest_version and checks the result.
+
+        Returns:
+            list[Stage]: A "repair" stage returning the repair result and a "verify" stage after it.
+        """
+        return [
+            Stage("repair", NETWORK, lambda results: self.repair_latest_version()),
+            Stage("verify", DISK, lambda results: self.check_integrity() if results["repair"] else False, after=["repair"]),
+        ]
+
+    @property
+    def folder_path(self) -> Path:
+        """The folder the updater reads and writes its files in (see _in_folder)."""
+        override = self.__dict__.get('_folder_override')
+        folder = getattr(override, 'folder', None) if override is not None else None
+        if folder is not None:
+            return folder
+        try:
+            return self.__dict__['_folder_path']
+        except KeyError:
+            raise AttributeError('folder_path') from None
+
+    @folder_path.setter
+    def folder_path(self, folder: Path):
+        self.__dict__['_folder_path'] = folder
+
+    @contextmanager
+    def _in_folder(self, folder: Path):
+        """(Protected) Make the updater read and write its files in another folder, for the calling
+        thread only: other threads (stages of other graphs, FanOut, the daemon) keep seeing its own folder."""
+        override = self.__dict__.setdefault('_folder_override', threading.local())
+        previous = getattr(override, 'folder', None)
+        override.folder = folder
+        try:
+            yield
+        finally:
+            override.folder = previous
+
+    def _get_staging_folder(self) -> Path | None:
+        """(Protected) This updater's folder inside the staging_dir setting, None if staging is off."""
+        staging_dir = get_setting("staging_dir")
+        if not staging_dir:
+            return None
+        return Path(staging_dir).expanduser().resolve() / self.folder_path.relative_to(self.folder_path.anchor)
+
+    def with_staging(self, stages: list[Stage]) -> list[Stage]:
+        """
+        Run an install or repair graph in the staging directory (staging_dir setting), on fast local
+        disk instead of the Ventoy drive, then copy only a verified result to the drive.
+
+        The graph's "verify" stage becomes "staged_verify", and a new "verify" stage copies the file
+        with verified_copy and returns the staged result (False if the copy failed). Only the main
+        file (_get_complete_normalized_file_path) is published; whatever else the install leaves
+        in the staging folder (downloaded archives, .part files) stays there. Without a
+        staging_dir the graph is returned unchanged.
+        """
+        staging_folder = self._get_staging_folder()
+        if staging_folder is None:
+            return stages
+
+        def staged(fn):
+            def run(results):
+                staging_folder.mkdir(parents=True, exist_ok=True)
+                with self._in_folder(staging_folder):
+                    return fn(results)
+            return run
+
+        renamed = {"verify": "staged_verify"}
+        staged_stages = [
+            Stage(renamed.get(stage.name, stage.name), stage.kind, staged(stage.fn), after=[renamed.get(name, name) for name in stage.after])
+            for stage in stages
+        ]
+
+        def publish(results):
+            integrity = results["staged_verify"]
+            if integrity is False:
+                return False
+            with self._in_folder(staging_folder):
+                staged_file = resolve_file_case(self._get_complete_normalized_file_path(absolute=True))
+            if not staged_file:
+                return False
+            published = self.folder_path / staged_file.name
+            if not verified_copy(staged_file, published, logging_callback=self.logging_callback):
+                return False
+            store = get_content_store()
+            if store is not None:
+                store.move_placement(staged_file, published)
+            staged_file.unlink(missing_ok=True)
+            return integrity
+
+        return staged_stages + [Stage("verify", DISK, publish, after=["staged_verify"])]
+
+    def with_store(self, stages: list[Stage]) -> list[Stage]:
+        """
+        Share artifacts through the content store (store_dir setting).
+
+        The "install" stage first looks for an object already downloaded from the same URL and
+        places it (hardlink, reflink or copy) instead of downloading; "verify" still checks it
+        against upstream. A "repair" stage first gives the file its own copy of the data, so
+        the repair can't write into the stored object. A file that passes "verify" is adopted
+        into the store. Without a store_dir the graph is returned unchanged.
+        """
+        store = get_content_store()
+        if store is None:
+            return stages
+
+        def install(fn):
+            def run(results):
+                download_link = self._get_download_link()
+                key = store.lookup(download_link) if isinstance(download_link, str) else None
+                destination = self._get_complete_normalized_file_path(absolute=True)
+                if key and store.place(key, destination, self._state_key(), self.logging_callback):
+                    return True
+                # Never download into a file that shares its data with a stored object
+                store.unshare(destination)
+                return fn(results)
+            return run
+
+        def repair(fn):
+            def run(results):
+                # Repairs write in place: into a private copy, not the stored object every placement shares
+                local_file = resolve_file_case(self._get_complete_normalized_file_path(absolute=True))
+                if local_file:
+                    store.unshare(local_file, keep=True)
+                return fn(results)
+            return run
+
+        def verify(fn):
+            def run(results):
+                integrity = fn(results)
+                local_file = resolve_file_case(self._get_complete_normalized_file_path(absolute=True)) if integrity is True else None
+                if local_file:
+                    download_link = self._get_download_link()
+                    store.adopt(local_file, download_link if isinstance(download_link, str) else None, self._state_key(), self.logging_callback)
+                return integrity
+            return run
+
+        wrappers = {"install": install, "repair": repair, "verify": verify}
+        return [
+            Stage(stage.name, stage.kind, wrappers[stage.name](stage.fn), after=stage.after) if stage.name in wrappers else stage
+            for stage in stages
+        ]
+
+    def prepare_stages(self, stages: list[Stage]) -> list[Stage]:
+        """Apply the content store and the staging directory to an install or repair graph."""
+        return self.with_staging(self.with_store(stages))
+
+    def _get_block_manifest(self):
+        """
+        (Protected) Get block-level digests (BlockManifest) for the latest download.
+        Updaters that can obtain piece hashes (e.g. from a .torrent) override this;
+        by default the pieces of the metalink are used, if there is one.
+
+        Returns:
+            BlockManifest | None: None when the upstream publishes no block-level metadata.
+        """
+        metalink = self._get_metalink()
+        return metalink.pieces if metalink else None
+
+    def _get_metalink(self):
+        """
+        (Protected) Get the metalink (size, hashes, piece hashes, mirrors) for the latest download.
+        Updaters whose upstream publishes metalinks override this, usually with @cache.
+
+        Returns:
+            Metalink | None: None when the upstream publishes no metalink.
+        """
+        return None
+
+    def _check_metalink_integrity(self, local_file: Path) -> bool | None:
+        """
+        (Protected) Check local_file against the strongest full-file hash in the metalink.
+
+        Returns:
+            bool | None: The hash check result, or None if the metalink has no usable hash.
+        """
+        metalink = self._get_metalink()
+        if not metalink:
+            return None
+        for hash_type in ("sha512", "sha256", "sha1", "md5"):
+            if hash_type in metalink.hashes:
+                return hash_check(local_file, metalink.hashes[hash_type], logging_callback=self.logging_callback, hash_type=hash_type)
+        return None
+
+    def repair_latest_version(self) -> bool:
+        """
+        Repair a corrupt local copy of the latest version by re-fetching only its bad blocks.
+
+        Returns:
+            True if the file was repaired, False if no block metadata is available or the repair failed.
+        """
+        manifest = self._get_block_manifest()
+        if manifest is None:
+            return False
+        local_file = resolve_file_case(self._get_complete_normalized_file_path(absolute=True))
+        if not local_file:
+            return False
+        download_link = self._get_download_link()
+        if not download_link:
+            return False
+        self.logging_callback(f"[repair_latest_version] Attempting block-level repair of {local_file}")
+        return repair_file_blocks(download_link, local_file, manifest, logging_callback=self.logging_callback)
+
     @cache
     def _get_download_link(self) -> str | None:
         """
@@ -361,13 +901,4 @@ class GenericUpdater(ABC):
             Returns:
                 bool: True if the new version is greater than the old version, False otherwise.
             """
-            for i in range(len(new_version)):
-                try:
-                    if int(new_version[i]) > int(old_version[i]):
-                        return True
-                except ValueError:
-                    if int(new_version[i], 32) > int(old_version[i], 32):
-                        return True
-                except IndexError:
-                    return True
-            return False
\ No newline at end of file
+            return version_key(new_version) > version_key(old_version)
\ No newline at end of file
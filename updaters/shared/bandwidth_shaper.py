@@ -0,0 +1,180 @@
+import threading
+import time
+from datetime import datetime
+from updaters.shared.host_throughput import host_of
+from updaters.shared.parse_rate import parse_rate
+from updaters.shared.settings import get_setting
+
+# A bucket holds at most this many seconds of its rate, so an idle link allows a short burst
+BURST_SECONDS = 0.5
+# How often the time-of-day profiles are re-evaluated
+PROFILE_CHECK_INTERVAL = 30.0
+_DAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+
+class TokenBucket:
+    """
+    Token bucket that lets callers go into debt instead of polling.
+
+    reserve(n) takes n tokens right away and returns how long the caller must sleep to pay the
+    debt back. Concurrent transfers thus share the rate in arrival order, and a transfer alone
+    on the link gets all of it (work-conserving).
+    """
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._tokens = rate * BURST_SECONDS
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate: float):
+        with self._lock:
+            self._refill()
+            self.rate = rate
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.rate * BURST_SECONDS, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def reserve(self, nbytes: int) -> float:
+        with self._lock:
+            self._refill()
+            self._tokens -= nbytes
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+
+def _matches_days(spec, weekday: int) -> bool:
+    """'mon-fri', 'sat,sun', 'daily' or missing."""
+    if not spec or str(spec).lower() in ("daily", "all", "*"):
+        return True
+    for part in str(spec).lower().replace(" ", "").split(","):
+        first, _, last = part.partition("-")
+        if first not in _DAYS or (last and last not in _DAYS):
+            continue
+        start, end = _DAYS.index(first), _DAYS.index(last or first)
+        if (start <= weekday <= end) if start <= end else (weekday >= start or weekday <= end):
+            return True
+    return False
+
+
+def _matches_hours(spec, minute_of_day: int) -> bool:
+    """'08:00-18:00' (wraps past midnight when the end is earlier than the start) or missing."""
+    if not spec:
+        return True
+    try:
+        start, end = (
+            int(hours) * 60 + int(minutes or 0)
+            for hours, _, minutes in (bound.partition(":") for bound in str(spec).replace(" ", "").split("-"))
+        )
+    except ValueError:
+        return False
+    return start <= minute_of_day < end if start <= end else (minute_of_day >= start or minute_of_day < end)
+
+
+def _host_matches(host: str, pattern: str) -> bool:
+    pattern = pattern.lower().lstrip(".")
+    return host == pattern or host.endswith("." + pattern)
+
+
+class BandwidthShaper:
+    """
+    Process-wide rate limiter every transfer draws from: a global token bucket plus one bucket
+    per capped host. Limits come from the bandwidth_limit / bandwidth_host_limits settings, or
+    from the first bandwidth_profiles entry matching the current day and time, e.g.
+    {days = "mon-fri", hours = "08:00-18:00", limit = "2M", host_limits = {"kali.org" = "1M"}}.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._global: TokenBucket | None = None
+        self._host_buckets: dict[str, TokenBucket] = {}
+        self._checked: float | None = None
+        self._active = None
+
+    def _current_limits(self) -> tuple[float | None, dict[str, float]]:
+        now = datetime.now()
+        for profile in get_setting("bandwidth_profiles", []) or []:
+            if not isinstance(profile, dict):
+                continue
+            if _matches_days(profile.get("days"), now.weekday()) and _matches_hours(profile.get("hours"), now.hour * 60 + now.minute):
+                return parse_rate(profile.get("limit")), self._parse_host_limits(profile.get("host_limits"))
+        return parse_rate(get_setting("bandwidth_limit")), self._parse_host_limits(get_setting("bandwidth_host_limits"))
+
+    @staticmethod
+    def _parse_host_limits(value) -> dict[str, float]:
+        if not isinstance(value, dict):
+            return {}
+        limits = {}
+        for host, rate in value.items():
+            rate = parse_rate(rate)
+            if rate:
+                limits[str(host).lower()] = rate
+        return limits
+
+    def _refresh(self):
+        """Apply the limits of the current time-of-day profile (at most every PROFILE_CHECK_INTERVAL)."""
+        now = time.monotonic()
+        with self._lock:
+            if self._checked is not None and now - self._checked < PROFILE_CHECK_INTERVAL:
+                return
+            self._checked = now
+            global_rate, host_limits = self._current_limits()
+            if global_rate is None:
+                self._global = None
+            elif self._global is None:
+                self._global = TokenBucket(global_rate)
+            else:
+                self._global.set_rate(global_rate)
+            for pattern in list(self._host_buckets):
+                if pattern not in host_limits:
+                    del self._host_buckets[pattern]
+            for pattern, rate in host_limits.items():
+                if pattern in self._host_buckets:
+                    self._host_buckets[pattern].set_rate(rate)
+                else:
+                    self._host_buckets[pattern] = TokenBucket(rate)
+            self._active = self._global is not None or bool(self._host_buckets)
+
+    def _host_bucket(self, url: str) -> TokenBucket | None:
+        host = host_of(url)
+        with self._lock:
+            for pattern, bucket in self._host_buckets.items():
+                if _host_matches(host, pattern):
+                    return bucket
+        return None
+
+    def is_active(self) -> bool:
+        """True when any limit applies right now."""
+        self._refresh()
+        return bool(self._active)
+
+    def throttle(self, url: str, nbytes: int) -> float:
+        """
+        Account for nbytes just received from url, sleeping as long as the limits require.
+
+        Returns:
+            float: Seconds slept; a ThroughputWatchdog must not count them as a slow transfer.
+        """
+        if not nbytes or not self.is_active():
+            return 0.0
+        buckets = [self._global, self._host_bucket(url)]
+        wait = max((bucket.reserve(nbytes) for bucket in buckets if bucket is not None), default=0.0)
+        if wait > 0:
+            time.sleep(wait)
+            return wait
+        return 0.0
+
+    def limit_for(self, url: str) -> float | None:
+        """Current effective cap (bytes/s) for a transfer from url, None if unlimited."""
+        self._refresh()
+        rates = [bucket.rate for bucket in (self._global, self._host_bucket(url)) if bucket is not None]
+        return min(rates) if rates else None
+
+
+_bandwidth_shaper = BandwidthShaper()
+
+
+def get_bandwidth_shaper() -> BandwidthShaper:
+    """The process-wide BandwidthShaper."""
+    return _bandwidth_shaper
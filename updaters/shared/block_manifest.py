@@ -0,0 +1,59 @@
+from updaters.shared.verify_torrent_integrity import bdecode
+
+
+class BlockManifest:
+    """
+    Block-level digests describing a remote file, split into fixed-size blocks.
+
+    Attributes:
+        block_size (int): Size of every block except possibly the last one.
+        hash_type (str): hashlib algorithm name used for the block digests (e.g. 'sha1').
+        digests (list[str]): Lowercase hex digest for each block, in file order.
+        total_size (int | None): Total size of the file, if known.
+    """
+
+    def __init__(self, block_size: int, hash_type: str, digests: list[str], total_size: int | None = None):
+        self.block_size = block_size
+        self.hash_type = hash_type
+        self.digests = [d.lower() for d in digests]
+        self.total_size = total_size
+
+    def __len__(self) -> int:
+        return len(self.digests)
+
+    def block_range(self, index: int) -> tuple[int, int]:
+        """Return the (start, end) byte range of a block, end exclusive."""
+        start = index * self.block_size
+        end = start + self.block_size
+        if self.total_size is not None:
+            end = min(end, self.total_size)
+        return start, end
+
+
+def block_manifest_from_torrent(torrent_data: bytes, logging_callback) -> BlockManifest | None:
+    """
+    Build a BlockManifest from the piece hashes of a single-file .torrent.
+
+    Args:
+        torrent_data (bytes): Raw .torrent file contents.
+
+    Returns:
+        BlockManifest: SHA-1 piece digests, or None if the torrent can't be used.
+    """
+    try:
+        torrent = bdecode(torrent_data)
+        info = torrent[b"info"]
+        if b"files" in info:
+            logging_callback("[block_manifest_from_torrent] Multi-file torrents are not supported for block repair.")
+            return None
+        piece_length = int(info[b"piece length"])
+        length = int(info[b"length"])
+        pieces = info[b"pieces"]
+    except Exception as e:
+        logging_callback(f"[block_manifest_from_torrent] Could not parse torrent: {e}")
+        return None
+    if len(pieces) % 20 != 0:
+        logging_callback("[block_manifest_from_torrent] Invalid piece hash table in torrent.")
+        return None
+    digests = [pieces[i:i + 20].hex() for i in range(0, len(pieces), 20)]
+    return BlockManifest(piece_length, "sha1", digests, total_size=length)
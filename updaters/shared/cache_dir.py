@@ -0,0 +1,22 @@
+import os
+from pathlib import Path
+from updaters.shared.settings import get_setting
+
+
+def get_cache_dir(*parts: str) -> Path:
+    """
+    Return (and create) sisou2's local cache directory, or a subdirectory of it.
+
+    Resolution order: the `cache_dir` setting, $SISOU2_CACHE_DIR, then the platform default
+    (%LOCALAPPDATA%\\sisou2 on Windows, $XDG_CACHE_HOME/sisou2 or ~/.cache/sisou2 elsewhere).
+    """
+    configured = get_setting("cache_dir") or os.environ.get("SISOU2_CACHE_DIR")
+    if configured:
+        base = Path(configured).expanduser()
+    elif os.name == "nt" and os.environ.get("LOCALAPPDATA"):
+        base = Path(os.environ["LOCALAPPDATA"]) / "sisou2"
+    else:
+        base = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "sisou2"
+    path = base.joinpath(*parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
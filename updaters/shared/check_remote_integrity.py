@@ -1,5 +1,5 @@
+from updaters.shared.checksum_manifest import get_checksum_manifest
 from updaters.shared.resolve_file_case import resolve_file_case
-from updaters.shared.robust_get import robust_get
 from updaters.shared.parse_hash import parse_hash
 from updaters.shared.sha256_hash_check import hash_check
 
@@ -7,6 +7,10 @@ def check_remote_integrity(hash_url, local_file, hash_type, parse_hash_args, log
     """
     Fetch hash file from hash_url, parse the correct hash, and check integrity of local_file.
     parse_hash_args: ([match_strings_in_line], hash_position_in_line)
+
+    The hash file is parsed once into a ChecksumManifest (cached per URL, so editions sharing
+    a SHA256SUMS fetch it once); hash_position_in_line only matters for formats the manifest
+    doesn't understand, which are still handed to parse_hash.
     """
     RED = '\033[91m'
     RESET = '\033[0m'
@@ -18,15 +22,19 @@ def check_remote_integrity(hash_url, local_file, hash_type, parse_hash_args, log
         if not local_file:
             logging_callback(f"[check_remote_integrity] File not found: {requested_file}")
             return False
-        resp = robust_get(hash_url, delay=3, retries=10, logging_callback=logging_callback)
-        if resp is None or resp.status_code != 200:
-            logging_callback(f"{RED}[check_remote_integrity] Could not fetch hash file from {hash_url}, resp={resp}{RESET}")
+        manifest = get_checksum_manifest(hash_url, logging_callback)
+        if manifest is None:
+            logging_callback(f"{RED}[check_remote_integrity] Could not fetch hash file from {hash_url}{RESET}")
             return False
-        hashes = resp.text
+        hashes = manifest.text
         match_strings_in_line, hash_position_in_line = parse_hash_args
         if parse_hash_kwargs is None:
             parse_hash_kwargs = {}
-        hash_val = parse_hash(hashes, match_strings_in_line, hash_position_in_line, logging_callback=logging_callback, **parse_hash_kwargs)
+        hash_val = manifest.find(match_strings_in_line, hash_type)
+        if hash_val:
+            logging_callback(f"[check_remote_integrity] Online hash: `{hash_val}`")
+        else:
+            hash_val = parse_hash(hashes, match_strings_in_line, hash_position_in_line, logging_callback=logging_callback, **parse_hash_kwargs)
         if not hash_val:
             # Try to log the last non-empty line for debugging
             lines = [line for line in hashes.strip().splitlines() if line.strip()]
@@ -0,0 +1,127 @@
+import re
+import threading
+import time
+from updaters.shared.robust_get import robust_get
+
+# A manifest fetched this recently is reused (all editions of an updater share one SHA256SUMS)
+MANIFEST_TTL = 600.0
+# GNU lines don't name the algorithm: it follows from the digest length
+_ALGORITHM_BY_LENGTH = {32: "md5", 40: "sha1", 56: "sha224", 64: "sha256", 96: "sha384", 128: "sha512"}
+# sha256sum/md5sum output: "<digest>  <name>" ("*<name>" in binary mode)
+_GNU_LINE = re.compile(r"^([0-9a-fA-F]{32,128})\s+\*?(\S.*?)\s*$")
+# BSD (and Fedora/Rocky CHECKSUM) lines: "SHA256 (<name>) = <digest>"
+_BSD_LINE = re.compile(r"^([A-Za-z0-9-]+)\s*\((.+)\)\s*=\s*([0-9a-fA-F]{32,128})\s*$")
+# Fedora CHECKSUM comments: "# <name>: <size> bytes"
+_SIZE_LINE = re.compile(r"^#\s*(\S.*?):\s*(\d+)\s+bytes\s*$")
+
+
+def _normalize_name(name: str) -> str:
+    return name.strip().removeprefix("./")
+
+
+class ChecksumManifest:
+    """
+    Parsed checksum file: GNU (sha256sum), BSD ("SHA256 (name) = digest") and Fedora CHECKSUM
+    lines, in any mix, indexed by file name once so every lookup is a dict access.
+
+    Names are indexed as written and by their last path component; a name can carry digests
+    of several algorithms (e.g. the MD5/SHA1/SHA256 sections of one CHECKSUMS file). Lines in
+    other formats, and PGP armor around signed manifests, are ignored.
+
+    Attributes:
+        text (str): The file as fetched, for formats only parse_hash understands.
+        sizes (dict[str, int]): File sizes from Fedora's "# name: N bytes" comments.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.sizes: dict[str, int] = {}
+        # name -> algorithm -> (digest, line)
+        self._index: dict[str, dict[str, tuple[str, str]]] = {}
+        # (name, algorithm, digest, line) in file order
+        self._entries: list[tuple[str, str, str, str]] = []
+        for line in text.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            match = _BSD_LINE.match(line)
+            if match:
+                algorithm, name, digest = match.group(1).lower().replace("-", ""), match.group(2), match.group(3)
+            elif (match := _GNU_LINE.match(line)) and len(match.group(1)) in _ALGORITHM_BY_LENGTH:
+                digest, name = match.group(1), match.group(2)
+                algorithm = _ALGORITHM_BY_LENGTH[len(digest)]
+            else:
+                size = _SIZE_LINE.match(line)
+                if size:
+                    self.sizes[_normalize_name(size.group(1))] = int(size.group(2))
+                continue
+            name, digest = _normalize_name(name), digest.lower()
+            self._entries.append((name, algorithm, digest, line))
+            for key in dict.fromkeys((name, name.rsplit("/", 1)[-1])):
+                self._index.setdefault(key, {}).setdefault(algorithm, (digest, line))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, name: str) -> bool:
+        return _normalize_name(name) in self._index
+
+    def names(self) -> list[str]:
+        """File names in the order they first appear."""
+        return list(dict.fromkeys(name for name, _, _, _ in self._entries))
+
+    def digest(self, name: str, hash_type: str | None = "sha256") -> str | None:
+        """Digest of name (full path or last component), lowercase; any algorithm if hash_type is None."""
+        by_algorithm = self._index.get(_normalize_name(name))
+        if not by_algorithm:
+            return None
+        entry = by_algorithm.get(hash_type.lower()) if hash_type else next(iter(by_algorithm.values()))
+        return entry[0] if entry else None
+
+    def find(self, match_strings: list[str], hash_type: str | None = "sha256") -> str | None:
+        """
+        Digest of the first entry whose line contains every match string (parse_hash semantics).
+
+        A match string naming a file exactly is answered from the index; other patterns fall
+        back to scanning the parsed entries.
+        """
+        hash_type = hash_type.lower() if hash_type else None
+        for candidate in match_strings:
+            by_algorithm = self._index.get(_normalize_name(candidate))
+            if not by_algorithm:
+                continue
+            entry = by_algorithm.get(hash_type) if hash_type else next(iter(by_algorithm.values()))
+            if entry and all(match in entry[1] for match in match_strings):
+                return entry[0]
+        for _, algorithm, digest, line in self._entries:
+            if (hash_type is None or algorithm == hash_type) and all(match in line for match in match_strings):
+                return digest
+        return None
+
+
+_manifests: dict[str, tuple[float, ChecksumManifest]] = {}
+_manifest_locks: dict[str, threading.Lock] = {}
+_manifests_lock = threading.Lock()
+
+
+def get_checksum_manifest(url: str, logging_callback) -> ChecksumManifest | None:
+    """
+    The checksum file at url, parsed; fetched at most once per MANIFEST_TTL however many
+    updaters (or threads) ask for it.
+
+    Returns:
+        ChecksumManifest | None: The manifest, or None if it couldn't be fetched.
+    """
+    with _manifests_lock:
+        url_lock = _manifest_locks.setdefault(url, threading.Lock())
+    with url_lock:
+        cached = _manifests.get(url)
+        if cached and time.monotonic() - cached[0] < MANIFEST_TTL:
+            return cached[1]
+        resp = robust_get(url, logging_callback, retries=10, delay=3)
+        if resp is None or resp.status_code != 200:
+            logging_callback(f"[get_checksum_manifest] Could not fetch checksum file {url}")
+            return None
+        manifest = ChecksumManifest(resp.text)
+        _manifests[url] = (time.monotonic(), manifest)
+        return manifest
@@ -0,0 +1,98 @@
+import threading
+import time
+from updaters.shared.host_throughput import host_of
+from updaters.shared.parse_duration import parse_duration
+from updaters.shared.settings import get_setting
+
+# Failures in a row (connection errors, timeouts, HOST_DOWN_STATUSES) before a host counts as down
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_COOLDOWN = 120.0
+# A host that keeps failing its probes is left alone at most this long between probes
+MAX_COOLDOWN = 1800.0
+HOST_DOWN_STATUSES = {502, 503, 504}
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker shared by every download and page fetch.
+
+    After threshold failures in a row, a host counts as down: allow() refuses every request to
+    it for cooldown seconds, so updaters on that host fail fast and their workers move on to
+    other hosts instead of each retrying a dead server. Then a single request is let through
+    as a probe; its success closes the circuit, its failure reopens it for twice as long (up to
+    MAX_COOLDOWN). Any answer other than HOST_DOWN_STATUSES counts as success: the host is up,
+    even if it doesn't have the file.
+    """
+
+    def __init__(self, threshold: int = DEFAULT_FAILURE_THRESHOLD, cooldown: float = DEFAULT_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        # host -> failures in a row, open until (monotonic), current cooldown, probe start or None
+        self._hosts: dict[str, dict] = {}
+
+    @classmethod
+    def from_settings(cls) -> "CircuitBreaker":
+        """Breaker with the host_failure_threshold (0 disables it) / host_down_cooldown settings."""
+        threshold = int(get_setting("host_failure_threshold", DEFAULT_FAILURE_THRESHOLD))
+        cooldown = parse_duration(get_setting("host_down_cooldown", DEFAULT_COOLDOWN)) or DEFAULT_COOLDOWN
+        return cls(threshold, cooldown)
+
+    def allow(self, url: str) -> bool:
+        """False while url's host is down; True for everything else, and for the one probe after a cooldown."""
+        if self.threshold <= 0:
+            return True
+        with self._lock:
+            state = self._hosts.get(host_of(url))
+            if state is None or state["failures"] < self.threshold:
+                return True
+            now = time.monotonic()
+            if now < state["open_until"]:
+                return False
+            # one probe at a time; a probe that never reported back is replaced after a cooldown
+            if state["probe"] is not None and now - state["probe"] < state["cooldown"]:
+                return False
+            state["probe"] = now
+            return True
+
+    def retry_in(self, url: str) -> float:
+        """Seconds until url's host gets its next probe (0 if it isn't down)."""
+        with self._lock:
+            state = self._hosts.get(host_of(url))
+            return max(0.0, state["open_until"] - time.monotonic()) if state else 0.0
+
+    def record_success(self, url: str, logging_callback=None):
+        with self._lock:
+            state = self._hosts.pop(host_of(url), None)
+        if state and state["failures"] >= self.threshold > 0 and logging_callback:
+            logging_callback(f"[CircuitBreaker] {host_of(url)} is back up")
+
+    def record_failure(self, url: str, logging_callback=None):
+        if self.threshold <= 0:
+            return
+        host = host_of(url)
+        with self._lock:
+            state = self._hosts.setdefault(host, {"failures": 0, "open_until": 0.0, "cooldown": self.cooldown, "probe": None})
+            state["failures"] += 1
+            if state["probe"] is not None:
+                state["probe"] = None
+                state["cooldown"] = min(MAX_COOLDOWN, state["cooldown"] * 2)
+            elif state["failures"] != self.threshold:
+                return
+            state["open_until"] = time.monotonic() + state["cooldown"]
+            cooldown = state["cooldown"]
+        if logging_callback:
+            logging_callback(f"[CircuitBreaker] {host} is down, failing its requests fast for {cooldown:.0f}s")
+
+
+_circuit_breaker: CircuitBreaker | None = None
+_circuit_breaker_lock = threading.Lock()
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """The process-wide CircuitBreaker (configured from the settings on first use)."""
+    global _circuit_breaker
+    with _circuit_breaker_lock:
+        if _circuit_breaker is None:
+            _circuit_breaker = CircuitBreaker.from_settings()
+        return _circuit_breaker
@@ -0,0 +1,303 @@
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from updaters.shared.drive_index import get_drive_index
+from updaters.shared.settings import get_setting
+from updaters.shared.sha256_hash_check import get_verified_digest, record_verified_digest
+from updaters.shared.verified_copy import file_digest, verified_copy
+
+INDEX_FILE_NAME = "index.json"
+# Linux FICLONE ioctl: share the data blocks of another file (btrfs, xfs, ...)
+_FICLONE = 0x40049409
+
+
+def _reflink(src: Path, dst: Path) -> bool:
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(src, "rb") as s, open(dst, "wb") as d:
+            fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+        return True
+    except OSError:
+        dst.unlink(missing_ok=True)
+        return False
+
+
+def _mount_root(path: Path) -> str:
+    """Mount point (or drive root) of the filesystem path is on."""
+    path = Path(path).resolve()
+    for parent in (path, *path.parents):
+        if os.path.ismount(parent):
+            return str(parent)
+    return path.anchor
+
+
+def _root_present(ref: dict, path: str) -> bool:
+    """
+    True if the drive a reference was placed on is attached: its recorded mount point is still
+    mounted. References recorded before mount points were (no "root") count as attached when
+    their folder exists.
+    """
+    root = ref.get("root")
+    if root is None:
+        return os.path.isdir(os.path.dirname(path))
+    # isdir too: on Windows, ismount() is True for the root of a drive letter nothing is on
+    return os.path.isdir(root) and os.path.ismount(root)
+
+
+def link_or_copy(src: Path, dst: Path, logging_callback) -> str | None:
+    """
+    Put the contents of src at dst as cheaply as the filesystems allow: a hardlink, a reflink,
+    or else a verified copy. dst is replaced atomically.
+
+    Returns:
+        str | None: "hardlink", "reflink" or "copy", None on failure.
+    """
+    src, dst = Path(src), Path(dst)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(dst.name + ".linking")
+    tmp.unlink(missing_ok=True)
+    try:
+        os.link(src, tmp)
+        method = "hardlink"
+    except OSError:
+        method = "reflink" if _reflink(src, tmp) else None
+    if method is None:
+        return "copy" if verified_copy(src, dst, logging_callback) else None
+    os.replace(tmp, dst)
+    get_drive_index().update(tmp, dst)
+    return method
+
+
+class ContentStore:
+    """
+    Local store of verified artifacts, addressed by digest ("sha256:<hex>").
+
+    Every destination a stored artifact was placed at (or adopted from) is recorded as a
+    reference, along with the mount point of its drive. gc() drops a reference when its drive
+    is attached and the file is missing or changed (references on unplugged drives are kept),
+    and placing a newer artifact of the same updater in that folder drops it right away; gc()
+    then deletes objects no reference is left for.
+    Download URLs are mapped to the object they produced, so another updater (or drive, or
+    config folder) asking for the same URL gets the stored copy instead of a new download.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # key -> {"size": int, "placements": {path: {"state_key", "size", "mtime"}}}
+        self._objects: dict[str, dict] = {}
+        self._urls: dict[str, str] = {}
+        self._index_mtime = None
+        self.refresh()
+
+    def refresh(self):
+        """Reload index.json if another process (e.g. a sisou2 run next to `--serve`) changed it."""
+        index_file = self.root / INDEX_FILE_NAME
+        try:
+            mtime = index_file.stat().st_mtime_ns
+        except OSError:
+            return
+        with self._lock:
+            if mtime == self._index_mtime:
+                return
+            try:
+                index = json.loads(index_file.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                return
+            self._objects = index.get("objects", {})
+            self._urls = index.get("urls", {})
+            self._index_mtime = mtime
+
+    def _save(self):
+        tmp = self.root / (INDEX_FILE_NAME + ".tmp")
+        try:
+            tmp.write_text(json.dumps({"objects": self._objects, "urls": self._urls}, indent=2, sort_keys=True), encoding="utf-8")
+            os.replace(tmp, self.root / INDEX_FILE_NAME)
+            self._index_mtime = (self.root / INDEX_FILE_NAME).stat().st_mtime_ns
+        except OSError:
+            pass
+
+    def url_index(self) -> dict[str, dict]:
+        """Download URL -> {"key", "size"} for every stored object (what a peer can serve)."""
+        with self._lock:
+            return {url: {"key": key, "size": self._objects[key]["size"]} for url, key in self._urls.items() if key in self._objects}
+
+    def object_path(self, key: str) -> Path:
+        hash_type, _, digest = key.partition(":")
+        return self.root / "objects" / hash_type / digest[:2] / digest
+
+    def lookup(self, url: str) -> str | None:
+        """Key of the stored object last downloaded from url, None if there is none."""
+        with self._lock:
+            key = self._urls.get(url)
+            size = self._objects.get(key, {}).get("size") if key else None
+        stored = get_drive_index().stat(self.object_path(key)) if key else None
+        return key if stored is not None and stored.size == size else None
+
+    def _add_placement(self, key: str, file: Path, state_key: str):
+        local = get_drive_index().update(file)
+        if local is None:
+            return
+        file = str(Path(file).resolve())
+        with self._lock:
+            # A newer artifact of the same updater in the same folder supersedes the older one
+            for other in self._objects.values():
+                for path, ref in list(other["placements"].items()):
+                    if path != file and ref.get("state_key") == state_key and Path(path).parent == Path(file).parent:
+                        del other["placements"][path]
+            self._objects[key]["placements"][file] = {
+                "state_key": state_key, "size": local.size, "mtime": local.mtime, "root": _mount_root(file),
+            }
+            self._save()
+
+    def place(self, key: str, dst: Path, state_key: str, logging_callback) -> bool:
+        """Put a stored object at dst (hardlink, reflink or copy) and reference it from there."""
+        obj = self.object_path(key)
+        method = link_or_copy(obj, dst, logging_callback)
+        if method is None:
+            return False
+        hash_type, _, digest = key.partition(":")
+        record_verified_digest(dst, hash_type, digest)
+        self._add_placement(key, dst, state_key)
+        logging_callback(f"[ContentStore] Placed {Path(dst).name} from the store ({method})")
+        return True
+
+    def _placement_of(self, file: Path) -> str | None:
+        """Key of the object file is an unchanged reference of, None if it isn't one."""
+        local = get_drive_index().stat(file)
+        if local is None:
+            return None
+        path = str(Path(file).resolve())
+        with self._lock:
+            for key, entry in self._objects.items():
+                ref = entry["placements"].get(path)
+                if ref is not None and (ref["size"], ref["mtime"]) == (local.size, local.mtime):
+                    return key
+        return None
+
+    def adopt(self, file: Path, url: str | None, state_key: str, logging_callback) -> str | None:
+        """
+        Take a freshly verified file into the store (hardlink, reflink or copy) and reference it.
+        Nothing is copied when file already is a reference of a stored object, or when an object
+        with its digest is stored already.
+
+        Returns:
+            str | None: The object's key, None if it couldn't be stored.
+        """
+        file = Path(file)
+        placed = self._placement_of(file)
+        if placed is not None:
+            # already in the store (e.g. it was placed from there): nothing to hash or copy
+            if url:
+                with self._lock:
+                    if self._urls.get(url) != placed:
+                        self._urls[url] = placed
+                        self._save()
+            return placed
+        verified = get_verified_digest(file)
+        key = f"{verified[0]}:{verified[1]}" if verified else f"sha256:{file_digest(file)}"
+        obj = self.object_path(key)
+        size = file.stat().st_size
+        stored = get_drive_index().stat(obj)
+        if stored is None or stored.size != size:
+            if link_or_copy(file, obj, logging_callback) is None:
+                logging_callback(f"[ContentStore] Could not store {file.name}")
+                return None
+        with self._lock:
+            self._objects.setdefault(key, {"size": size, "placements": {}})
+            if url:
+                self._urls[url] = key
+        self._add_placement(key, file, state_key)
+        return key
+
+    def unshare(self, file: Path, keep: bool = False):
+        """
+        Make sure writing to file can't change a stored object: if it is hardlinked to something,
+        unlink it (the object keeps the data), or with keep, replace it by a private copy.
+        """
+        try:
+            if os.stat(file).st_nlink <= 1:
+                return
+            if keep:
+                tmp = Path(file).with_name(Path(file).name + ".unsharing")
+                shutil.copyfile(file, tmp)
+                os.replace(tmp, file)
+            else:
+                os.unlink(file)
+            get_drive_index().update(file)
+        except OSError:
+            pass
+
+    def move_placement(self, old: Path, new: Path):
+        """Point the reference held by old (e.g. a staged file) at new, its copy on the drive."""
+        old = str(Path(old).resolve())
+        local = get_drive_index().update(new)
+        with self._lock:
+            for entry in self._objects.values():
+                ref = entry["placements"].pop(old, None)
+                if ref is not None and local is not None:
+                    entry["placements"][str(Path(new).resolve())] = dict(ref, size=local.size, mtime=local.mtime, root=_mount_root(new))
+            self._save()
+
+    def gc(self, logging_callback) -> int:
+        """
+        Drop references whose file is gone or was changed, then delete objects with no reference
+        left. A reference on a drive that isn't attached (or can't be read right now) is kept, so
+        unplugging a stick doesn't cost the store its objects.
+
+        Returns:
+            int: Bytes freed.
+        """
+        freed = 0
+        with self._lock:
+            for key, entry in list(self._objects.items()):
+                for path, ref in list(entry["placements"].items()):
+                    if not _root_present(ref, path):
+                        continue
+                    try:
+                        st = os.stat(path)
+                    except (FileNotFoundError, NotADirectoryError):
+                        del entry["placements"][path]
+                        continue
+                    except OSError:
+                        # e.g. an I/O error on a failing drive: not proof the file is gone
+                        continue
+                    if (st.st_size, st.st_mtime) != (ref["size"], ref["mtime"]):
+                        del entry["placements"][path]
+                if entry["placements"]:
+                    continue
+                obj = self.object_path(key)
+                try:
+                    freed += obj.stat().st_size
+                    obj.unlink()
+                except OSError:
+                    pass
+                get_drive_index().update(obj)
+                del self._objects[key]
+                for url in [url for url, mapped in self._urls.items() if mapped == key]:
+                    del self._urls[url]
+                logging_callback(f"[ContentStore] Removed unreferenced {key}")
+            self._save()
+        return freed
+
+
+_content_store: ContentStore | None = None
+_content_store_lock = threading.Lock()
+
+
+def get_content_store() -> ContentStore | None:
+    """The store in the store_dir setting (created on first use), None when the store is off."""
+    global _content_store
+    store_dir = get_setting("store_dir")
+    if not store_dir:
+        return None
+    with _content_store_lock:
+        if _content_store is None:
+            _content_store = ContentStore(Path(store_dir).expanduser().resolve())
+        return _content_store
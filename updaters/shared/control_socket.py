@@ -0,0 +1,52 @@
+import json
+import socket
+import socketserver
+import threading
+
+DEFAULT_CONTROL_PORT = 8714
+
+
+class ControlServer:
+    """
+    Line-based control socket for --daemon mode, bound to localhost only.
+
+    A client sends one command line (e.g. "status", "run", "run ArchLinux") and receives one
+    JSON line back. handler(command, args) -> dict does the actual work.
+    """
+
+    def __init__(self, handler, port: int = DEFAULT_CONTROL_PORT):
+        outer_handler = handler
+
+        class _Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                line = self.rfile.readline(4096).decode("utf-8", errors="replace").split()
+                if not line:
+                    return
+                try:
+                    reply = outer_handler(line[0].lower(), line[1:])
+                except Exception as e:
+                    reply = {"ok": False, "error": str(e)}
+                self.wfile.write((json.dumps(reply) + "\n").encode("utf-8"))
+
+        class _Server(socketserver.ThreadingTCPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+
+        self._server = _Server(("127.0.0.1", port), _Handler)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def send_control_command(command: str, port: int = DEFAULT_CONTROL_PORT, timeout: float = 10.0) -> dict:
+    """Send one command to a running daemon and return its JSON reply."""
+    with socket.create_connection(("127.0.0.1", port), timeout=timeout) as sock:
+        sock.sendall((command.strip() + "\n").encode("utf-8"))
+        with sock.makefile("rb") as f:
+            return json.loads(f.readline().decode("utf-8"))
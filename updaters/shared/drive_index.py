@@ -0,0 +1,126 @@
+import fnmatch
+import os
+from stat import S_ISREG
+import threading
+from pathlib import Path
+from typing import NamedTuple
+
+
+class IndexedFile(NamedTuple):
+    name: str
+    size: int
+    mtime: float
+    inode: int
+
+
+def _entry_from_stat(name: str, st: os.stat_result) -> IndexedFile:
+    return IndexedFile(name, st.st_size, st.st_mtime, st.st_ino)
+
+
+class DriveIndex:
+    """
+    In-memory listing of the directories sisou2 works in, shared by every updater.
+
+    Each directory is read with a single os.scandir the first time it is needed, instead of a
+    glob or a few exists() calls per lookup (slow on exFAT USB sticks). Code that creates,
+    renames or deletes files reports it through update(), so the index stays accurate for the
+    rest of the run. Lookups of a name that isn't indexed still fall back to one stat, so a
+    file created behind the index's back is never reported missing.
+
+    Files deleted or rewritten in place by anything else keep their indexed stat until the
+    directory is scanned again: for a single run that is the whole run, the daemon calls
+    invalidate() at the start of every pass. Checks that skip hashing because a file is
+    unchanged (the state database's size/mtime) use stat(fresh=True), which always re-stats.
+    """
+
+    def __init__(self):
+        self._dirs: dict[Path, dict[str, IndexedFile]] = {}
+        self._lock = threading.Lock()
+
+    def _scan(self, folder: Path) -> dict[str, IndexedFile]:
+        entries: dict[str, IndexedFile] = {}
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    try:
+                        if entry.is_file():
+                            entries[entry.name] = _entry_from_stat(entry.name, entry.stat())
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        return entries
+
+    def listdir(self, folder: Path) -> dict[str, IndexedFile]:
+        """Files in folder keyed by name (scanned on first use)."""
+        folder = Path(folder)
+        with self._lock:
+            entries = self._dirs.get(folder)
+            if entries is None:
+                entries = self._dirs[folder] = self._scan(folder)
+            return dict(entries)
+
+    def find(self, folder: Path, pattern: str) -> list[Path]:
+        """Files in folder whose name matches a glob-style pattern, like glob.glob(folder / pattern)."""
+        folder = Path(folder)
+        include_hidden = pattern.startswith(".")
+        return [
+            folder / name
+            for name in self.listdir(folder)
+            if (include_hidden or not name.startswith(".")) and fnmatch.fnmatch(name, pattern)
+        ]
+
+    def stat(self, path: Path, fresh: bool = False) -> IndexedFile | None:
+        """Indexed size/mtime/inode of a file, None if it doesn't exist; with fresh, stat it now (and re-index it)."""
+        path = Path(path)
+        if fresh:
+            return self.update(path)
+        entry = self.listdir(path.parent).get(path.name)
+        if entry is None:
+            # Not indexed: created behind our back, or really missing
+            entry = self.update(path)
+        return entry
+
+    def exists(self, path: Path) -> bool:
+        return self.stat(path) is not None
+
+    def update(self, *paths: Path) -> IndexedFile | None:
+        """
+        Re-stat files after they were created, renamed or deleted, and record the result.
+
+        Returns:
+            IndexedFile | None: The entry of the last path, None if it no longer exists.
+        """
+        entry = None
+        for path in paths:
+            path = Path(path)
+            try:
+                st = os.stat(path)
+                entry = _entry_from_stat(path.name, st) if S_ISREG(st.st_mode) else None
+            except OSError:
+                entry = None
+            with self._lock:
+                entries = self._dirs.get(path.parent)
+                if entries is None:
+                    continue
+                if entry is None:
+                    entries.pop(path.name, None)
+                else:
+                    entries[path.name] = entry
+        return entry
+
+    def invalidate(self, folder: Path | None = None):
+        """Forget one directory (or everything), so it is scanned again on next use."""
+        with self._lock:
+            if folder is None:
+                self._dirs.clear()
+            else:
+                self._dirs.pop(Path(folder), None)
+
+
+_drive_index = DriveIndex()
+
+
+def get_drive_index() -> DriveIndex:
+    """The process-wide DriveIndex."""
+    return _drive_index
@@ -0,0 +1,144 @@
+from functools import cache
+from html.parser import HTMLParser
+from typing import NamedTuple
+
+
+class Link(NamedTuple):
+    href: str
+    text: str
+
+
+class PageLinks:
+    """
+    The <a href> links of one HTML page, extracted once (see extract_links).
+
+    Links keep their document order; by_name() looks a link up by the last path component
+    of its href (what a directory listing shows) without scanning the list.
+    """
+
+    def __init__(self, links: list[Link]):
+        self.links = links
+        self._by_name: dict[str, Link] = {}
+        for link in links:
+            self._by_name.setdefault(link.href.split("?", 1)[0].rstrip("/").rsplit("/", 1)[-1], link)
+
+    def __iter__(self):
+        return iter(self.links)
+
+    def __len__(self) -> int:
+        return len(self.links)
+
+    @property
+    def hrefs(self) -> list[str]:
+        return [link.href for link in self.links]
+
+    def by_name(self, name: str) -> Link | None:
+        """The first link whose href ends in the path component name (e.g. "SHA256SUMS" or "12.5.0/")."""
+        return self._by_name.get(name.rstrip("/"))
+
+    def containing(self, *substrings: str) -> list[Link]:
+        """Links whose href contains every substring, in document order."""
+        return [link for link in self.links if all(s in link.href for s in substrings)]
+
+
+class _StopParsing(Exception):
+    pass
+
+
+class _LinkParser(HTMLParser):
+    """Tokenizer that only looks at <a> tags (and, with container_id, at the element holding them)."""
+
+    def __init__(self, container_id: str | None):
+        super().__init__(convert_charrefs=True)
+        self.links: list[Link] = []
+        self._container_id = container_id
+        # tag of the container and how deep inside it we are (0: not entered yet)
+        self._container_tag: str | None = None
+        self._depth = 0
+        self._href: str | None = None
+        self._text: list[str] = []
+
+    def _collecting(self) -> bool:
+        return self._container_id is None or self._depth > 0
+
+    def handle_starttag(self, tag, attrs):
+        if self._container_id is not None:
+            if self._depth == 0:
+                if dict(attrs).get("id") == self._container_id:
+                    self._container_tag, self._depth = tag, 1
+                return
+            if tag == self._container_tag:
+                self._depth += 1
+        if tag == "a" and self._collecting():
+            self._end_link()
+            href = dict(attrs).get("href")
+            if href:
+                self._href, self._text = href, []
+
+    def handle_endtag(self, tag):
+        if tag == "a":
+            self._end_link()
+        if self._depth and tag == self._container_tag:
+            self._depth -= 1
+            if self._depth == 0:
+                self._end_link()
+                raise _StopParsing
+
+    def handle_data(self, data):
+        if self._href is not None:
+            self._text.append(data)
+
+    def _end_link(self):
+        if self._href is not None:
+            self.links.append(Link(self._href, "".join(self._text).strip()))
+            self._href = None
+
+
+@cache
+def _lxml_html():
+    """lxml.html if it is installed (optional, only faster), else None."""
+    try:
+        import lxml.html
+    except ImportError:
+        return None
+    return lxml.html
+
+
+def _extract_with_lxml(lxml_html, html: str, container_id: str | None) -> list[Link]:
+    document = lxml_html.document_fromstring(html)
+    if container_id is not None:
+        matches = document.xpath("//*[@id=$id]", id=container_id)
+        if not matches:
+            return []
+        document = matches[0]
+    return [Link(a.get("href"), a.text_content().strip()) for a in document.iter("a") if a.get("href")]
+
+
+def extract_links(html: str | bytes, container_id: str | None = None) -> PageLinks:
+    """
+    Extract every <a href> of a page in one pass, without building a BeautifulSoup tree.
+
+    Uses lxml when it is installed and a streaming html.parser tokenizer otherwise; both give
+    the hrefs as written (entities decoded) and the text of each link.
+
+    Args:
+        html (str | bytes): The page; bytes are decoded as UTF-8.
+        container_id (str | None): Only links inside the element with this id (e.g. Debian's
+            "indexlist" table).
+
+    Returns:
+        PageLinks: The links, in document order.
+    """
+    if isinstance(html, bytes):
+        html = html.decode("utf-8", errors="replace")
+    lxml_html = _lxml_html()
+    if lxml_html is not None and html.strip():
+        return PageLinks(_extract_with_lxml(lxml_html, html, container_id))
+    parser = _LinkParser(container_id)
+    try:
+        parser.feed(html)
+        parser.close()
+    except _StopParsing:
+        pass
+    parser._end_link()
+    return PageLinks(parser.links)
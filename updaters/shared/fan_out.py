@@ -0,0 +1,118 @@
+import concurrent.futures
+import threading
+from pathlib import Path
+from updaters.shared.drive_index import get_drive_index
+from updaters.shared.resolve_file_case import resolve_file_case
+from updaters.shared.settings import get_setting
+from updaters.shared.sha256_hash_check import get_verified_digest, hash_check
+from updaters.shared.state_db import STATE_FILE_NAME, StateDB, get_state_db
+from updaters.shared.verified_copy import file_digest, verified_copy
+
+
+class FanOut:
+    """
+    Copies verified files from the primary Ventoy drive to any number of further drives.
+
+    Every target has its own writer thread, so a slow stick only delays its own copies. A target
+    that already holds the file (same digest, per its own state database or a hash of its copy)
+    is skipped. Each target keeps its own .sisou2_state.json.
+    """
+
+    def __init__(self, primary_root: Path, targets: list[Path], logging_callback):
+        self.primary_root = Path(primary_root)
+        self.logging_callback = logging_callback
+        self._targets = []
+        for number, root in enumerate(targets, 1):
+            db = StateDB(Path(root) / STATE_FILE_NAME) if get_setting("state_db", True) else None
+            writer = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"sisou2-target{number}")
+            self._targets.append((Path(root), db, writer))
+        self._futures: list[concurrent.futures.Future] = []
+        # source -> its digest, computed by whichever writer needed it first
+        self._digests: dict[Path, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+        # target root -> state key -> outcome
+        self.outcomes: dict[Path, dict[str, str]] = {root: {} for root, _, _ in self._targets}
+
+    def _source_digest(self, source: Path, key: str) -> tuple[str, str]:
+        """
+        (hash_type, digest) of a primary file: the one verified this run, else the one the
+        primary state database recorded if the file hasn't changed since, else hashed once
+        (outside the shared lock, so writers of other files don't wait for it).
+        """
+        verified = get_verified_digest(source)
+        if verified:
+            return verified
+        primary_db = get_state_db()
+        record = primary_db.get(key) if primary_db else None
+        if record and record.get("verified_digest") and record.get("local_file") == primary_db.relative(source):
+            local = get_drive_index().stat(source, fresh=True)
+            if local and (local.size, local.mtime) == (record.get("local_size"), record.get("local_mtime")):
+                return record.get("digest_type") or "sha256", record["verified_digest"]
+        with self._lock:
+            future = self._digests.get(source)
+            hashing = future is None
+            if hashing:
+                future = self._digests[source] = concurrent.futures.Future()
+        if hashing:
+            try:
+                future.set_result(("sha256", file_digest(source)))
+            except Exception as e:
+                future.set_exception(e)
+        return future.result()
+
+    def submit(self, updater):
+        """Queue the updater's current file for every target."""
+        try:
+            source = resolve_file_case(updater._get_complete_normalized_file_path(absolute=True))
+        except Exception:
+            source = None
+        key = updater._state_key()
+        if not source:
+            self.logging_callback(f"[FanOut] {key}: no file on the primary drive, nothing to copy")
+            return
+        for root, db, writer in self._targets:
+            self._futures.append(writer.submit(self._replicate, root, db, key, Path(source)))
+
+    def _replicate(self, root: Path, db: StateDB | None, key: str, source: Path):
+        log = lambda msg: self.logging_callback(f"[FanOut] [{root}] {msg}")
+        try:
+            dst = root / source.relative_to(self.primary_root)
+            hash_type, digest = self._source_digest(source, key)
+            record = db.get(key) if db else None
+            local = get_drive_index().stat(dst, fresh=True)
+            if record and local and record.get("verified_digest") == digest and (local.size, local.mtime) == (record.get("local_size"), record.get("local_mtime")):
+                outcome = "up to date"
+            elif local and local.size == source.stat().st_size and hash_check(dst, digest, log, hash_type=hash_type):
+                outcome = "up to date"
+            elif verified_copy(source, dst, log):
+                outcome = "copied"
+            else:
+                outcome = "copy failed"
+            if db:
+                local = get_drive_index().update(dst) if outcome != "copy failed" else None
+                if local is None:
+                    db.remove(key)
+                else:
+                    primary_db = get_state_db()
+                    record = dict(primary_db.get(key) or {}) if primary_db else {}
+                    record.update({
+                        "digest_type": hash_type,
+                        "verified_digest": digest,
+                        "local_file": db.relative(dst),
+                        "local_size": local.size,
+                        "local_mtime": local.mtime,
+                    })
+                    db.put(key, record)
+        except Exception as e:
+            log(f"{key}: {e}")
+            outcome = "copy failed"
+        log(f"{key}: {outcome}")
+        with self._lock:
+            self.outcomes[root][key] = outcome
+
+    def wait(self) -> dict[Path, dict[str, str]]:
+        """Wait for every queued copy and return the outcome per target and updater."""
+        concurrent.futures.wait(self._futures)
+        for _, _, writer in self._targets:
+            writer.shutdown(wait=True)
+        return self.outcomes
@@ -1,7 +1,7 @@
 from updaters.shared.robust_get import robust_get
-from bs4 import BeautifulSoup
 def fetch_windows_iso_hash(language_label_x64: str, url: str, headers, logging_callback) -> str | None:
     import time
+    from bs4 import BeautifulSoup
     max_retries = 5
     for attempt in range(1, max_retries + 1):
         resp = robust_get(url, retries=3, delay=1, headers=headers, logging_callback=logging_callback)
@@ -0,0 +1,33 @@
+import hashlib
+from pathlib import Path
+from updaters.shared.block_manifest import BlockManifest
+
+
+def find_corrupt_blocks(file: Path, manifest: BlockManifest, logging_callback) -> list[int] | None:
+    """
+    Hash a local file block by block and compare against a BlockManifest.
+
+    Blocks past the end of a truncated file are reported as corrupt.
+
+    Returns:
+        list[int]: Indexes of the blocks that don't match, or None if the file can't be read.
+    """
+    try:
+        h_factory = getattr(hashlib, manifest.hash_type)
+    except AttributeError:
+        logging_callback(f"[find_corrupt_blocks] Unsupported hash type: {manifest.hash_type}")
+        return None
+    corrupt: list[int] = []
+    try:
+        with open(file, "rb") as f:
+            for index, expected in enumerate(manifest.digests):
+                start, end = manifest.block_range(index)
+                f.seek(start)
+                data = f.read(end - start)
+                if len(data) != end - start or h_factory(data).hexdigest() != expected:
+                    corrupt.append(index)
+    except OSError as e:
+        logging_callback(f"[find_corrupt_blocks] Could not read {file}: {e}")
+        return None
+    logging_callback(f"[find_corrupt_blocks] {len(corrupt)}/{len(manifest)} blocks corrupt in {file}")
+    return corrupt
@@ -0,0 +1,53 @@
+import json
+import threading
+from urllib.parse import urlparse
+from updaters.shared.cache_dir import get_cache_dir
+
+# Weight of the newest sample in the running average, so one slow evening doesn't erase the history
+NEW_SAMPLE_WEIGHT = 0.3
+# Transfers shorter than this say more about latency than throughput
+MIN_SAMPLE_BYTES = 4 * 1024 * 1024
+
+_history_lock = threading.Lock()
+_history: dict[str, float] | None = None
+
+
+def _history_file():
+    return get_cache_dir() / "host_throughput.json"
+
+
+def _load_history() -> dict[str, float]:
+    global _history
+    if _history is None:
+        try:
+            _history = {host: float(speed) for host, speed in json.loads(_history_file().read_text(encoding="utf-8")).items()}
+        except (OSError, ValueError, AttributeError):
+            _history = {}
+    return _history
+
+
+def host_of(url: str) -> str:
+    """Host name of a URL, lowercase ('' if it has none)."""
+    return (urlparse(url).hostname or "").lower()
+
+
+def record_throughput(url: str, nbytes: int, seconds: float):
+    """Fold one finished transfer from url's host into its average throughput (bytes/s)."""
+    if nbytes < MIN_SAMPLE_BYTES or seconds <= 0:
+        return
+    host = host_of(url)
+    speed = nbytes / seconds
+    with _history_lock:
+        history = _load_history()
+        previous = history.get(host)
+        history[host] = speed if previous is None else previous + NEW_SAMPLE_WEIGHT * (speed - previous)
+        try:
+            _history_file().write_text(json.dumps(history, indent=2, sort_keys=True), encoding="utf-8")
+        except OSError:
+            pass
+
+
+def get_host_throughput(url: str) -> float | None:
+    """Average throughput (bytes/s) seen from url's host in earlier downloads, None if never measured."""
+    with _history_lock:
+        return _load_history().get(host_of(url))
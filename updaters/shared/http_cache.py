@@ -0,0 +1,316 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from updaters.shared.parse_byte_range import parse_byte_range
+from updaters.shared.settings import get_setting
+
+DEFAULT_HTTP_CACHE_MB = 20 * 1024
+# An entry confirmed by upstream this recently is served without asking again (segmented
+# downloads send one Range request per segment)
+REVALIDATE_AFTER = 60.0
+CACHE_HEADER = "X-Sisou2-Cache"
+# Describe the bytes on the wire, not the decoded body we store
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive", "content-range"}
+
+
+class _FileSlice:
+    """Read-only view of count bytes of a file from offset, as the body of a cached response."""
+
+    def __init__(self, path: Path, offset: int, count: int):
+        self._f = open(path, "rb")
+        self._f.seek(offset)
+        self._left = count
+        self.closed = False
+
+    def read(self, amt: int | None = None) -> bytes:
+        if self.closed or self._left <= 0:
+            return b""
+        data = self._f.read(self._left if amt is None or amt < 0 else min(amt, self._left))
+        self._left -= len(data)
+        return data
+
+    def close(self):
+        if not self.closed:
+            self._f.close()
+            self.closed = True
+
+
+class _TeeResponse:
+    """
+    Wraps a urllib3 response so whatever requests streams out of it is also written to the
+    cache. The entry is only committed if the body was read to the end.
+    """
+
+    def __init__(self, raw, on_complete, on_abort, tmp_path: Path):
+        self._raw = raw
+        self._on_complete = on_complete
+        self._on_abort = on_abort
+        self._file = open(tmp_path, "wb")
+        self._done = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def _finish(self, complete: bool):
+        if self._done:
+            return
+        self._done = True
+        self._file.close()
+        (self._on_complete if complete else self._on_abort)()
+
+    def stream(self, amt: int = 65536, decode_content: bool | None = None):
+        try:
+            for chunk in self._raw.stream(amt, decode_content=decode_content):
+                self._file.write(chunk)
+                yield chunk
+        except BaseException:
+            self._finish(False)
+            raise
+        self._finish(True)
+
+    def read(self, amt: int | None = None, decode_content: bool | None = None, **kwargs):
+        data = self._raw.read(amt, decode_content=decode_content, **kwargs)
+        self._file.write(data)
+        if not data or amt is None:
+            self._finish(True)
+        return data
+
+    def close(self):
+        self._finish(False)
+        self._raw.close()
+
+    def release_conn(self):
+        self._finish(False)
+        self._raw.release_conn()
+
+
+class HttpCache:
+    """
+    Disk cache for upstream responses (pages, checksum files, whole ISOs).
+
+    Entries are keyed by URL and keep the upstream validators (ETag, Last-Modified). A cached
+    entry is revalidated with a conditional request (at most every REVALIDATE_AFTER seconds);
+    a 304 serves it from disk, including Range requests as 206 slices, and when upstream is
+    unreachable the cached copy is served as is. A Range request for an entry that changed
+    upstream drops it and goes upstream as is. Only complete 200 GET bodies are stored, streamed
+    to a temporary file as the caller reads them.
+    The least recently used entries are evicted beyond max_bytes.
+    """
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # key -> metadata: url, status, headers, size, last_used, validated_at
+        self._entries: dict[str, dict] = {}
+        for meta_file in self.root.glob("*.json"):
+            try:
+                meta = json.loads(meta_file.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            if (self.root / (meta_file.stem + ".body")).is_file():
+                self._entries[meta_file.stem] = meta
+
+    @staticmethod
+    def key(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _body(self, key: str) -> Path:
+        return self.root / (key + ".body")
+
+    def _write_meta(self, key: str, meta: dict):
+        tmp = self.root / (key + ".json.tmp")
+        try:
+            tmp.write_text(json.dumps(meta), encoding="utf-8")
+            os.replace(tmp, self.root / (key + ".json"))
+        except OSError:
+            pass
+
+    def get(self, url: str) -> dict | None:
+        with self._lock:
+            meta = self._entries.get(self.key(url))
+            return dict(meta) if meta else None
+
+    def touch(self, url: str, validated: bool = False):
+        """Mark an entry as just used (and just confirmed by upstream)."""
+        key = self.key(url)
+        with self._lock:
+            meta = self._entries.get(key)
+            if meta is None:
+                return
+            meta["last_used"] = time.time()
+            if validated:
+                meta["validated_at"] = meta["last_used"]
+            self._write_meta(key, meta)
+
+    def drop(self, url: str):
+        """Forget the entry for url (e.g. once upstream has changed it)."""
+        key = self.key(url)
+        with self._lock:
+            if self._entries.pop(key, None) is None:
+                return
+            for path in (self._body(key), self.root / (key + ".json")):
+                path.unlink(missing_ok=True)
+
+    def is_fresh(self, meta: dict) -> bool:
+        return time.time() - meta.get("validated_at", 0) < REVALIDATE_AFTER
+
+    def open_body(self, url: str, byte_range: tuple[int, int] | None) -> _FileSlice:
+        meta = self.get(url)
+        first, last = byte_range if byte_range else (0, meta["size"] - 1)
+        return _FileSlice(self._body(self.key(url)), first, last - first + 1)
+
+    def begin(self, url: str, status: int, headers: dict) -> tuple[Path, callable, callable]:
+        """Temporary body file plus commit/abort callbacks for a response being stored."""
+        key = self.key(url)
+        tmp = self.root / f"{key}.{threading.get_ident()}.tmp"
+        # stored lowercase, so lookups don't depend on how upstream spelled them
+        headers = {name.lower(): value for name, value in headers.items()}
+        kept = {name: value for name, value in headers.items() if name not in _DROPPED_HEADERS}
+
+        def commit():
+            try:
+                size = tmp.stat().st_size
+                expected = headers.get("content-length") if "content-encoding" not in headers else None
+                if expected is not None and int(expected) != size:
+                    raise OSError(f"short body {size}/{expected}")
+                os.replace(tmp, self._body(key))
+            except (OSError, ValueError):
+                tmp.unlink(missing_ok=True)
+                return
+            now = time.time()
+            meta = {"url": url, "status": status, "headers": kept, "size": size, "last_used": now, "validated_at": now}
+            with self._lock:
+                self._entries[key] = meta
+                self._write_meta(key, meta)
+            self.evict()
+
+        def abort():
+            tmp.unlink(missing_ok=True)
+
+        return tmp, commit, abort
+
+    def evict(self) -> int:
+        """Remove least recently used entries until the cache fits max_bytes. Returns bytes freed."""
+        freed = 0
+        with self._lock:
+            total = sum(meta["size"] for meta in self._entries.values())
+            for key, meta in sorted(self._entries.items(), key=lambda item: item[1].get("last_used", 0)):
+                if total <= self.max_bytes:
+                    break
+                for path in (self._body(key), self.root / (key + ".json")):
+                    path.unlink(missing_ok=True)
+                total -= meta["size"]
+                freed += meta["size"]
+                del self._entries[key]
+        return freed
+
+
+def make_caching_adapter(cache: HttpCache):
+    """requests transport adapter that answers GET/HEAD from cache (see HttpCache) and fills it."""
+    from requests.adapters import HTTPAdapter
+    from requests.exceptions import ConnectionError, Timeout
+    from urllib3 import HTTPResponse
+
+    class CachingAdapter(HTTPAdapter):
+        def _from_cache(self, request, meta: dict, byte_range: tuple[int, int] | None):
+            headers = dict(meta["headers"])
+            headers[CACHE_HEADER] = "hit"
+            headers["Accept-Ranges"] = "bytes"
+            if request.method == "HEAD":
+                headers["Content-Length"] = str(meta["size"])
+                body, status = cache.open_body(request.url, (0, -1)), meta["status"]
+            else:
+                body = cache.open_body(request.url, byte_range)
+                status = 206 if byte_range else meta["status"]
+                first, last = byte_range if byte_range else (0, meta["size"] - 1)
+                headers["Content-Length"] = str(last - first + 1)
+                if byte_range:
+                    headers["Content-Range"] = f"bytes {first}-{last}/{meta['size']}"
+            cache.touch(request.url)
+            raw = HTTPResponse(body=body, headers=headers, status=status, preload_content=False, decode_content=False, request_method=request.method)
+            return self.build_response(request, raw)
+
+        def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+            headers = request.headers
+            cacheable = (
+                request.method in ("GET", "HEAD")
+                and "Authorization" not in headers
+                and "If-None-Match" not in headers
+                and "If-Modified-Since" not in headers
+            )
+            if not cacheable:
+                return super().send(request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+
+            meta = cache.get(request.url)
+            wanted_range = headers.get("Range")
+            byte_range = parse_byte_range(wanted_range, meta["size"]) if meta and wanted_range else None
+            if meta and wanted_range and byte_range is None:
+                # Multi-range or unsatisfiable: let upstream answer
+                meta = None
+            if meta and cache.is_fresh(meta):
+                return self._from_cache(request, meta, byte_range)
+
+            if meta:
+                # Revalidate: same request without Range, made conditional on our copy
+                conditional = request.copy()
+                conditional.headers.pop("Range", None)
+                if meta["headers"].get("etag"):
+                    conditional.headers["If-None-Match"] = meta["headers"]["etag"]
+                if meta["headers"].get("last-modified"):
+                    conditional.headers["If-Modified-Since"] = meta["headers"]["last-modified"]
+                try:
+                    response = super().send(conditional, stream=True, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+                except (ConnectionError, Timeout):
+                    # Upstream unreachable: the copy we have is the best answer there is
+                    return self._from_cache(request, meta, byte_range)
+                if response.status_code == 304:
+                    response.close()
+                    cache.touch(request.url, validated=True)
+                    return self._from_cache(request, meta, byte_range)
+                if request.method == "GET" and response.status_code == 200 and not wanted_range:
+                    # Changed upstream: hand out (and store) the new body
+                    return self._store(request.url, response)
+                if response.status_code == 200:
+                    # Changed upstream, but the caller wants a Range of it: our copy is stale, so
+                    # drop it and pass the Range on (a full body here would make a segmented
+                    # download give up on the source)
+                    cache.drop(request.url)
+                response.close()
+                return super().send(request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+
+            # Session.send reads the body itself when the caller didn't ask to stream
+            response = super().send(request, stream=True, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+            if request.method == "GET" and not wanted_range and response.status_code == 200:
+                return self._store(request.url, response)
+            return response
+
+        def _store(self, url: str, response):
+            if "no-store" in response.headers.get("Cache-Control", "").lower():
+                return response
+            tmp, commit, abort = cache.begin(url, response.status_code, dict(response.headers))
+            response.raw = _TeeResponse(response.raw, commit, abort, tmp)
+            return response
+
+    return CachingAdapter()
+
+
+_http_cache: HttpCache | None = None
+_http_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> HttpCache | None:
+    """The cache in the http_cache_dir setting (created on first use), None when caching is off."""
+    global _http_cache
+    cache_dir = get_setting("http_cache_dir")
+    if not cache_dir:
+        return None
+    with _http_cache_lock:
+        if _http_cache is None:
+            max_bytes = int(get_setting("http_cache_mb", DEFAULT_HTTP_CACHE_MB)) * 1024 * 1024
+            _http_cache = HttpCache(Path(cache_dir).expanduser().resolve(), max_bytes)
+        return _http_cache
@@ -0,0 +1,26 @@
+import threading
+from updaters.shared.http_cache import get_http_cache, make_caching_adapter
+
+_local = threading.local()
+
+
+def get_session():
+    """
+    requests.Session for the calling thread.
+
+    Reusing one session per thread keeps TCP/TLS connections to each host alive between
+    requests instead of reconnecting for every page, hash file and download; in --daemon mode
+    the pool stays warm across runs. Sessions aren't shared between threads because
+    requests.Session isn't guaranteed to be thread-safe. With http_cache_dir set, every
+    session goes through the shared disk cache (see HttpCache).
+    """
+    session = getattr(_local, "session", None)
+    if session is None:
+        import requests
+        session = _local.session = requests.Session()
+        cache = get_http_cache()
+        if cache is not None:
+            adapter = make_caching_adapter(cache)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+    return session
@@ -0,0 +1,325 @@
+import atexit
+import json
+import logging
+import queue
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import NamedTuple
+
+# Progress events of one (updater, phase) reach the console at most this often
+DEFAULT_PROGRESS_INTERVAL = 5.0
+# How often the writer thread wakes up without events (to release held-back progress)
+_TICK = 0.5
+_ANSI = re.compile(r"\033\[[0-9;]*m")
+_context = threading.local()
+
+
+class LogMessage(str):
+    """
+    A log line with structured fields attached.
+
+    It is a str, so it can go through any logging_callback (print, a lambda, an updater's
+    logging_callback) unchanged; LogPipeline.emit picks the fields up again.
+
+    Attributes:
+        fields (dict): Any of updater, phase, bytes, elapsed, and progress=True for progress
+            reports (which the console only shows every progress_interval seconds).
+    """
+
+    fields: dict
+
+    def __new__(cls, text: str, **fields):
+        message = super().__new__(cls, text)
+        message.fields = fields
+        return message
+
+
+def progress_message(text: str, phase: str, bytes_done: int, elapsed: float | None = None, **fields) -> LogMessage:
+    """A progress report ("Hashing: 500 MB hashed...") of bytes_done bytes after elapsed seconds."""
+    return LogMessage(text, phase=phase, bytes=bytes_done, elapsed=elapsed, progress=True, **fields)
+
+
+@contextmanager
+def log_context(**fields):
+    """Attach fields (e.g. phase="download") to every event this thread emits inside the block."""
+    previous = getattr(_context, "fields", {})
+    _context.fields = {**previous, **fields}
+    try:
+        yield
+    finally:
+        _context.fields = previous
+
+
+class LogEvent(NamedTuple):
+    time: float
+    message: str
+    updater: str | None = None
+    phase: str | None = None
+    bytes: int | None = None
+    elapsed: float | None = None
+    progress: bool = False
+
+    @property
+    def plain_message(self) -> str:
+        """message without ANSI colors."""
+        return _ANSI.sub("", self.message)
+
+
+class LogSink:
+    """Destination of log events. All methods run on the pipeline's writer thread only."""
+
+    def write(self, event: LogEvent):
+        raise NotImplementedError
+
+    def flush(self):
+        """Called whenever the queue has been drained."""
+
+    def tick(self, now: float):
+        """Called at least every half second, events or not."""
+
+    def close(self):
+        self.flush()
+
+
+class ConsoleSink(LogSink):
+    """Messages on stdout, colored as logged (color=False strips the ANSI colors)."""
+
+    def __init__(self, stream=None, color: bool = True):
+        self.stream = stream or sys.stdout
+        self.color = color
+
+    def write(self, event: LogEvent):
+        self.stream.write((event.message if self.color else event.plain_message) + "\n")
+
+    def flush(self):
+        self.stream.flush()
+
+
+class JsonLinesSink(LogSink):
+    """One JSON object per event (time, updater, phase, bytes, elapsed, message) appended to a file."""
+
+    def __init__(self, path: Path):
+        path = Path(path).expanduser()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, event: LogEvent):
+        record = {"time": round(event.time, 3), "message": event.plain_message}
+        for key in ("updater", "phase", "bytes", "elapsed", "progress"):
+            value = getattr(event, key)
+            if value is not None and value is not False:
+                record[key] = _ANSI.sub("", value) if isinstance(value, str) else value
+        self._file.write(json.dumps(record) + "\n")
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class ProgressAggregator(LogSink):
+    """
+    Rate limit for progress events in front of another sink.
+
+    Other events pass straight through. Progress events are coalesced per (updater, phase):
+    the first one passes, later ones within interval seconds only replace the pending one,
+    which goes out when the interval is over; whatever is pending when the (updater, phase)
+    logs anything else is dropped, as that message supersedes it.
+    """
+
+    def __init__(self, sink: LogSink, interval: float = DEFAULT_PROGRESS_INTERVAL):
+        self.sink = sink
+        self.interval = interval
+        # (updater, phase) -> time last forwarded, latest held-back event or None
+        self._progress: dict[tuple, list] = {}
+
+    def write(self, event: LogEvent):
+        key = (event.updater, event.phase)
+        if not event.progress:
+            self._progress.pop(key, None)
+            self.sink.write(event)
+            return
+        state = self._progress.get(key)
+        if state is None or event.time - state[0] >= self.interval:
+            self._progress[key] = [event.time, None]
+            self.sink.write(event)
+        else:
+            state[1] = event
+
+    def tick(self, now: float):
+        for state in self._progress.values():
+            if state[1] is not None and now - state[0] >= self.interval:
+                self.sink.write(state[1])
+                state[:] = [now, None]
+        self.sink.tick(now)
+
+    def flush(self):
+        self.sink.flush()
+
+    def close(self):
+        self.sink.close()
+
+
+_STOP = object()
+
+
+class LogPipeline:
+    """
+    Asynchronous log pipeline: producers only enqueue, one writer thread feeds the sinks.
+
+    emit() never blocks on output (a slow terminal or file delays the writer, not the download
+    or hash loop that logged), and since every event goes through the one thread, lines never
+    interleave. Events keep the order in which they were emitted.
+    """
+
+    def __init__(self, sinks: list[LogSink] | None = None):
+        self.sinks: list[LogSink] = list(sinks or [])
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+
+    def add_sink(self, sink: LogSink):
+        """Add a sink (from the writer thread, so it can't miss or split an event)."""
+        self._call(lambda: self.sinks.append(sink))
+
+    def emit(self, message):
+        """Queue message (a str, or a LogMessage with structured fields) for the sinks."""
+        fields = getattr(_context, "fields", None)
+        if isinstance(message, LogMessage):
+            fields = {**fields, **message.fields} if fields else message.fields
+        elif not isinstance(message, str):
+            message = str(message)
+        if self._thread is None:
+            self._start()
+        if self._closed:
+            # after close(): write directly, nobody is left to drain the queue
+            print(message, flush=True)
+            return
+        if fields:
+            self._queue.put(LogEvent(
+                time.time(), message, fields.get("updater"), fields.get("phase"),
+                fields.get("bytes"), fields.get("elapsed"), bool(fields.get("progress")),
+            ))
+        else:
+            self._queue.put(LogEvent(time.time(), message))
+
+    def flush(self, timeout: float = 10.0):
+        """Wait until everything emitted so far has been written (e.g. before printing directly)."""
+        self._call(None, timeout)
+
+    def close(self):
+        """Write what is queued, close the sinks and stop the writer thread."""
+        if self._thread is None or self._closed:
+            return
+        self.flush()
+        self._queue.put(_STOP)
+        self._thread.join(timeout=10)
+        self._closed = True
+
+    def _call(self, fn, timeout: float = 10.0):
+        if self._thread is None:
+            self._start()
+        if self._closed or threading.current_thread() is self._thread:
+            if fn:
+                fn()
+            return
+        done = threading.Event()
+        self._queue.put((fn, done))
+        done.wait(timeout)
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _for_each_sink(self, method: str, *args):
+        for sink in self.sinks:
+            try:
+                getattr(sink, method)(*args)
+            except Exception:
+                # a broken sink (full disk, closed pipe) must not take logging down with it
+                pass
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=_TICK)
+            except queue.Empty:
+                self._for_each_sink("tick", time.time())
+                continue
+            if item is _STOP:
+                self._for_each_sink("close")
+                return
+            if isinstance(item, tuple) and not isinstance(item, LogEvent):
+                fn, done = item
+                if fn:
+                    try:
+                        fn()
+                    except Exception:
+                        pass
+                self._for_each_sink("flush")
+                done.set()
+                continue
+            self._for_each_sink("write", item)
+            if self._queue.empty():
+                self._for_each_sink("tick", time.time())
+                self._for_each_sink("flush")
+
+
+class LogPipelineHandler(logging.Handler):
+    """Handler sending stdlib logging records (formatted) into a LogPipeline."""
+
+    def __init__(self, pipeline: "LogPipeline", level=logging.NOTSET):
+        super().__init__(level)
+        self.pipeline = pipeline
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            self.pipeline.emit(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+
+_log_pipeline: LogPipeline | None = None
+_console: ProgressAggregator | None = None
+_log_pipeline_lock = threading.Lock()
+
+
+def get_log_pipeline() -> LogPipeline:
+    """The process-wide LogPipeline: to start with, rate-limited progress on a colored console."""
+    global _log_pipeline, _console
+    with _log_pipeline_lock:
+        if _log_pipeline is None:
+            _console = ProgressAggregator(ConsoleSink())
+            _log_pipeline = LogPipeline([_console])
+        return _log_pipeline
+
+
+def configure_log_pipeline(log_file: str | None = None, logging_callback=None):
+    """
+    Apply the settings to the process-wide pipeline: progress_interval for the console, and a
+    JsonLinesSink for log_file (argument, else the log_file setting) if there is one.
+    """
+    # deferred: settings pulls in the config parser
+    from updaters.shared.parse_duration import parse_duration
+    from updaters.shared.settings import get_setting
+
+    pipeline = get_log_pipeline()
+    interval = parse_duration(get_setting("progress_interval", DEFAULT_PROGRESS_INTERVAL))
+    if interval is not None:
+        _console.interval = interval
+    log_file = log_file or get_setting("log_file")
+    if log_file:
+        try:
+            pipeline.add_sink(JsonLinesSink(Path(log_file)))
+        except OSError as e:
+            if logging_callback:
+                logging_callback(f"[configure_log_pipeline] Could not open log file {log_file}: {e}")
@@ -0,0 +1,128 @@
+import xml.etree.ElementTree as ET
+from updaters.shared.block_manifest import BlockManifest
+from updaters.shared.robust_get import robust_get
+
+METALINK4_NS = "urn:ietf:params:xml:ns:metalink"
+METALINK3_NS = "http://www.metalinker.org/"
+METALINK_ACCEPT = "application/metalink4+xml, application/metalink+xml;q=0.9"
+
+
+def _hashlib_name(metalink_type: str) -> str:
+    """Map a metalink hash type ('sha-256', 'sha256', 'SHA-1') to its hashlib name."""
+    return metalink_type.lower().replace("-", "")
+
+
+class Metalink:
+    """
+    Everything a metalink document says about one file.
+
+    Attributes:
+        name (str): File name.
+        size (int | None): File size in bytes.
+        hashes (dict[str, str]): Full-file digests keyed by hashlib name (e.g. 'sha256').
+        pieces (BlockManifest | None): Piece digests, if the metalink lists any.
+        urls (list[str]): HTTP(S) mirror URLs, most preferred first.
+    """
+
+    def __init__(self, name: str, size: int | None, hashes: dict[str, str], pieces: BlockManifest | None, urls: list[str]):
+        self.name = name
+        self.size = size
+        self.hashes = hashes
+        self.pieces = pieces
+        self.urls = urls
+
+
+def parse_metalink(document: bytes, logging_callback, file_name: str | None = None) -> Metalink | None:
+    """
+    Parse a Metalink 4 (RFC 5854) or Metalink 3 document.
+
+    Args:
+        document (bytes): Raw XML.
+        file_name (str | None): Which <file> to use when the metalink lists several; first one by default.
+
+    Returns:
+        Metalink: The parsed file entry, or None if the document has none.
+    """
+    try:
+        root = ET.fromstring(document)
+    except ET.ParseError as e:
+        logging_callback(f"[parse_metalink] Invalid metalink XML: {e}")
+        return None
+
+    if root.tag == f"{{{METALINK4_NS}}}metalink":
+        ns = {"m": METALINK4_NS}
+        files = root.findall("m:file", ns)
+    elif root.tag == f"{{{METALINK3_NS}}}metalink":
+        ns = {"m": METALINK3_NS}
+        files = root.findall("m:files/m:file", ns)
+    else:
+        logging_callback(f"[parse_metalink] Not a metalink document (root element {root.tag})")
+        return None
+    if file_name is not None:
+        files = [f for f in files if f.get("name") == file_name]
+    if not files:
+        logging_callback(f"[parse_metalink] No matching <file> entry in metalink")
+        return None
+    file = files[0]
+    v4 = ns["m"] == METALINK4_NS
+    # Metalink 3 nests hashes in <verification> and urls in <resources>
+    hash_parent = file if v4 else file.find("m:verification", ns)
+    url_parent = file if v4 else file.find("m:resources", ns)
+
+    size_text = file.findtext("m:size", default="", namespaces=ns).strip()
+    size = int(size_text) if size_text.isdigit() else None
+
+    hashes = {}
+    pieces = None
+    if hash_parent is not None:
+        for h in hash_parent.findall("m:hash", ns):
+            if h.get("type") and h.text:
+                hashes[_hashlib_name(h.get("type"))] = h.text.strip().lower()
+        pieces_element = hash_parent.find("m:pieces", ns)
+        if pieces_element is not None:
+            digests = [h.text.strip() for h in pieces_element.findall("m:hash", ns) if h.text]
+            try:
+                pieces = BlockManifest(int(pieces_element.get("length")), _hashlib_name(pieces_element.get("type", "")), digests, total_size=size)
+            except (TypeError, ValueError):
+                logging_callback(f"[parse_metalink] Ignoring malformed <pieces> element")
+
+    ranked = []
+    if url_parent is not None:
+        for u in url_parent.findall("m:url", ns):
+            url = (u.text or "").strip()
+            if not url.startswith(("http://", "https://")):
+                continue
+            if v4:
+                # RFC 5854: lower priority is better, missing means least preferred
+                rank = int(u.get("priority", 999999))
+            else:
+                rank = -int(u.get("preference", 0))
+            ranked.append((rank, url))
+    ranked.sort(key=lambda r: r[0])
+    urls = list(dict.fromkeys(url for _, url in ranked))
+
+    return Metalink(file.get("name", ""), size, hashes, pieces, urls)
+
+
+def fetch_metalink(metalink_url: str, logging_callback, file_name: str | None = None) -> Metalink | None:
+    """
+    Fetch and parse a metalink in one request.
+
+    Args:
+        metalink_url (str): URL of the metalink, e.g. a MirrorCache "<file>.meta4" URL.
+        file_name (str | None): Which <file> entry to use, see parse_metalink.
+
+    Returns:
+        Metalink: Size, hashes, piece hashes and mirrors, or None on failure.
+    """
+    resp = robust_get(metalink_url, logging_callback, retries=2, delay=1, headers={"Accept": METALINK_ACCEPT})
+    if resp is None:
+        logging_callback(f"[fetch_metalink] Could not fetch metalink from {metalink_url}")
+        return None
+    metalink = parse_metalink(resp.content, logging_callback, file_name=file_name)
+    if metalink is not None:
+        logging_callback(
+            f"[fetch_metalink] {metalink.name}: size={metalink.size}, hashes={sorted(metalink.hashes)}, "
+            f"pieces={len(metalink.pieces) if metalink.pieces else 0}, mirrors={len(metalink.urls)}"
+        )
+    return metalink
@@ -0,0 +1,21 @@
+import re
+
+
+def parse_byte_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """
+    First and last byte of a single "bytes=" Range header (a-b, a- or -n), clipped to size.
+
+    Returns:
+        tuple[int, int] | None: None when the header is absent, not a single byte range, or
+        unsatisfiable for a file of this size.
+    """
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", (header or "").strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first == "":
+        # suffix range: the last n bytes
+        return (max(0, size - int(last)), size - 1) if int(last) > 0 and size > 0 else None
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    return (first, last) if first <= last else None
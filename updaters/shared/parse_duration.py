@@ -0,0 +1,23 @@
+import re
+
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+def parse_duration(value) -> float | None:
+    """
+    Parse a duration from config.toml: a number of seconds, or a string like "90s", "15m", "12h", "1d", "2w".
+
+    Returns:
+        float: Seconds, or None if value isn't a valid duration.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) if value > 0 else None
+    if not isinstance(value, str):
+        return None
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhdw]?)\s*", value.lower())
+    if not m:
+        return None
+    seconds = float(m.group(1)) * _UNITS.get(m.group(2) or "s")
+    return seconds if seconds > 0 else None
@@ -0,0 +1,24 @@
+import re
+
+_UNITS = {"": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3}
+
+
+def parse_rate(value) -> float | None:
+    """
+    Parse a transfer rate from config.toml: a number of bytes per second, or a string like
+    "500K", "2M", "1.5G" (binary units, an optional trailing "B" or "/s" is ignored).
+
+    Returns:
+        float: Bytes per second, or None if value isn't a valid rate or is 0 (unlimited).
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) if value > 0 else None
+    if not isinstance(value, str):
+        return None
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([kmg]?)(?:i?b)?(?:/s)?\s*", value.lower())
+    if not m:
+        return None
+    rate = float(m.group(1)) * _UNITS[m.group(2)]
+    return rate if rate > 0 else None
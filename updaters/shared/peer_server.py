@@ -0,0 +1,157 @@
+import email.utils
+import json
+import os
+import re
+import threading
+from http import HTTPStatus
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+from updaters.shared.cache_dir import get_cache_dir
+from updaters.shared.parse_byte_range import parse_byte_range
+
+DEFAULT_PEER_PORT = 8715
+# No authentication: only reachable from this machine unless serve_address names another interface
+DEFAULT_PEER_HOST = "127.0.0.1"
+SEND_CHUNK_SIZE = 8 * 1024 * 1024
+_OBJECT_PATH = re.compile(r"^/objects/(sha256|sha512|sha1|md5)/([0-9a-f]{32,128})$")
+_METADATA_PATH = re.compile(r"^/metadata/([A-Za-z0-9_.-]+\.json)$")
+
+
+class PeerServer:
+    """
+    Read-only HTTP server that lets other sisou2 instances on the LAN download from this one.
+
+    Serves the verified objects of the content store (by upstream URL or by digest) and the
+    JSON metadata in the cache directory (mirror rankings, host throughput), with single-range
+    requests, strong ETags and Last-Modified. Clients still verify everything against the
+    upstream checksums, so a peer can only save bandwidth, never vouch for a file.
+
+    GET/HEAD /artifact?url=<upstream URL>, /objects/<hash type>/<digest>, /index.json,
+    /metadata/<name>.json
+    """
+
+    def __init__(self, store, host: str = DEFAULT_PEER_HOST, port: int = DEFAULT_PEER_PORT, logging_callback=print):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        outer = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            server_version = "sisou2-peer"
+
+            def log_message(self, format, *args):
+                logging_callback(f"[PeerServer] {self.client_address[0]} {format % args}")
+
+            def do_HEAD(self):
+                self._dispatch(send_body=False)
+
+            def do_GET(self):
+                self._dispatch(send_body=True)
+
+            def _dispatch(self, send_body: bool):
+                try:
+                    target = outer._resolve(urlsplit(self.path))
+                except Exception as e:
+                    logging_callback(f"[PeerServer] {self.path}: {e}")
+                    target = None
+                if target is None:
+                    self.send_error(HTTPStatus.NOT_FOUND)
+                    return
+                if isinstance(target, bytes):
+                    self.send_response(HTTPStatus.OK)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(target)))
+                    self.send_header("Cache-Control", "no-cache")
+                    self.end_headers()
+                    if send_body:
+                        self.wfile.write(target)
+                    return
+                path, etag = target
+                self._send_file(path, etag, send_body)
+
+            def _send_file(self, path: Path, etag: str, send_body: bool):
+                try:
+                    f = open(path, "rb")
+                except OSError:
+                    self.send_error(HTTPStatus.NOT_FOUND)
+                    return
+                with f:
+                    st = os.fstat(f.fileno())
+                    size = st.st_size
+                    last_modified = email.utils.formatdate(st.st_mtime, usegmt=True)
+                    if etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+                        self.send_response(HTTPStatus.NOT_MODIFIED)
+                        self.send_header("ETag", etag)
+                        self.end_headers()
+                        return
+                    byte_range = None
+                    if self.headers.get("Range") and self.headers.get("If-Range", etag) in (etag, last_modified):
+                        byte_range = parse_byte_range(self.headers["Range"], size)
+                        if byte_range is None and re.fullmatch(r"bytes=\d+-\d*", self.headers["Range"].strip()):
+                            self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                            self.send_header("Content-Range", f"bytes */{size}")
+                            self.end_headers()
+                            return
+                    first, last = byte_range if byte_range else (0, size - 1)
+                    self.send_response(HTTPStatus.PARTIAL_CONTENT if byte_range else HTTPStatus.OK)
+                    if byte_range:
+                        self.send_header("Content-Range", f"bytes {first}-{last}/{size}")
+                    self.send_header("Content-Type", "application/octet-stream")
+                    self.send_header("Content-Length", str(last - first + 1))
+                    self.send_header("Accept-Ranges", "bytes")
+                    self.send_header("ETag", etag)
+                    self.send_header("Last-Modified", last_modified)
+                    self.end_headers()
+                    if send_body:
+                        self._send_bytes(f, first, last - first + 1)
+
+            def _send_bytes(self, f, offset: int, count: int):
+                self.wfile.flush()
+                try:
+                    while count > 0:
+                        sent = self.connection.sendfile(f, offset, min(count, SEND_CHUNK_SIZE))
+                        if sent == 0:
+                            break
+                        offset += sent
+                        count -= sent
+                except (ConnectionError, OSError):
+                    # the client went away (or resumes elsewhere)
+                    pass
+
+        class _Server(ThreadingHTTPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+
+        self.store = store
+        self._server = _Server((host, port), _Handler)
+        self.address = self._server.server_address
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True, name="sisou2-peer")
+
+    def _resolve(self, url) -> tuple[Path, str] | bytes | None:
+        """(object file, ETag) or a JSON body for a request path, None for 404."""
+        if url.path == "/artifact":
+            upstream = parse_qs(url.query).get("url", [None])[0]
+            self.store.refresh()
+            key = self.store.lookup(upstream) if upstream else None
+            return (self.store.object_path(key), f'"{key}"') if key else None
+        match = _OBJECT_PATH.match(url.path)
+        if match:
+            key = f"{match.group(1)}:{match.group(2)}"
+            path = self.store.object_path(key)
+            return (path, f'"{key}"') if path.is_file() else None
+        if url.path == "/index.json":
+            self.store.refresh()
+            return json.dumps({"urls": self.store.url_index()}, sort_keys=True).encode("utf-8")
+        match = _METADATA_PATH.match(url.path)
+        if match:
+            try:
+                return (get_cache_dir() / match.group(1)).read_bytes()
+            except OSError:
+                return None
+        return None
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
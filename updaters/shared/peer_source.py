@@ -0,0 +1,99 @@
+import threading
+import time
+from urllib.parse import quote
+from updaters.shared.http_session import get_session
+from updaters.shared.settings import get_setting
+
+PEER_TIMEOUT = 3.0
+# An unreachable peer is not asked again for this long (each try would cost PEER_TIMEOUT)
+PEER_RETRY_AFTER = 300.0
+
+_unreachable: dict[str, float] = {}
+_unreachable_lock = threading.Lock()
+
+
+def get_peers() -> list[str]:
+    """Base URLs of the LAN peers (`sisou2 --serve`) in the `peer` setting, a string or a list."""
+    peers = get_setting("peer") or []
+    if isinstance(peers, str):
+        peers = [peers]
+    return [peer.rstrip("/") if "://" in peer else f"http://{peer.rstrip('/')}" for peer in peers]
+
+
+def _reachable_peers() -> list[str]:
+    now = time.monotonic()
+    with _unreachable_lock:
+        return [peer for peer in get_peers() if now >= _unreachable.get(peer, 0)]
+
+
+def _mark_unreachable(peer: str):
+    with _unreachable_lock:
+        _unreachable[peer] = time.monotonic() + PEER_RETRY_AFTER
+
+
+def _peer_key(peer: str, url: str, head) -> str | None:
+    """Store key ("sha256:<hex>") of the peer's copy of url: its ETag, else its /index.json entry."""
+    etag = head.headers.get("ETag", "").strip('"')
+    if ":" in etag:
+        return etag
+    import requests
+
+    try:
+        resp = get_session().get(f"{peer}/index.json", timeout=PEER_TIMEOUT)
+        return resp.json().get("urls", {}).get(url, {}).get("key") if resp.status_code == 200 else None
+    except (requests.exceptions.RequestException, ValueError, AttributeError):
+        return None
+
+
+def find_peer_source(url: str, expected_size: int | None, logging_callback, expected_digests: dict[str, str] | None = None) -> str | None:
+    """
+    URL on a LAN peer serving the artifact last downloaded from url, or None.
+
+    A peer whose copy has a different size than upstream announces, or a different digest than
+    expected_digests (hashlib name -> digest, e.g. from a metalink) lists for its hash type, is
+    skipped: it holds another release published under the same URL. Whatever comes from a peer
+    is still checked against the upstream checksums by the updater.
+    """
+    import requests
+
+    for peer in _reachable_peers():
+        if url.startswith(peer + "/"):
+            # url already points at this peer
+            continue
+        candidate = f"{peer}/artifact?url={quote(url, safe='')}"
+        try:
+            head = get_session().head(candidate, timeout=PEER_TIMEOUT)
+        except requests.exceptions.RequestException as e:
+            logging_callback(f"[peer] {peer} unreachable, using upstream for {PEER_RETRY_AFTER / 60:.0f} min: {e}")
+            _mark_unreachable(peer)
+            continue
+        if head.status_code != 200:
+            continue
+        size = head.headers.get("content-length")
+        if expected_size is not None and size is not None and int(size) != expected_size:
+            logging_callback(f"[peer] {peer} has a different build of {url} ({size} != {expected_size} bytes), skipping it")
+            continue
+        if expected_digests:
+            hash_type, _, digest = (_peer_key(peer, url, head) or "").partition(":")
+            expected = {name.lower(): value.lower() for name, value in expected_digests.items()}.get(hash_type)
+            if expected and digest.lower() != expected:
+                logging_callback(f"[peer] {peer} has a different build of {url} ({hash_type} {digest[:12]}... != {expected[:12]}...), skipping it")
+                continue
+        return candidate
+    return None
+
+
+def fetch_peer_metadata(name: str) -> dict | None:
+    """A JSON file from the first peer's cache directory (e.g. "mirror_rankings.json"), None if no peer has it."""
+    import requests
+
+    for peer in _reachable_peers():
+        try:
+            resp = get_session().get(f"{peer}/metadata/{name}", timeout=PEER_TIMEOUT)
+            if resp.status_code == 200:
+                return resp.json()
+        except requests.exceptions.RequestException:
+            _mark_unreachable(peer)
+        except ValueError:
+            pass
+    return None
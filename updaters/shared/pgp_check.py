@@ -1,6 +1,5 @@
 from updaters.shared.resolve_file_case import resolve_file_case
 from pathlib import Path
-import pgpy
 import mmap
 from pathlib import Path
 from typing import Union
@@ -21,6 +20,8 @@ def verify_tails_mmap_bytes(file_path: Path, sig_data: bytes, key_data: bytes, l
         ValueError if signature verification fails.
     """
 
+    import pgpy  # heavy, only loaded when a signature is actually checked
+
     # Load the PGP signing key from bytes or string
     if isinstance(key_data, bytes):
         key_str = key_data.decode('utf-8')
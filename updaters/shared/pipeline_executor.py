@@ -0,0 +1,173 @@
+import concurrent.futures
+import os
+import threading
+from typing import Any, Callable
+from updaters.shared.log_pipeline import log_context
+from updaters.shared.settings import get_setting
+
+# Resource kinds a stage can be bound by; each gets its own bounded pool
+NETWORK = "network"
+DISK = "disk"
+CPU = "cpu"
+
+
+class Stage:
+    """
+    One step of an updater's install, bound to a single resource kind.
+
+    Attributes:
+        name (str): Unique within its graph; later stages read the result under this name.
+        kind (str): NETWORK, DISK or CPU: which pool runs it.
+        fn (Callable[[dict], Any]): Called with the results of the stages it runs after.
+        after (list[str]): Names of the stages that must finish first.
+    """
+
+    def __init__(self, name: str, kind: str, fn: Callable[[dict], Any], after: list[str] | tuple = ()):
+        self.name = name
+        self.kind = kind
+        self.fn = fn
+        self.after = list(after)
+
+
+class StageFailed(Exception):
+    """Result recorded for a stage that raised, or that was skipped because a stage before it raised."""
+
+
+class PipelineExecutor:
+    """
+    Runs many stage graphs at once on separate bounded pools for network, disk and CPU work.
+
+    A stage is queued on its pool as soon as the stages it depends on are done, so while one
+    updater is hashing or decompressing, another one's download keeps the network busy. Pool
+    sizes come from the pipeline_network_workers / pipeline_disk_workers / pipeline_cpu_workers
+    settings; disk defaults to 1 because parallel reads thrash a USB stick. Network stages of
+    jobs on the same host are further limited to max_downloads_per_host at a time; while a host
+    is at its cap, network workers go to the next job from another host.
+    """
+
+    def __init__(self, network_workers: int | None = None, disk_workers: int | None = None, cpu_workers: int | None = None, host_cap: int | None = None):
+        sizes = {
+            NETWORK: network_workers or get_setting("pipeline_network_workers", 3),
+            DISK: disk_workers or get_setting("pipeline_disk_workers", 1),
+            CPU: cpu_workers or get_setting("pipeline_cpu_workers", os.cpu_count() or 2),
+        }
+        self.workers = {kind: max(1, int(size)) for kind, size in sizes.items()}
+        self.host_cap = max(1, int(host_cap or get_setting("max_downloads_per_host", 2)))
+        self._pools = {
+            kind: concurrent.futures.ThreadPoolExecutor(max_workers=size, thread_name_prefix=f"sisou2-{kind}")
+            for kind, size in self.workers.items()
+        }
+        self._lock = threading.Lock()
+
+    def run(
+        self,
+        graphs: list[list[Stage]],
+        on_graph_done: Callable[[int, dict], list[Stage] | None] | None = None,
+        hosts: list[str | None] | None = None,
+    ) -> list[dict]:
+        """
+        Run every graph to completion. Jobs start in list order, so put the longest first.
+
+        Args:
+            graphs (list[list[Stage]]): One graph (list of stages) per job.
+            on_graph_done: Called with (job index, results) when a job's graph finishes. It may
+                return a new graph for the same job (e.g. a retry); None ends the job.
+            hosts (list[str | None] | None): Per job, the host its network stages download from
+                (None: no per-host cap).
+
+        Returns:
+            list[dict]: Per job, stage name -> result (StageFailed for stages that raised or were skipped).
+        """
+        results: list[dict] = [{} for _ in graphs]
+        # graphs started or about to start and not finished yet: counted before any graph starts
+        # (and before a follow-up starts), so a graph that finishes at once can't reach 0 early
+        pending = [len(graphs)]
+        all_done = threading.Event()
+        # host -> network stages running, and those waiting for a slot (job, state, stage)
+        host_running: dict[str, int] = {}
+        host_waiting: dict[str, list] = {}
+
+        def host_for(job: int, stage: Stage) -> str | None:
+            return hosts[job] if hosts and stage.kind == NETWORK else None
+
+        def start_graph(job: int, stages: list[Stage]):
+            state = {"stages": {s.name: s for s in stages}, "left": len(stages), "results": {}}
+            for stage in stages:
+                if not stage.after:
+                    submit(job, state, stage)
+            if not stages:
+                finish_graph(job, state)
+
+        def submit(job: int, state: dict, stage: Stage):
+            inputs = {name: state["results"][name] for name in stage.after}
+            if any(isinstance(value, StageFailed) for value in inputs.values()):
+                complete(job, state, stage, StageFailed(f"skipped: a stage before {stage.name} failed"), ran=False)
+                return
+            host = host_for(job, stage)
+            if host:
+                with self._lock:
+                    if host_running.get(host, 0) >= self.host_cap:
+                        host_waiting.setdefault(host, []).append((job, state, stage))
+                        return
+                    host_running[host] = host_running.get(host, 0) + 1
+            start_stage(job, state, stage)
+
+        def run_stage(stage: Stage, inputs: dict):
+            # everything the stage logs is tagged with its phase
+            with log_context(phase=stage.name):
+                return stage.fn(inputs)
+
+        def start_stage(job: int, state: dict, stage: Stage):
+            inputs = {name: state["results"][name] for name in stage.after}
+            future = self._pools[stage.kind].submit(run_stage, stage, inputs)
+            future.add_done_callback(lambda f: complete(job, state, stage, f.exception() or f.result()))
+
+        def complete(job: int, state: dict, stage: Stage, result: Any, ran: bool = True):
+            if isinstance(result, BaseException) and not isinstance(result, StageFailed):
+                result = StageFailed(f"{stage.name}: {result}")
+            host = host_for(job, stage) if ran else None
+            handed_over = None
+            with self._lock:
+                if host:
+                    # The host slot goes straight to the next stage waiting for it
+                    if host_waiting.get(host):
+                        handed_over = host_waiting[host].pop(0)
+                    else:
+                        host_running[host] -= 1
+                state["results"][stage.name] = result
+                state["left"] -= 1
+                ready = [
+                    s for s in state["stages"].values()
+                    if s.name not in state["results"] and stage.name in s.after
+                    and all(name in state["results"] for name in s.after)
+                ]
+                finished = state["left"] == 0
+            if handed_over:
+                start_stage(*handed_over)
+            for next_stage in ready:
+                submit(job, state, next_stage)
+            if finished:
+                finish_graph(job, state)
+
+        def finish_graph(job: int, state: dict):
+            results[job].update(state["results"])
+            follow_up = on_graph_done(job, dict(state["results"])) if on_graph_done else None
+            if follow_up:
+                with self._lock:
+                    pending[0] += 1
+                start_graph(job, follow_up)
+            with self._lock:
+                pending[0] -= 1
+                if pending[0] == 0:
+                    all_done.set()
+
+        if not graphs:
+            return results
+        for job, stages in enumerate(graphs):
+            start_graph(job, stages)
+        all_done.wait()
+        return results
+
+    def shutdown(self):
+        for pool in self._pools.values():
+            pool.shutdown(wait=True)
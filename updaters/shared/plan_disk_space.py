@@ -0,0 +1,69 @@
+import os
+import shutil
+from pathlib import Path
+from typing import NamedTuple
+
+# Left free on every drive, for the filesystem and anything else writing to it
+DEFAULT_MIN_FREE_MB = 256
+
+
+class SpacePlan(NamedTuple):
+    chains: list[list[int]]
+    rejected: dict[int, int]
+
+
+def free_space(path: Path) -> tuple[int | None, int | None]:
+    """(device id, free bytes) of the filesystem holding path (or its nearest existing parent)."""
+    path = Path(path)
+    while not path.exists() and path != path.parent:
+        path = path.parent
+    try:
+        return os.stat(path).st_dev, shutil.disk_usage(path).free
+    except OSError:
+        return None, None
+
+
+def plan_disk_space(units: list[int], needs: dict[int, int], reclaimable: dict[int, int], free: int, reserve: int) -> SpacePlan:
+    """
+    Decide which installs on one drive may run at once so the drive never fills up.
+
+    Every install writes needs[unit] bytes next to the version it replaces; the old version
+    (reclaimable[unit] bytes) is only removed once the new one is verified, so the drive always
+    holds at least one good copy. Units are taken in start order: one that fits in the free
+    space starts a chain of its own; one that doesn't is queued behind the chain whose finished
+    installs will have freed the most, if that makes it fit; otherwise it is rejected now
+    rather than failing with ENOSPC after a long download. Space is accounted pessimistically:
+    what a chain frees is only counted for the units queued behind it.
+
+    Args:
+        units (list[int]): Install units in start order.
+        needs (dict[int, int]): Bytes each unit will write to the drive.
+        reclaimable (dict[int, int]): Bytes each unit frees once verified.
+        free (int): Free bytes on the drive now.
+        reserve (int): Bytes to leave free.
+
+    Returns:
+        SpacePlan: Chains of units to run one after another (the chains run in parallel), and
+        the units that can't fit with the bytes they are short.
+    """
+    available = free - reserve
+    chains: list[list[int]] = []
+    # bytes a chain has freed by the time the next unit queued behind it starts
+    freed: list[int] = []
+    rejected: dict[int, int] = {}
+    for unit in units:
+        need = needs[unit]
+        if need <= available:
+            chains.append([unit])
+            freed.append(reclaimable[unit])
+            available -= need
+            continue
+        best = max(range(len(chains)), key=lambda chain: freed[chain], default=None)
+        if best is None or need > available + freed[best]:
+            rejected[unit] = need - available - (freed[best] if best is not None else 0)
+            continue
+        chains[best].append(unit)
+        from_freed = min(need, freed[best])
+        freed[best] += reclaimable[unit] - from_freed
+        available -= need - from_freed
+    return SpacePlan(chains, rejected)
@@ -0,0 +1,108 @@
+import concurrent.futures
+import json
+import threading
+import time
+from updaters.shared.cache_dir import get_cache_dir
+from updaters.shared.peer_source import fetch_peer_metadata
+from updaters.shared.settings import get_setting
+
+PROBE_BYTES = 256 * 1024
+PROBE_TIMEOUT = 5.0
+# Mirrors are ranked by the estimated time to fetch this many bytes: RTT + SCORE_BYTES / throughput
+SCORE_BYTES = 64 * 1024 * 1024
+DEFAULT_RANKING_TTL = 24 * 60 * 60
+
+_rankings_lock = threading.Lock()
+
+
+def _rankings_file():
+    return get_cache_dir() / "mirror_rankings.json"
+
+
+def _load_rankings() -> dict:
+    try:
+        return json.loads(_rankings_file().read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        # A LAN peer's rankings were measured on the same link
+        return fetch_peer_metadata("mirror_rankings.json") or {}
+
+
+def _probe_mirror(root: str, relative_path: str) -> dict | None:
+    """Measure RTT (HEAD) and a short Range-read throughput for one mirror. None if the mirror can't serve the file."""
+    import requests
+
+    url = f"{root.rstrip('/')}/{relative_path.lstrip('/')}"
+    try:
+        start = time.perf_counter()
+        head = requests.head(url, timeout=PROBE_TIMEOUT, allow_redirects=True)
+        rtt = time.perf_counter() - start
+        if head.status_code != 200:
+            return None
+        start = time.perf_counter()
+        received = 0
+        with requests.get(
+            url,
+            headers={"Range": f"bytes=0-{PROBE_BYTES - 1}", "Accept-Encoding": "identity"},
+            stream=True,
+            timeout=PROBE_TIMEOUT,
+        ) as r:
+            if r.status_code not in (200, 206):
+                return None
+            for chunk in r.iter_content(chunk_size=64 * 1024):
+                received += len(chunk)
+                if received >= PROBE_BYTES:
+                    break
+        elapsed = max(time.perf_counter() - start, 1e-6)
+    except requests.exceptions.RequestException:
+        return None
+    throughput = received / elapsed
+    return {"root": root, "rtt": rtt, "throughput": throughput, "score": rtt + SCORE_BYTES / max(throughput, 1.0)}
+
+
+def rank_mirrors(candidates: list[str], relative_path: str, logging_callback) -> list[str]:
+    """
+    Rank interchangeable mirror roots from fastest to slowest.
+
+    All candidates are probed concurrently against relative_path (so mirrors that don't carry
+    the file yet are dropped). Rankings are cached on disk per candidate set and file for
+    `mirror_ranking_ttl` seconds, so a ranking is never reused for a file it wasn't probed for.
+
+    Args:
+        candidates (list[str]): Base URLs serving the same tree, e.g. "https://mirrors.kernel.org/archlinux".
+        relative_path (str): Path of the file to probe, relative to each root.
+
+    Returns:
+        list[str]: Candidate roots that answered, best first. Empty if none answered.
+    """
+    ttl = get_setting("mirror_ranking_ttl", DEFAULT_RANKING_TTL)
+    cache_key = "|".join(sorted(candidates)) + "|" + relative_path.lstrip("/")
+    with _rankings_lock:
+        cached = _load_rankings().get(cache_key)
+    if cached and time.time() - cached.get("timestamp", 0) < ttl:
+        logging_callback(f"[rank_mirrors] Using cached ranking: {cached['ranked']}")
+        return cached["ranked"]
+
+    logging_callback(f"[rank_mirrors] Probing {len(candidates)} mirrors for {relative_path}")
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(candidates)) as executor:
+        results = [r for r in executor.map(lambda root: _probe_mirror(root, relative_path), candidates) if r]
+    results.sort(key=lambda r: r["score"])
+    for r in results:
+        logging_callback(f"[rank_mirrors] {r['root']}: rtt={r['rtt'] * 1000:.0f} ms, {r['throughput'] / 1024:.0f} KiB/s")
+    ranked = [r["root"] for r in results]
+    if ranked:
+        with _rankings_lock:
+            now = time.time()
+            # expired entries (e.g. rankings for files of old releases) would only pile up
+            rankings = {key: value for key, value in _load_rankings().items() if now - value.get("timestamp", 0) < ttl}
+            rankings[cache_key] = {"ranked": ranked, "timestamp": time.time()}
+            _rankings_file().write_text(json.dumps(rankings, indent=2), encoding="utf-8")
+    return ranked
+
+
+def rewrite_to_mirror(url: str, candidates: list[str], mirror_root: str) -> str:
+    """Swap whichever candidate root url starts with for mirror_root. Returns url unchanged if none matches."""
+    for root in candidates:
+        prefix = root.rstrip("/") + "/"
+        if url.startswith(prefix):
+            return mirror_root.rstrip("/") + "/" + url[len(prefix):]
+    return url
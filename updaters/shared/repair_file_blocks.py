@@ -0,0 +1,81 @@
+import hashlib
+import os
+from pathlib import Path
+from updaters.shared.block_manifest import BlockManifest
+from updaters.shared.find_corrupt_blocks import find_corrupt_blocks
+from updaters.shared.robust_get import robust_get
+
+
+MAX_RANGE_BYTES = 64 * 1024 * 1024
+
+
+def _merge_block_runs(blocks: list[int], max_blocks: int) -> list[tuple[int, int]]:
+    """Group sorted block indexes into (first, last) runs of adjacent blocks, at most max_blocks long."""
+    runs: list[tuple[int, int]] = []
+    for index in sorted(blocks):
+        if runs and runs[-1][1] == index - 1 and index - runs[-1][0] < max_blocks:
+            runs[-1] = (runs[-1][0], index)
+        else:
+            runs.append((index, index))
+    return runs
+
+
+def repair_file_blocks(url: str, file: Path, manifest: BlockManifest, logging_callback, retries: int = 3) -> bool:
+    """
+    Re-fetch only the corrupt blocks of a local file using HTTP Range requests.
+
+    Every fetched block is checked against the manifest before it is written in place,
+    so a bad mirror response can't make the file worse.
+
+    Returns:
+        True if the file now matches every block digest, False if it couldn't be repaired.
+    """
+    def log(msg):
+        logging_callback(f"[repair_file_blocks] {msg}")
+
+    if manifest.total_size is not None and Path(file).stat().st_size > manifest.total_size:
+        log(f"Truncating oversized file to {manifest.total_size} bytes")
+        os.truncate(file, manifest.total_size)
+
+    corrupt = find_corrupt_blocks(file, manifest, logging_callback)
+    if corrupt is None:
+        return False
+    if not corrupt:
+        log("No corrupt blocks found, nothing to repair.")
+        return True
+    if len(corrupt) == len(manifest):
+        log("Every block is corrupt, a full download is cheaper than a repair.")
+        return False
+
+    h_factory = getattr(hashlib, manifest.hash_type)
+    repaired_bytes = 0
+    with open(file, "r+b") as f:
+        max_blocks = max(1, MAX_RANGE_BYTES // manifest.block_size)
+        for first, last in _merge_block_runs(corrupt, max_blocks):
+            start = manifest.block_range(first)[0]
+            end = manifest.block_range(last)[1]
+            resp = robust_get(
+                url,
+                logging_callback,
+                retries=retries,
+                delay=1,
+                headers={"Range": f"bytes={start}-{end - 1}", "Accept-Encoding": "identity"},
+            )
+            if resp is None or resp.status_code != 206:
+                log(f"Server did not honour range {start}-{end - 1} (resp={resp}), aborting repair.")
+                return False
+            data = resp.content
+            if len(data) != end - start:
+                log(f"Short range response for {start}-{end - 1}: got {len(data)} bytes")
+                return False
+            for index in range(first, last + 1):
+                block_start, block_end = manifest.block_range(index)
+                block = data[block_start - start:block_end - start]
+                if h_factory(block).hexdigest() != manifest.digests[index]:
+                    log(f"Fetched block {index} does not match its digest, aborting repair.")
+                    return False
+            f.seek(start)
+            f.write(data)
+            repaired_bytes += len(data)
+    log(f"Re-fetched {len(corrupt)} block(s), {repaired_bytes:,} bytes instead of the whole file.")
+    return find_corrupt_blocks(file, manifest, logging_callback) == []
@@ -1,17 +1,20 @@
 from pathlib import Path
 from typing import Optional
+from updaters.shared.drive_index import get_drive_index
 
 def resolve_file_case(file: Path) -> Optional[Path]:
     """
     Try the original, lowercase, and uppercase extensions for a file.
     Returns the first Path that exists, or None if not found.
+    Lookups go through the drive index, so the directory is only scanned once.
     """
-    if file.exists():
+    index = get_drive_index()
+    if index.exists(file):
         return file
     lower = file.with_suffix(file.suffix.lower())
-    if lower != file and lower.exists():
+    if lower != file and index.exists(lower):
         return lower
     upper = file.with_suffix(file.suffix.upper())
-    if upper != file and upper.exists():
+    if upper != file and index.exists(upper):
         return upper
     return None
@@ -0,0 +1,101 @@
+import email.utils
+import random
+import time
+from updaters.shared.parse_duration import parse_duration
+from updaters.shared.settings import get_setting
+
+# Longest wait between two attempts
+DEFAULT_MAX_DELAY = 60.0
+# Stop retrying once a request has been failing for this long
+DEFAULT_RETRY_DEADLINE = 300.0
+# Answers another attempt can change: request timeout and rate limiting (plus every 5xx)
+RETRYABLE_CLIENT_STATUSES = {408, 429}
+
+
+def is_retryable_status(status: int) -> bool:
+    """True for 408, 429 and 5xx; any other 4xx (404, 410, 403, ...) stays the same when asked again."""
+    return status in RETRYABLE_CLIENT_STATUSES or 500 <= status <= 599
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds a Retry-After header asks to wait (delta-seconds or an HTTP date), None if absent or invalid."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        # "-0000" dates: still GMT by RFC 9110
+        return max(0.0, when.timestamp() - time.mktime(time.gmtime()))
+    return max(0.0, when.timestamp() - time.time())
+
+
+class RetryPolicy:
+    """
+    Backoff between the attempts of one request.
+
+    Each wait doubles from base_delay up to max_delay and is jittered between half and all of
+    that, so downloads that failed together don't hammer the host again in lockstep. A
+    Retry-After from the server is waited at least. Once the request has been failing for
+    deadline seconds, no further attempt is made; reset() after an attempt that made progress
+    restarts both the backoff and the deadline, so a long download that keeps advancing is
+    never cut off.
+
+    Attributes:
+        attempts (int): Waits handed out since the last reset.
+    """
+
+    def __init__(self, base_delay: float = 1.0, max_delay: float = DEFAULT_MAX_DELAY, deadline: float | None = DEFAULT_RETRY_DEADLINE):
+        self.base_delay = max(0.0, base_delay)
+        self.max_delay = max(self.base_delay, max_delay)
+        self.deadline = deadline
+        self.reset()
+
+    @classmethod
+    def from_settings(cls, base_delay: float = 1.0) -> "RetryPolicy":
+        """Policy with the retry_max_delay / retry_deadline settings ("90s", "10m" or seconds; 0 = no deadline)."""
+        max_delay = parse_duration(get_setting("retry_max_delay", DEFAULT_MAX_DELAY)) or DEFAULT_MAX_DELAY
+        deadline = parse_duration(get_setting("retry_deadline", DEFAULT_RETRY_DEADLINE))
+        return cls(base_delay, max_delay, deadline)
+
+    def reset(self):
+        self.attempts = 0
+        self._failing_since = time.monotonic()
+
+    def remaining(self) -> float | None:
+        """Seconds left before the deadline, None without one."""
+        if self.deadline is None:
+            return None
+        return self.deadline - (time.monotonic() - self._failing_since)
+
+    def next_delay(self, retry_after: float | None = None) -> float | None:
+        """
+        How long to wait before the next attempt.
+
+        Args:
+            retry_after (float | None): Seconds the server asked for (see parse_retry_after).
+
+        Returns:
+            float | None: Seconds to sleep, or None if the next attempt would start past the deadline.
+        """
+        cap = min(self.max_delay, self.base_delay * 2 ** min(self.attempts, 32))
+        delay = random.uniform(cap / 2, cap)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        remaining = self.remaining()
+        if remaining is not None and delay >= remaining:
+            return None
+        self.attempts += 1
+        return delay
+
+    def wait(self, retry_after: float | None = None) -> bool:
+        """Sleep before the next attempt. False (without sleeping) once the deadline doesn't allow one."""
+        delay = self.next_delay(retry_after)
+        if delay is None:
+            return False
+        time.sleep(delay)
+        return True
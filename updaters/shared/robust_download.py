@@ -1,14 +1,28 @@
 import time
-import requests
 from pathlib import Path
 import os
-from tqdm import tqdm
 import sys
 from typing import Optional
+from updaters.shared.bandwidth_shaper import get_bandwidth_shaper
+from updaters.shared.block_manifest import BlockManifest
+from updaters.shared.circuit_breaker import HOST_DOWN_STATUSES, get_circuit_breaker
+from updaters.shared.drive_index import get_drive_index
+from updaters.shared.host_throughput import host_of, record_throughput
+from updaters.shared.http_cache import CACHE_HEADER
+from updaters.shared.http_session import get_session
+from updaters.shared.log_pipeline import progress_message
+from updaters.shared.peer_source import find_peer_source
+from updaters.shared.retry_policy import RetryPolicy, is_retryable_status, parse_retry_after
+from updaters.shared.segmented_download import segmented_download, segment_state_file, segments_done
+from updaters.shared.throughput_watchdog import ThroughputWatchdog, WATCHDOG_READ_SIZE
+from updaters.shared.write_behind import WriteBehindFile, reserve_space
+
+# Without a progress bar (no terminal), progress is logged every this many bytes
+PROGRESS_LOG_BYTES = 256 * 1024 * 1024
 
 
 def robust_download(
-    url: str,
+    url: str | list[str],
     local_file,
     logging_callback,
     method: str = "GET",
@@ -17,24 +31,50 @@ def robust_download(
     chunk_size: int = 1024 * 1024,
     redirects: bool = True,
     expected_size: Optional[int] = None,
+    block_manifest: Optional[BlockManifest] = None,
+    expected_digests: Optional[dict[str, str]] = None,
     **kwargs
 ) -> bool:
+    """
+    Download url to local_file through a resumable .part file.
+
+    url may also be a list of equivalent sources (mirrors, metalink entries); when the file
+    size is known the download is then split into byte-range segments fetched from all of
+    them at once (see segmented_download). A block_manifest makes that path verify every
+    piece as it arrives. expected_digests (hashlib name -> full-file digest) keeps a LAN peer
+    holding another build of the file from being used.
+
+    Waits between attempts follow a RetryPolicy (backoff with jitter, Retry-After, the
+    retry_deadline setting, restarted whenever an attempt makes progress); sources whose host
+    the circuit breaker counts as down are skipped, and when all are down the download fails
+    fast so its worker can move on.
+    """
+
+    # deferred so that importing the updaters stays cheap
+    import requests
+    from tqdm import tqdm
 
     def log(msg):
         logging_callback(f"[robust_download] {msg}")
 
-    log(f"URL: {url}")
+    urls = [url] if isinstance(url, str) else list(dict.fromkeys(url))
+    if not urls:
+        log("ERROR: no URL")
+        return False
+    url = urls[0]
+    log(f"URL: {url}" + (f" (+{len(urls) - 1} mirror(s))" if len(urls) > 1 else ""))
 
     # -------------------------
     # sanity checks
     # -------------------------
-    if any(x in url for x in ("[[VER]]", "[[EDITION]]", "[[LANG]]")):
-        log("ERROR: unresolved placeholder")
-        return False
+    for source in urls:
+        if any(x in source for x in ("[[VER]]", "[[EDITION]]", "[[LANG]]")):
+            log("ERROR: unresolved placeholder")
+            return False
 
-    if not url.startswith(("http://", "https://")):
-        log("ERROR: invalid URL")
-        return False
+        if not source.startswith(("http://", "https://")):
+            log("ERROR: invalid URL")
+            return False
 
     # -------------------------
     # optional expected size (ONLY fallback, never override if provided)
@@ -42,20 +82,75 @@ def robust_download(
     if expected_size is None:
         try:
             from updaters.shared.fetch_expected_file_size import fetch_expected_file_size
-            expected_size = fetch_expected_file_size(url, logging_callback)
+            for source in urls:
+                expected_size = fetch_expected_file_size(source, logging_callback)
+                if expected_size is not None:
+                    break
             log(f"expected_size={expected_size}")
         except Exception as e:
             log(f"size fetch failed: {e}")
 
+    # -------------------------
+    # LAN peer first (the `peer` setting); what it doesn't serve comes from upstream,
+    # resuming any .part it left behind
+    # -------------------------
+    peer_url = find_peer_source(url, expected_size, logging_callback, expected_digests) if method == "GET" else None
+    if peer_url:
+        log(f"trying LAN peer {peer_url}")
+        if robust_download(peer_url, local_file, logging_callback, retries=1, delay=delay, chunk_size=chunk_size, expected_size=expected_size, block_manifest=block_manifest):
+            return True
+        log("LAN peer failed, falling back to upstream")
+
     part_file = Path(str(local_file) + ".part")
     final_file = Path(local_file)
+    state_file = segment_state_file(part_file)
 
     attempt = 0
+    breaker = get_circuit_breaker()
+    policy = RetryPolicy.from_settings(base_delay=delay)
+
+    # -------------------------
+    # multi-source segmented mode (also resumes an earlier segmented .part)
+    # -------------------------
+    if expected_size is not None and (len(urls) > 1 or state_file.exists() or block_manifest is not None):
+        while attempt <= retries or retries == -1:
+            try:
+                if segmented_download(urls, part_file, expected_size, logging_callback, chunk_size=chunk_size, block_manifest=block_manifest):
+                    os.replace(part_file, final_file)
+                    get_drive_index().update(part_file, final_file)
+                    log(f"completed → {final_file}")
+                    return True
+            except Exception as e:
+                log(f"unexpected error: {e}")
+                return False
+            attempt += 1
+            if not policy.wait():
+                log("retry deadline reached")
+                break
+        if segments_done(part_file):
+            log("failed after retries, segment progress kept for the next run")
+            return False
+        log("no source served a segment, falling back to a single stream")
+        attempt = 0
+        policy.reset()
+
+    if state_file.exists():
+        # A preallocated .part can't be resumed by appending
+        log("discarding segmented .part, file size unknown")
+        part_file.unlink(missing_ok=True)
+        state_file.unlink(missing_ok=True)
 
     resume_fail_counter = 0
     resume_enabled = True
 
     while attempt <= retries or retries == -1:
+        source = next((source for source in [url] + urls if breaker.allow(source)), None)
+        if source is None:
+            log(f"{host_of(url)} is down, giving up for now (next try in {breaker.retry_in(url):.0f}s)")
+            return False
+        if source != url:
+            log(f"{host_of(url)} is down, switching to {source}")
+            url = source
         try:
 
             resume = part_file.stat().st_size if part_file.exists() else 0
@@ -70,7 +165,8 @@ def robust_download(
             if resume > 0 and resume_enabled:
                 headers["Range"] = f"bytes={resume}-"
 
-            with requests.request(
+            started = time.monotonic()
+            with get_session().request(
                 method,
                 url,
                 stream=True,
@@ -83,16 +179,19 @@ def robust_download(
                 # -------------------------
                 # RETRYABLE ERRORS
                 # -------------------------
-                if r.status_code in (403, 408, 429, 500, 502, 503, 504):
+                if r.status_code in HOST_DOWN_STATUSES:
+                    breaker.record_failure(url, logging_callback)
+                else:
+                    breaker.record_success(url, logging_callback)
+
+                if is_retryable_status(r.status_code):
                     attempt += 1
                     log(f"retryable HTTP {r.status_code} (attempt {attempt})")
-                    time.sleep(delay)
+                    if not policy.wait(parse_retry_after(r.headers.get("Retry-After"))):
+                        log("retry deadline reached")
+                        break
                     continue
 
-                if r.status_code >= 400 and r.status_code not in (206,):
-                    log(f"fatal HTTP {r.status_code}")
-                    return False
-
                 # -------------------------
                 # 416 recovery
                 # -------------------------
@@ -107,14 +206,26 @@ def robust_download(
                     resume_fail_counter = 0
                     resume = 0
                     attempt += 1
-                    time.sleep(delay)
+                    if not policy.wait():
+                        break
                     continue
 
+                if r.status_code >= 400:
+                    log(f"fatal HTTP {r.status_code}")
+                    return False
+
                 # -------------------------
                 # size calculation
                 # -------------------------
                 remote_len = r.headers.get("content-length")
                 remote_size = int(remote_len) if remote_len else None
+                if r.status_code == 206:
+                    # content-length only covers the resumed range
+                    range_total = r.headers.get("content-range", "").rpartition("/")[2]
+                    if range_total.isdigit():
+                        remote_size = int(range_total)
+                    elif remote_size is not None:
+                        remote_size += resume
 
                 if expected_size is not None:
                     total_size = expected_size
@@ -131,12 +242,28 @@ def robust_download(
                     unit_scale=True,
                     disable=not sys.stdout.isatty()
                 )
-
-                bytes_written = resume
-                mode = "ab" if resume else "wb"
-
-                with open(part_file, mode) as f:
-                    for chunk in r.iter_content(chunk_size=chunk_size):
+                next_progress = (resume // PROGRESS_LOG_BYTES + 1) * PROGRESS_LOG_BYTES if pbar.disable else None
+
+                # a 200 answer to a Range request restarts the file, appending it would corrupt the .part
+                bytes_written = resume if r.status_code == 206 else 0
+                mode = "ab" if bytes_written else "wb"
+
+                watchdog = ThroughputWatchdog.from_settings()
+                stalled = None
+                shaper = get_bandwidth_shaper()
+                # small reads keep the watchdog and the bandwidth shaper responsive
+                small_reads = watchdog or shaper.is_active()
+                # served from the local HTTP cache: neither network traffic nor a host speed
+                cached = r.headers.get(CACHE_HEADER) == "hit"
+
+                # the writer thread absorbs USB write stalls so the stream keeps flowing
+                with WriteBehindFile(part_file, mode) as f:
+                    # reserved after opening: "wb" would release blocks reserved before
+                    if total_size is not None and not reserve_space(part_file, total_size, logging_callback):
+                        pbar.close()
+                        log("not enough space on the drive")
+                        return False
+                    for chunk in r.iter_content(chunk_size=min(chunk_size, WATCHDOG_READ_SIZE) if small_reads else chunk_size):
                         if not chunk:
                             continue
 
@@ -151,8 +278,39 @@ def robust_download(
                         f.write(chunk)
                         bytes_written += len(chunk)
                         pbar.update(len(chunk))
+                        if next_progress is not None and bytes_written >= next_progress:
+                            next_progress += PROGRESS_LOG_BYTES
+                            logging_callback(progress_message(
+                                f"[robust_download] {bytes_written // (1024 * 1024):,}"
+                                + (f" / {total_size // (1024 * 1024):,}" if total_size else "") + " MB downloaded...",
+                                "download", bytes_written, time.monotonic() - started,
+                            ))
+                        slept = shaper.throttle(url, len(chunk)) if not cached else 0.0
+
+                        if watchdog:
+                            stalled = watchdog.update(len(chunk), paused=slept)
+                            if stalled:
+                                break
 
                 pbar.close()
+                if bytes_written > resume:
+                    # progress: the next failure starts a fresh backoff and deadline
+                    policy.reset()
+                if not cached:
+                    record_throughput(url, bytes_written - (resume if r.status_code == 206 else 0), time.monotonic() - started)
+
+                # -------------------------
+                # stall failover: resume from the .part offset on the next source
+                # -------------------------
+                if stalled:
+                    attempt += 1
+                    next_url = urls[(urls.index(url) + 1) % len(urls)]
+                    if next_url != url:
+                        log(f"stalled on {url}: {stalled}; resuming at {bytes_written} bytes from {next_url}")
+                    else:
+                        log(f"stalled: {stalled}; reconnecting to resume at {bytes_written} bytes")
+                    url = next_url
+                    continue
 
                 # -------------------------
                 # resume learning logic
@@ -183,7 +341,8 @@ def robust_download(
                     if final_size < expected_size:
                         log(f"incomplete {final_size}/{expected_size}")
                         attempt += 1
-                        time.sleep(delay)
+                        if not policy.wait():
+                            break
                         continue
 
                     if final_size > expected_size:
@@ -194,7 +353,8 @@ def robust_download(
                     if total_size is not None and final_size < total_size:
                         log(f"incomplete {final_size}/{total_size}")
                         attempt += 1
-                        time.sleep(delay)
+                        if not policy.wait():
+                            break
                         continue
 
                     if total_size is not None and final_size > total_size:
@@ -202,13 +362,17 @@ def robust_download(
                         return False
 
                 os.replace(part_file, final_file)
+                get_drive_index().update(part_file, final_file)
                 log(f"completed → {final_file}")
                 return True
 
         except requests.exceptions.RequestException as e:
             attempt += 1
             log(f"network error: {e} (attempt {attempt})")
-            time.sleep(delay)
+            breaker.record_failure(url, logging_callback)
+            if not policy.wait():
+                log("retry deadline reached")
+                break
 
         except Exception as e:
             log(f"unexpected error: {e}")
@@ -1,57 +1,77 @@
 
-import requests
 import time
-from tqdm import tqdm
 import sys
+from updaters.shared.bandwidth_shaper import get_bandwidth_shaper
+from updaters.shared.circuit_breaker import HOST_DOWN_STATUSES, get_circuit_breaker
+from updaters.shared.host_throughput import host_of
+from updaters.shared.http_session import get_session
+from updaters.shared.retry_policy import RetryPolicy, is_retryable_status, parse_retry_after
 
 # --- robust_get: for in-memory requests only ---
 def robust_get(url: str, logging_callback, method: str = "GET", retries: int = 5, delay: float = 1.0, redirects=True, timeout: float = 10.0, **kwargs):
     """
     Robust HTTP(S) request with retry, returns a response-like object with .content and .iter_content().
+
+    Waits between attempts follow a RetryPolicy (exponential backoff with jitter, Retry-After,
+    the retry_deadline setting). Only network errors, 408, 429 and 5xx are retried; any other
+    error status returns None right away, as does a host the circuit breaker counts as down.
     """
+    import requests  # deferred: importing requests costs more than the rest of startup
+
     def report(msg):
         logging_callback(msg)
     # Log the URL being fetched using report()
     report(f"[robust_get] Fetching URL: {url}")
     attempt = 0
-    PERMANENT_FAILURE_STATUSES = {400, 401, 410, 422, 451}
     MAX_HTTP_RETRIES = retries if retries != -1 else 10
-    MAX_PERMANENT_RETRIES = 5
+    breaker = get_circuit_breaker()
+    policy = RetryPolicy.from_settings(base_delay=delay)
     while True:
+        if not breaker.allow(url):
+            report(f"[robust_get] {host_of(url)} is down, not fetching {url} (next try in {breaker.retry_in(url):.0f}s)")
+            return None
         try:
             kwargs_no_headers = dict(kwargs)
             headers = kwargs_no_headers.pop("headers", {}).copy()
-            resp = requests.request(method, url, headers=headers, timeout=timeout, allow_redirects=redirects, **kwargs_no_headers)
+            resp = get_session().request(method, url, headers=headers, timeout=timeout, allow_redirects=redirects, **kwargs_no_headers)
+            if resp.status_code in HOST_DOWN_STATUSES:
+                breaker.record_failure(url, logging_callback)
+            else:
+                breaker.record_success(url, logging_callback)
             if resp.status_code in {301, 302, 303, 307, 308}:
                 location = resp.headers.get('Location', '(no Location header)')
                 report(f"Redirect ({resp.status_code}) for {url} to {location}")
                 return None
+            elif resp.status_code == 304:
+                # Only happens for conditional requests: the caller's copy is still current
+                return resp
             elif resp.status_code == 200 or resp.status_code == 206:
                 if not resp.encoding:
                     resp.encoding = 'utf-8'
+                if not kwargs.get("stream"):
+                    # The body is already read; charging it still slows the transfers that follow
+                    get_bandwidth_shaper().throttle(url, len(resp.content))
                 return resp
-            elif resp.status_code in PERMANENT_FAILURE_STATUSES:
-                attempt += 1
-                report(f"HTTP {resp.status_code} (permanent, attempt {attempt}/{MAX_PERMANENT_RETRIES}): {url}")
-                if attempt > MAX_PERMANENT_RETRIES:
-                    report(f"Exceeded maximum retries for permanent error {url} (HTTP {resp.status_code})")
-                    return None
-                else:
-                    time.sleep(delay)
-                    continue
-            else:
+            elif is_retryable_status(resp.status_code):
                 attempt += 1
                 report(f"HTTP {resp.status_code} (attempt {attempt}/{MAX_HTTP_RETRIES}): {url}")
                 if attempt > MAX_HTTP_RETRIES:
                     report(f"Exceeded maximum retries for {url} (HTTP {resp.status_code})")
                     return None
-                else:
-                    time.sleep(delay)
-                    continue
+            else:
+                report(f"HTTP {resp.status_code}, not retrying: {url}")
+                return None
+            if not policy.wait(parse_retry_after(resp.headers.get("Retry-After"))):
+                report(f"Giving up on {url}: retry deadline reached (HTTP {resp.status_code})")
+                return None
         except requests.exceptions.RequestException as e:
-            report(f"Network error: {e}\nWaiting for connection to resume for {url}...")
-            time.sleep(3)
-            continue
+            breaker.record_failure(url, logging_callback)
+            wait = policy.next_delay()
+            if wait is None:
+                report(f"Network error: {e}\nGiving up on {url}: retry deadline reached")
+                return None
+            report(f"Network error: {e}\nRetrying {url} in {wait:.1f}s...")
+            time.sleep(wait)
         except Exception as e:
             report(f"robust_get: Unexpected error: {e}")
             return None
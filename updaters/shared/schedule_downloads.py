@@ -0,0 +1,106 @@
+import concurrent.futures
+import time
+from typing import NamedTuple
+from updaters.shared.host_throughput import host_of, get_host_throughput
+from updaters.shared.settings import get_setting
+
+# Assumed for hosts never downloaded from before (bytes/s)
+DEFAULT_THROUGHPUT = 5 * 1024 * 1024
+# Assumed for downloads whose size can't be estimated
+DEFAULT_SIZE = 1024 ** 3
+
+
+class DownloadPlan(NamedTuple):
+    order: list[int]
+    hosts: list[str | None]
+    durations: list[float]
+    makespan: float
+    sizes: list[int | None]
+
+
+def _format_duration(seconds: float) -> str:
+    minutes = round(seconds / 60)
+    return f"{minutes // 60}h{minutes % 60:02d}m" if minutes >= 60 else f"{max(1, minutes)}m"
+
+
+def _format_size(nbytes: float) -> str:
+    return f"{nbytes / 1024 ** 3:.1f} GB" if nbytes >= 1024 ** 3 else f"{nbytes / 1024 ** 2:.0f} MB"
+
+
+def predict_makespan(order: list[int], durations: list[float], hosts: list[str | None], workers: int, host_cap: int) -> float:
+    """
+    Simulate the network pool: whenever a worker is free, the first job in order whose host
+    is below host_cap starts. Returns the predicted time (seconds) until the last job finishes.
+    """
+    pending = list(order)
+    running: list[tuple[float, str | None]] = []
+    now = 0.0
+    while pending:
+        running = [(end, host) for end, host in running if end > now]
+        started = False
+        if len(running) < workers:
+            for job in pending:
+                if hosts[job] is None or sum(1 for _, host in running if host == hosts[job]) < host_cap:
+                    running.append((now + durations[job], hosts[job]))
+                    pending.remove(job)
+                    started = True
+                    break
+        if not started:
+            now = min(end for end, _ in running)
+    return max((end for end, _ in running), default=now)
+
+
+def schedule_downloads(updater_list: list, logging_callback, workers: int, host_cap: int) -> DownloadPlan:
+    """
+    Order downloads longest-first (LPT) so the biggest images don't start last and stretch the run.
+
+    Each download's time is estimated from its expected size (state database, local file or a
+    size probe; see GenericUpdater.estimate_download_size) and the throughput its host gave in
+    earlier runs. The predicted finish time is printed through logging_callback.
+
+    Args:
+        updater_list (list[GenericUpdater]): Updaters about to install.
+        workers (int): Concurrent downloads (size of the network pool).
+        host_cap (int): Concurrent downloads allowed from one host.
+
+    Returns:
+        DownloadPlan: Updater indices in start order, per-updater host and estimated seconds, the
+        predicted makespan, and the size estimates (None where unknown).
+    """
+    def estimate(updater) -> tuple[str | None, int | None]:
+        try:
+            link = updater._get_download_link()
+        except Exception:
+            link = None
+        try:
+            size = updater.estimate_download_size()
+        except Exception:
+            size = None
+        return link if isinstance(link, str) else None, size
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        estimates = list(executor.map(estimate, updater_list))
+
+    default_speed = float(get_setting("default_throughput", DEFAULT_THROUGHPUT))
+    hosts = [host_of(link) or None if link else None for link, _ in estimates]
+    sizes = [size or DEFAULT_SIZE for _, size in estimates]
+    durations = [
+        size / ((get_host_throughput(link) if link else None) or default_speed)
+        for (link, _), size in zip(estimates, sizes)
+    ]
+    order = sorted(range(len(updater_list)), key=lambda job: durations[job], reverse=True)
+    makespan = predict_makespan(order, durations, hosts, workers, host_cap)
+
+    if updater_list:
+        for position, job in enumerate(order, 1):
+            updater = updater_list[job]
+            name = " ".join(filter(None, [updater.__class__.__name__, getattr(updater, "edition", None)]))
+            known = "" if estimates[job][1] else "~"
+            logging_callback(
+                f"[schedule_downloads] {position}. {name}: {known}{_format_size(sizes[job])} from {hosts[job] or 'unknown host'}, ~{_format_duration(durations[job])}"
+            )
+        finish = time.strftime("%H:%M", time.localtime(time.time() + makespan))
+        logging_callback(
+            f"[schedule_downloads] {len(updater_list)} download(s), {_format_size(sum(sizes))}: predicted finish at {finish} (~{_format_duration(makespan)})"
+        )
+    return DownloadPlan(order, hosts, durations, makespan, [size for _, size in estimates])
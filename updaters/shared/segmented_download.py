@@ -0,0 +1,303 @@
+import hashlib
+import json
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+from updaters.shared.bandwidth_shaper import get_bandwidth_shaper
+from updaters.shared.block_manifest import BlockManifest
+from updaters.shared.circuit_breaker import HOST_DOWN_STATUSES, get_circuit_breaker
+from updaters.shared.host_throughput import record_throughput
+from updaters.shared.http_cache import CACHE_HEADER
+from updaters.shared.retry_policy import RetryPolicy, is_retryable_status
+from updaters.shared.throughput_watchdog import ThroughputWatchdog, WATCHDOG_READ_SIZE
+from updaters.shared.write_behind import WriteBehindFile, preallocate_file
+
+SEGMENT_SIZE = 8 * 1024 * 1024
+# A source is dropped after this many failed segments in a row
+MAX_SOURCE_ERRORS = 3
+SEGMENT_TIMEOUT = 15
+# Backoff of a source between failed segments
+SOURCE_RETRY_DELAY = 0.5
+SOURCE_MAX_RETRY_DELAY = 5.0
+# The sidecar is rewritten after this many newly written segments or this many seconds,
+# whichever comes first, and once more at the end; a crash costs at most that much progress
+STATE_SAVE_SEGMENTS = 16
+STATE_SAVE_INTERVAL = 1.0
+
+
+def segment_state_file(part_file: Path) -> Path:
+    """Sidecar recording which segments of a preallocated .part file are complete."""
+    return Path(str(part_file) + ".segments")
+
+
+def segments_done(part_file: Path) -> int:
+    """Number of segments already recorded as complete for a .part file."""
+    try:
+        return len(json.loads(segment_state_file(part_file).read_text(encoding="utf-8")).get("done", []))
+    except (OSError, ValueError):
+        return 0
+
+
+def _load_state(state_file: Path, total_size: int, segment_size: int) -> set[int]:
+    try:
+        state = json.loads(state_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return set()
+    if state.get("total_size") != total_size or state.get("segment_size") != segment_size:
+        return set()
+    return set(state.get("done", []))
+
+
+def _save_state(state_file: Path, total_size: int, segment_size: int, done: set[int]):
+    tmp = state_file.with_name(state_file.name + ".tmp")
+    tmp.write_text(json.dumps({"total_size": total_size, "segment_size": segment_size, "done": sorted(done)}), encoding="utf-8")
+    os.replace(tmp, state_file)
+
+
+def segmented_download(
+    urls: list[str],
+    part_file: Path,
+    total_size: int,
+    logging_callback,
+    segment_size: int = SEGMENT_SIZE,
+    chunk_size: int = 1024 * 1024,
+    block_manifest: BlockManifest | None = None,
+) -> bool:
+    """
+    Download one file from several equivalent sources at once into a single .part file.
+
+    The file is split into fixed byte-range segments kept in a shared queue. Every source has
+    its own worker pulling the next free segment, so faster mirrors naturally end up serving
+    more of the file. A source that errors repeatedly, or reports a different file size, is
+    dropped and its segment goes back into the queue for the others.
+
+    Completed segments are recorded in a sidecar next to the .part file, so an interrupted
+    download resumes where it stopped, even with a different set of sources.
+
+    With a block_manifest (piece hashes from a metalink or torrent), segments are aligned to
+    whole pieces and every piece is verified before it is written; a source serving bad data
+    is dropped.
+
+    Sources on a host the circuit breaker counts as down are left out, and their failures
+    feed it, so a dead mirror stops being tried by every download at once.
+
+    Args:
+        urls (list[str]): Equivalent URLs for the same file.
+        part_file (Path): Destination; preallocated to total_size.
+        total_size (int): Expected size of the file in bytes.
+        block_manifest (BlockManifest | None): Piece digests to verify segments against.
+
+    Returns:
+        bool: True once every segment is written, False if the sources ran out first.
+    """
+    # deferred so that importing the updaters stays cheap
+    import requests
+    from tqdm import tqdm
+
+    def log(msg):
+        logging_callback(f"[segmented_download] {msg}")
+
+    breaker = get_circuit_breaker()
+    urls = [url for url in urls if breaker.allow(url)]
+    if not urls:
+        log("The hosts of all sources are down")
+        return False
+
+    part_file = Path(part_file)
+    if block_manifest is not None:
+        if not hasattr(hashlib, block_manifest.hash_type):
+            log(f"Unsupported piece hash type {block_manifest.hash_type!r}, not verifying pieces")
+            block_manifest = None
+        elif block_manifest.total_size not in (None, total_size) or len(block_manifest) * block_manifest.block_size < total_size:
+            log("Piece hashes don't describe a file of this size, not verifying pieces")
+            block_manifest = None
+        else:
+            segment_size = max(1, segment_size // block_manifest.block_size) * block_manifest.block_size
+            h_factory = getattr(hashlib, block_manifest.hash_type)
+    state_file = segment_state_file(part_file)
+    segment_count = (total_size + segment_size - 1) // segment_size
+
+    done = _load_state(state_file, total_size, segment_size) if part_file.exists() else set()
+    if not part_file.exists() or part_file.stat().st_size != total_size:
+        if done:
+            log("Part file does not match its segment state, starting over")
+            done = set()
+        preallocate_file(part_file, total_size, logging_callback)
+    _save_state(state_file, total_size, segment_size, done)
+
+    pending = queue.Queue()
+    for index in range(segment_count):
+        if index not in done:
+            pending.put(index)
+    remaining = [segment_count - len(done)]
+    lock = threading.Lock()
+    log(f"{len(urls)} source(s), {remaining[0]}/{segment_count} segments of {segment_size // 1024} KiB to fetch")
+
+    pbar = tqdm(
+        total=total_size,
+        initial=min(total_size, len(done) * segment_size),
+        unit="B",
+        unit_scale=True,
+        disable=not sys.stdout.isatty()
+    )
+    served = {url: 0 for url in urls}
+    # bytes and seconds spent per source, for the per-host throughput history
+    transferred = {url: [0, 0.0] for url in urls}
+    active = [len(urls)]
+
+    def fetch_segment(session, url, index) -> bool | None:
+        """Fetch one segment. True on success, False on a transient error, None if the source must be dropped."""
+        start = index * segment_size
+        end = min(start + segment_size, total_size)
+        headers = {"Range": f"bytes={start}-{end - 1}", "Accept-Encoding": "identity"}
+        started = time.monotonic()
+        cached = False
+        try:
+            with session.get(url, headers=headers, stream=True, timeout=SEGMENT_TIMEOUT) as r:
+                if r.status_code in HOST_DOWN_STATUSES:
+                    breaker.record_failure(url, logging_callback)
+                else:
+                    breaker.record_success(url, logging_callback)
+                if is_retryable_status(r.status_code):
+                    log(f"{url}: HTTP {r.status_code} for segment {index}")
+                    return False
+                if r.status_code != 206:
+                    log(f"Dropping {url}: HTTP {r.status_code} for a range request")
+                    return None
+                m = re.match(r"bytes (\d+)-(\d+)/(\d+|\*)", r.headers.get("Content-Range", ""))
+                if not m or int(m.group(1)) != start or (m.group(3) != "*" and int(m.group(3)) != total_size):
+                    log(f"Dropping {url}: serves a different file (Content-Range {r.headers.get('Content-Range')!r}, expected total {total_size})")
+                    return None
+                watchdog = ThroughputWatchdog.from_settings()
+                shaper = get_bandwidth_shaper()
+                # served from the local HTTP cache: neither network traffic nor a host speed
+                cached = r.headers.get(CACHE_HEADER) == "hit"
+                data = bytearray()
+                for chunk in r.iter_content(chunk_size=min(chunk_size, WATCHDOG_READ_SIZE) if watchdog or shaper.is_active() else chunk_size):
+                    data += chunk
+                    slept = shaper.throttle(url, len(chunk)) if not cached else 0.0
+                    if len(data) >= end - start:
+                        break
+                    stalled = watchdog.update(len(chunk), paused=slept) if watchdog else None
+                    if stalled:
+                        with lock:
+                            others = active[0] > 1
+                        if others:
+                            log(f"Dropping {url}: stalled on segment {index}, {stalled}")
+                            return None
+                        log(f"{url}: stalled on segment {index}, {stalled}; reconnecting")
+                        return False
+        except requests.exceptions.RequestException as e:
+            log(f"{url}: network error on segment {index}: {e}")
+            breaker.record_failure(url, logging_callback)
+            return False
+        if not cached:
+            with lock:
+                transferred[url][0] += len(data)
+                transferred[url][1] += time.monotonic() - started
+        if len(data) < end - start:
+            log(f"{url}: short segment {index} ({len(data)}/{end - start} bytes)")
+            return False
+        if block_manifest is not None:
+            first_piece = start // block_manifest.block_size
+            for piece in range(first_piece, (end + block_manifest.block_size - 1) // block_manifest.block_size):
+                piece_start, piece_end = piece * block_manifest.block_size, min((piece + 1) * block_manifest.block_size, total_size)
+                if h_factory(data[piece_start - start:piece_end - start]).hexdigest() != block_manifest.digests[piece]:
+                    log(f"Dropping {url}: piece {piece} does not match its hash")
+                    return None
+        writer.write_at(start, data[:end - start], on_written=lambda: segment_written(index))
+        return True
+
+    # segments written since the sidecar was last saved, and when that was
+    unsaved = [0]
+    saved_at = [time.monotonic()]
+
+    def save_state(force: bool = False):
+        with lock:
+            if not unsaved[0] or not force and unsaved[0] < STATE_SAVE_SEGMENTS and time.monotonic() - saved_at[0] < STATE_SAVE_INTERVAL:
+                return
+            snapshot = set(done)
+            unsaved[0] = 0
+            saved_at[0] = time.monotonic()
+        # outside the lock: the workers only need it for bookkeeping, not for the disk write
+        _save_state(state_file, total_size, segment_size, snapshot)
+
+    def segment_written(index):
+        # Runs on the writer thread: a segment only counts as done once it is in the file.
+        # Only that one thread saves until the writer is closed, so saves never overlap.
+        with lock:
+            done.add(index)
+            remaining[0] -= 1
+            unsaved[0] += 1
+        save_state()
+
+    def worker(url):
+        try:
+            fetch_segments(url)
+        finally:
+            with lock:
+                active[0] -= 1
+
+    def fetch_segments(url):
+        errors = 0
+        backoff = RetryPolicy(SOURCE_RETRY_DELAY, SOURCE_MAX_RETRY_DELAY, deadline=None)
+        with requests.Session() as session:
+            while True:
+                try:
+                    index = pending.get(timeout=0.5)
+                except queue.Empty:
+                    with lock:
+                        if remaining[0] == 0 or writer.error is not None:
+                            return
+                    continue
+                if not breaker.allow(url):
+                    pending.put(index)
+                    log(f"Dropping {url}: its host is down")
+                    return
+                result = fetch_segment(session, url, index)
+                if result is True:
+                    errors = 0
+                    backoff.reset()
+                    with lock:
+                        served[url] += 1
+                        pbar.update(min(segment_size, total_size - index * segment_size))
+                    continue
+                pending.put(index)
+                errors += 1
+                if result is None or errors >= MAX_SOURCE_ERRORS:
+                    if result is not None:
+                        log(f"Dropping {url} after {errors} failed segments in a row")
+                    return
+                backoff.wait()
+
+    # One writer for all sources: the drive sees sequential large writes instead of competing
+    # seeks, and slow flash writes don't hold up the network workers
+    writer = WriteBehindFile(part_file, "r+b")
+    threads = [threading.Thread(target=worker, args=(url,), daemon=True) for url in urls]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    pbar.close()
+    try:
+        writer.close()
+    except OSError as e:
+        log(f"Writing {part_file.name} failed: {e}")
+        save_state(force=True)
+        return False
+
+    for url, count in served.items():
+        if count:
+            log(f"{url} served {count} segment(s)")
+    for url, (nbytes, seconds) in transferred.items():
+        record_throughput(url, nbytes, seconds)
+    if remaining[0]:
+        save_state(force=True)
+        log(f"All sources failed with {remaining[0]} segment(s) left, progress kept in {state_file.name}")
+        return False
+    state_file.unlink(missing_ok=True)
+    return True
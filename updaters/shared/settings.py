@@ -0,0 +1,24 @@
+from typing import Any
+
+# Name of the config.toml table holding sisou2's own options rather than a folder of updaters
+SETTINGS_SECTION = "sisou2"
+
+_settings: dict[str, Any] = {}
+
+
+def load_settings(config: dict[str, Any]) -> dict[str, Any]:
+    """
+    Pop the [sisou2] table out of a parsed config and make it the process-wide settings.
+
+    The table is removed from config so stack_updaters doesn't mistake it for a folder.
+    """
+    section = config.pop(SETTINGS_SECTION, None)
+    _settings.clear()
+    if isinstance(section, dict):
+        _settings.update(section)
+    return _settings
+
+
+def get_setting(key: str, default: Any = None) -> Any:
+    """Return a value from the [sisou2] config table, or default if it isn't set."""
+    return _settings.get(key, default)
@@ -1,9 +1,40 @@
 from pathlib import Path
 from updaters.shared.resolve_file_case import resolve_file_case
 import hashlib
+import os
+import threading
+import time
+from updaters.shared.log_pipeline import progress_message
 
 READ_CHUNK_SIZE = 8 * 1024 * 1024
 
+# Digests of files that passed hash_check this run: path -> (size, mtime_ns, hash_type, digest)
+_verified_digests: dict[str, tuple[int, int, str, str]] = {}
+_verified_lock = threading.Lock()
+
+
+def get_verified_digest(file: Path) -> tuple[str, str] | None:
+    """
+    (hash_type, digest) of file if it passed hash_check this run and hasn't changed since.
+    """
+    try:
+        st = os.stat(file)
+    except OSError:
+        return None
+    with _verified_lock:
+        verified = _verified_digests.get(str(Path(file).resolve()))
+    if verified and verified[:2] == (st.st_size, st.st_mtime_ns):
+        return verified[2], verified[3]
+    return None
+
+
+def record_verified_digest(file: Path, hash_type: str, digest: str):
+    """Remember that file (as it is now) has the given verified digest, see get_verified_digest."""
+    st = os.stat(file)
+    with _verified_lock:
+        _verified_digests[str(Path(file).resolve())] = (st.st_size, st.st_mtime_ns, hash_type, digest)
+
+
 def hash_check(file: Path, hash_value: str, logging_callback, hash_type: str = "sha256") -> bool:
     """
     Calculate the hash of a given file and compare it with a provided hash value.
@@ -20,6 +51,8 @@ def hash_check(file: Path, hash_value: str, logging_callback, hash_type: str = "
         return False
 
     with open(local_file, "rb") as f:
+        st = os.fstat(f.fileno())
+        started = time.monotonic()
         bytes_done = 0
         log_interval = 500 * 1024 * 1024
         next_log_bytes = log_interval
@@ -30,11 +63,16 @@ def hash_check(file: Path, hash_value: str, logging_callback, hash_type: str = "
             h.update(chunk)
             bytes_done += len(chunk)
             if bytes_done >= next_log_bytes:
-                logging_callback(f"Hashing: {bytes_done // (1024 * 1024):,} MB hashed...")
+                logging_callback(progress_message(
+                    f"Hashing: {bytes_done // (1024 * 1024):,} MB hashed...", "hash", bytes_done, time.monotonic() - started
+                ))
                 next_log_bytes += log_interval
 
     file_hash = h.hexdigest()
     result = hash_value.lower() == file_hash
+    if result:
+        with _verified_lock:
+            _verified_digests[str(Path(local_file).resolve())] = (st.st_size, st.st_mtime_ns, hash_type, file_hash)
     GREEN = '\033[92m'
     RED = '\033[91m'
     RESET = '\033[0m'
@@ -0,0 +1,76 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any
+
+STATE_FILE_NAME = ".sisou2_state.json"
+
+
+class StateDB:
+    """
+    Persistent record of what each updater last saw upstream and last verified locally.
+
+    Records are keyed by folder+updater+edition+lang and hold the upstream version, download URL,
+    expected digest, size and HTTP validators (ETag / Last-Modified), plus the local file's
+    verified digest, size and mtime. Paths are stored relative to the database file so the
+    drive can change mount point or drive letter.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        try:
+            self._records: dict[str, dict[str, Any]] = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self._records = {}
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            record = self._records.get(key)
+            return dict(record) if record else None
+
+    def put(self, key: str, record: dict[str, Any]):
+        with self._lock:
+            self._records[key] = record
+            self._save()
+
+    def remove(self, key: str):
+        with self._lock:
+            if self._records.pop(key, None) is not None:
+                self._save()
+
+    def relative(self, file: Path) -> str:
+        """Path of file as stored in a record."""
+        try:
+            return Path(file).resolve().relative_to(self.path.parent.resolve()).as_posix()
+        except ValueError:
+            return str(Path(file).resolve())
+
+    def absolute(self, stored: str) -> Path:
+        """Inverse of relative()."""
+        return self.path.parent / stored
+
+    def _save(self):
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        try:
+            tmp.write_text(json.dumps(self._records, indent=2, sort_keys=True), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError:
+            # A read-only drive just loses the incremental speed-up
+            pass
+
+
+_state_db: StateDB | None = None
+
+
+def open_state_db(folder: Path) -> StateDB:
+    """Load (or start) the state database of a Ventoy drive and make it the process-wide one."""
+    global _state_db
+    _state_db = StateDB(Path(folder) / STATE_FILE_NAME)
+    return _state_db
+
+
+def get_state_db() -> StateDB | None:
+    """The state database opened by open_state_db, None if incremental runs are off."""
+    return _state_db
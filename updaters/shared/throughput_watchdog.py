@@ -0,0 +1,65 @@
+import time
+from collections import deque
+from updaters.shared.settings import get_setting
+
+DEFAULT_MIN_SPEED = 32 * 1024
+DEFAULT_WINDOW = 60.0
+# Read granularity while a watchdog is active: iter_content blocks until a whole chunk arrives,
+# so big chunks would hide a trickling transfer for minutes.
+WATCHDOG_READ_SIZE = 64 * 1024
+
+
+class ThroughputWatchdog:
+    """
+    Moving-average speed check for one transfer.
+
+    Feed it every chunk with update(); once the transfer has run for a full window, it reports
+    a stall whenever the average speed over the last window drops below min_speed. Time the
+    transfer spent paused on purpose (the bandwidth shaper's sleeps) is left out of the window,
+    so a transfer capped below min_speed isn't taken for a stalled one.
+
+    Attributes:
+        min_speed (float): Floor in bytes per second.
+        window (float): Length of the moving window in seconds.
+    """
+
+    def __init__(self, min_speed: float, window: float):
+        self.min_speed = min_speed
+        self.window = window
+        self._start = time.monotonic()
+        self._total = 0
+        # seconds paused on purpose so far; the window runs on monotonic time minus this
+        self._paused = 0.0
+        # (timestamp, cumulative bytes), oldest first
+        self._samples = deque([(self._start, 0)])
+
+    @classmethod
+    def from_settings(cls) -> "ThroughputWatchdog | None":
+        """Build a watchdog from the stall_min_speed / stall_window settings, None if disabled."""
+        min_speed = get_setting("stall_min_speed", DEFAULT_MIN_SPEED)
+        window = get_setting("stall_window", DEFAULT_WINDOW)
+        if not min_speed or not window:
+            return None
+        return cls(min_speed, window)
+
+    def update(self, nbytes: int, paused: float = 0.0) -> str | None:
+        """
+        Record nbytes just received, and the seconds since the last update spent paused on purpose.
+
+        Returns:
+            str | None: The reason the transfer counts as stalled, or None while it is fast enough.
+        """
+        self._paused += paused
+        now = time.monotonic() - self._paused
+        self._total += nbytes
+        self._samples.append((now, self._total))
+        while len(self._samples) > 2 and self._samples[1][0] <= now - self.window:
+            self._samples.popleft()
+        if now - self._start < self.window:
+            return None
+        since, received = self._samples[0]
+        elapsed = now - since
+        speed = (self._total - received) / elapsed if elapsed > 0 else float("inf")
+        if speed < self.min_speed:
+            return f"average {speed / 1024:.1f} KiB/s over the last {elapsed:.0f} s is below the {self.min_speed / 1024:.0f} KiB/s floor"
+        return None
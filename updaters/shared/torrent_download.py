@@ -1,24 +1,31 @@
 import asyncio
-
-try:
-    from torrentp import TorrentDownloader
-except ImportError:
-    TorrentDownloader = None
+from updaters.shared.bandwidth_shaper import get_bandwidth_shaper
 
 def download_torrent(torrent_url: str, save_path: str, logging_callback=None) -> bool:
     """
     Download a file using a .torrent URL with torrentp.
     Returns True on success, False on failure.
     """
+    try:
+        from torrentp import TorrentDownloader  # optional and heavy, imported on first use
+    except ImportError:
+        TorrentDownloader = None
     if TorrentDownloader is None:
         if logging_callback:
             logging_callback("torrentp is not installed. Cannot download torrent files.")
         return False
     if logging_callback:
         logging_callback(f"Downloading torrent file: {torrent_url}")
+    # libtorrent does its own I/O, so it gets the current cap up front instead of drawing tokens
+    limit = get_bandwidth_shaper().limit_for(torrent_url)
     try:
         torrent = TorrentDownloader(torrent_url, save_path=save_path)
-        asyncio.run(torrent.start_download())
+        if limit:
+            if logging_callback:
+                logging_callback(f"Limiting torrent download to {limit / 1024:.0f} KiB/s")
+            asyncio.run(torrent.start_download(download_speed=max(1, int(limit / 1024))))
+        else:
+            asyncio.run(torrent.start_download())
         if logging_callback:
             logging_callback(f"Torrent download completed in: {save_path}")
         return True
@@ -0,0 +1,90 @@
+import hashlib
+import os
+import shutil
+from pathlib import Path
+from updaters.shared.drive_index import get_drive_index
+from updaters.shared.sha256_hash_check import READ_CHUNK_SIZE, get_verified_digest, record_verified_digest
+
+COPY_CHUNK_SIZE = 64 * 1024 * 1024
+
+
+def file_digest(path: Path, hash_type: str = "sha256") -> str:
+    """Hex digest of a whole file."""
+    h = getattr(hashlib, hash_type)()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _copy_contents(src_fd: int, dst_fd: int, size: int):
+    """Copy size bytes in the kernel where possible (copy_file_range, then sendfile), else through userspace."""
+    copied = 0
+    for kernel_copy in ("copy_file_range", "sendfile"):
+        if not hasattr(os, kernel_copy):
+            continue
+        try:
+            while copied < size:
+                if kernel_copy == "copy_file_range":
+                    n = os.copy_file_range(src_fd, dst_fd, min(COPY_CHUNK_SIZE, size - copied), copied, copied)
+                else:
+                    os.lseek(dst_fd, copied, os.SEEK_SET)
+                    n = os.sendfile(dst_fd, src_fd, copied, min(COPY_CHUNK_SIZE, size - copied))
+                if n == 0:
+                    break
+                copied += n
+            if copied == size:
+                return
+        except OSError:
+            # e.g. EXDEV on old kernels, EINVAL on some filesystems: try the next way from where we are
+            pass
+    os.lseek(src_fd, copied, os.SEEK_SET)
+    os.lseek(dst_fd, copied, os.SEEK_SET)
+    with open(src_fd, "rb", closefd=False) as src, open(dst_fd, "wb", closefd=False) as dst:
+        shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+
+
+def verified_copy(src: Path, dst: Path, logging_callback) -> bool:
+    """
+    Copy a verified file onto the Ventoy drive in one sequential pass and check the copy.
+
+    The data goes to a temporary file next to dst, is fsync'ed, read back and compared with the
+    source digest (the one recorded when src was verified, or computed now); only then is it
+    renamed over dst. The copy's digest is recorded, so dst counts as verified afterwards.
+
+    Returns:
+        bool: True if dst now holds an identical copy of src.
+    """
+    src, dst = Path(src), Path(dst)
+    tmp = dst.with_name(dst.name + ".copying")
+    verified = get_verified_digest(src)
+    hash_type, expected = verified if verified else ("sha256", None)
+    try:
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        size = src.stat().st_size
+        logging_callback(f"[verified_copy] Copying {src.name} ({size // (1024 * 1024):,} MB) to {dst.parent}")
+        with open(src, "rb") as s, open(tmp, "wb") as d:
+            _copy_contents(s.fileno(), d.fileno(), size)
+            os.fsync(d.fileno())
+            if hasattr(os, "posix_fadvise"):
+                # Read back from the device, not from the page cache we just filled
+                os.posix_fadvise(d.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+        if expected is None:
+            expected = file_digest(src, hash_type)
+        copied = file_digest(tmp, hash_type)
+        if copied != expected:
+            logging_callback(f"[verified_copy] \033[91mCopy of {src.name} does not match ({hash_type} {copied} != {expected})\033[0m")
+            tmp.unlink(missing_ok=True)
+            return False
+        os.replace(tmp, dst)
+        get_drive_index().update(tmp, dst)
+        record_verified_digest(dst, hash_type, expected)
+        logging_callback(f"[verified_copy] \033[92m{dst.name} copied and verified ({hash_type} {expected})\033[0m")
+        return True
+    except OSError as e:
+        logging_callback(f"[verified_copy] Copying {src} to {dst} failed: {e}")
+        try:
+            tmp.unlink(missing_ok=True)
+        except OSError:
+            pass
+        return False
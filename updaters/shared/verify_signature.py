@@ -1,8 +1,5 @@
 from updaters.shared.resolve_file_case import resolve_file_case
 from pathlib import Path
-from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import padding, ec
-from cryptography.exceptions import InvalidSignature
 import base64
 
 import mmap
@@ -12,6 +9,10 @@ def verify_opnsense_signature(pubkey_bytes, sig_bytes, img_file_path, logging_ca
     Memory-maps the file for signature verification, so the whole file is not loaded into RAM.
     img_file_path: Path or str to the image file.
     """
+    # cryptography is heavy, only loaded when a signature is actually checked
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import padding, ec
+    from cryptography.exceptions import InvalidSignature
     GREEN = '\033[92m'
     RED = '\033[91m'
     RESET = '\033[0m'
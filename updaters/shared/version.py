@@ -0,0 +1,91 @@
+import re
+from functools import lru_cache, total_ordering
+
+_RUNS = re.compile(r"\d+|\D+")
+
+
+@lru_cache(maxsize=4096)
+def _component_key(component: str) -> tuple:
+    """
+    Sort key of one version component: digit runs compare as numbers, other runs as text,
+    so "06s4" < "06s10" < "7" and "1-1" < "1-2". A number sorts after text at the same
+    position ("1" > "beta"), and a component with a suffix after the same component without
+    one ("06s4" > "06").
+    """
+    return tuple((1, int(run), "") if run.isdigit() else (0, 0, run.lower()) for run in _RUNS.findall(component.strip()))
+
+
+@total_ordering
+class Version:
+    """
+    Comparable version value: the components as written plus a sort key computed once.
+
+    Updaters keep their versions as list[str] (see GenericUpdater._str_to_version); Version.of
+    turns one into a Version (cached per distinct version), so comparing versions or picking
+    the latest in a listing costs a tuple comparison instead of re-parsing every component.
+    Handles the formats in use, e.g. Fedora "42-1.1", Proxmox "9.0-1", SuperGrub2 "2.06s4".
+
+    Attributes:
+        parts (tuple[str, ...]): The components, as written.
+        key (tuple): Sort key; versions compare and hash by it.
+    """
+
+    __slots__ = ("parts", "key")
+
+    def __init__(self, parts):
+        self.parts = tuple(str(part).strip() for part in parts)
+        self.key = tuple(_component_key(part) for part in self.parts)
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def parse(text: str, splitter: str = ".") -> "Version":
+        """Version of a string split on splitter (cached per string)."""
+        return Version(text.split(splitter))
+
+    @staticmethod
+    def of(version) -> "Version":
+        """A Version, a version string, or a list of components as a Version."""
+        if isinstance(version, Version):
+            return version
+        if isinstance(version, str):
+            return Version.parse(version)
+        return _from_parts(tuple(version))
+
+    def __iter__(self):
+        return iter(self.parts)
+
+    def __len__(self) -> int:
+        return len(self.parts)
+
+    def __getitem__(self, index):
+        return self.parts[index]
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Version):
+            return NotImplemented
+        return self.key == other.key
+
+    def __lt__(self, other) -> bool:
+        if not isinstance(other, Version):
+            return NotImplemented
+        return self.key < other.key
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    def __repr__(self) -> str:
+        return f"Version({'.'.join(self.parts)!r})"
+
+
+@lru_cache(maxsize=4096)
+def _from_parts(parts: tuple) -> Version:
+    return Version(parts)
+
+
+def version_key(version) -> tuple:
+    """Sort key of a version in any form Version.of accepts, for max()/sorted()."""
+    if isinstance(version, Version):
+        return version.key
+    if isinstance(version, str):
+        return Version.parse(version).key
+    return _from_parts(tuple(version)).key
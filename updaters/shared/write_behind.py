@@ -0,0 +1,193 @@
+import errno
+import os
+import shutil
+import sys
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Callable
+from updaters.shared.settings import get_setting
+
+# Sequential data is written in blocks of this size, at offsets that are multiples of WRITE_ALIGN
+WRITE_SIZE = 4 * 1024 * 1024
+WRITE_ALIGN = 1024 * 1024
+DEFAULT_BUFFER_MB = 64
+
+
+def preallocate_file(path: Path, size: int, logging_callback=None) -> None:
+    """
+    Make path exactly size bytes long. With the preallocate setting on (default) and
+    os.posix_fallocate available, the blocks are reserved up front, so a full drive fails
+    now rather than mid-download and the file isn't fragmented; otherwise the file is sparse.
+    """
+    with open(path, "ab") as f:
+        if get_setting("preallocate", True) and hasattr(os, "posix_fallocate") and os.fstat(f.fileno()).st_size < size:
+            try:
+                os.posix_fallocate(f.fileno(), 0, size)
+            except OSError as e:
+                if e.errno == errno.ENOSPC:
+                    # fail now, not after downloading most of the file
+                    raise
+                if logging_callback:
+                    logging_callback(f"[preallocate_file] posix_fallocate failed ({e}), using a sparse file")
+        f.truncate(size)
+
+
+def _fallocate_keep_size(fd: int, size: int) -> bool:
+    """Linux fallocate(FALLOC_FL_KEEP_SIZE): reserve blocks without changing the file size. False if unsupported."""
+    import ctypes
+    try:
+        fallocate = ctypes.CDLL(None, use_errno=True).fallocate
+    except (OSError, AttributeError):
+        return False
+    fallocate.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64]
+    if fallocate(fd, 1, 0, size) == 0:
+        return True
+    error = ctypes.get_errno()
+    if error == errno.ENOSPC:
+        raise OSError(error, os.strerror(error))
+    return False
+
+
+def reserve_space(path: Path, size: int, logging_callback=None) -> bool:
+    """
+    Reserve room for a file that grows by appending (so resuming from its size still works).
+    With the preallocate setting on, the blocks are reserved with fallocate(FALLOC_FL_KEEP_SIZE)
+    where the OS and filesystem support it; otherwise the free space is only checked.
+
+    Returns:
+        bool: False if the drive can't hold size bytes for path.
+    """
+    path = Path(path)
+    try:
+        current = path.stat().st_size if path.exists() else 0
+        if current >= size:
+            return True
+        if get_setting("preallocate", True) and sys.platform.startswith("linux"):
+            with open(path, "ab") as f:
+                if _fallocate_keep_size(f.fileno(), size):
+                    return True
+        free = shutil.disk_usage(path.parent).free
+    except OSError as e:
+        if logging_callback:
+            logging_callback(f"[reserve_space] Can't reserve {size // (1024 * 1024):,} MB for {path.name}: {e}")
+        return False
+    if free < size - current:
+        if logging_callback:
+            logging_callback(f"[reserve_space] {path.name} needs {(size - current) // (1024 * 1024):,} MB more, only {free // (1024 * 1024):,} MB free")
+        return False
+    return True
+
+
+class WriteBehindFile:
+    """
+    File whose writes are done by a dedicated thread behind a bounded buffer.
+
+    The network loop hands data over and goes straight back to reading, so a USB stick pausing
+    on a flash erase block no longer stalls the TCP stream; only when write_buffer_mb of data
+    is waiting does write() block. Sequential writes are coalesced into WRITE_SIZE blocks
+    aligned to WRITE_ALIGN; write_at() writes one block at a given offset.
+
+    A failed write is raised from the next write(), flush() or close().
+    """
+
+    def __init__(self, path: Path, mode: str = "wb", buffer_size: int | None = None):
+        self._file = open(path, mode)
+        self._offset = self._file.tell() if "a" in mode else 0
+        self._pending = bytearray()
+        self._limit = buffer_size or int(get_setting("write_buffer_mb", DEFAULT_BUFFER_MB)) * 1024 * 1024
+        self._queue: deque = deque()
+        self._queued = 0
+        self._cond = threading.Condition()
+        self._error: BaseException | None = None
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name="sisou2-writer", daemon=True)
+        self._writer.start()
+
+    @property
+    def error(self) -> BaseException | None:
+        return self._error
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                offset, data, on_written = self._queue[0]
+            if self._error is None:
+                try:
+                    self._file.seek(offset)
+                    self._file.write(data)
+                    if on_written:
+                        on_written()
+                except BaseException as e:
+                    self._error = e
+            with self._cond:
+                self._queue.popleft()
+                self._queued -= len(data)
+                self._cond.notify_all()
+
+    def _enqueue(self, offset: int, data: bytes | bytearray, on_written: Callable[[], None] | None):
+        if self._error is not None:
+            raise self._error
+        with self._cond:
+            # Wait for room, but always accept one block into an empty buffer
+            while self._queued and self._queued + len(data) > self._limit and self._error is None:
+                self._cond.wait()
+            self._queue.append((offset, bytes(data), on_written))
+            self._queued += len(data)
+            self._cond.notify_all()
+
+    def write(self, data: bytes):
+        """Append data after the previous write (like a file opened for sequential writing)."""
+        self._pending += data
+        while True:
+            # The first block after a resume is shortened so later ones start on WRITE_ALIGN
+            block = WRITE_SIZE - (self._offset % WRITE_ALIGN)
+            if len(self._pending) < block:
+                break
+            self._enqueue(self._offset, self._pending[:block], None)
+            del self._pending[:block]
+            self._offset += block
+
+    def write_at(self, offset: int, data: bytes, on_written: Callable[[], None] | None = None):
+        """Write data at offset; on_written is called from the writer thread once it is in the file."""
+        self._enqueue(offset, data, on_written)
+
+    def flush(self):
+        """Wait until everything written so far is in the file."""
+        if self._pending:
+            self._enqueue(self._offset, self._pending, None)
+            self._offset += len(self._pending)
+            self._pending = bytearray()
+        with self._cond:
+            while self._queue:
+                self._cond.wait()
+        if self._error is not None:
+            raise self._error
+        self._file.flush()
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            with self._cond:
+                self._closed = True
+                self._cond.notify_all()
+            self._writer.join()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Keep whatever made it to disk for resuming, but don't mask the original error
+            try:
+                self.close()
+            except Exception:
+                pass